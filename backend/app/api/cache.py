@@ -0,0 +1,61 @@
+import hashlib
+import json
+from urllib.parse import parse_qsl
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import CACHE_LOOKUPS, get_response_cache
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+async def cached_json(request: Request, scopes: list, build) -> Response:
+    """
+    Serves a JSON list endpoint from the response cache.
+
+    The cache key and ETag are derived from the path, the sorted query
+    parameters and the current versions of the scopes the response is built
+    from, so a matching If-None-Match is answered with 304 before any
+    metadata DB work, and any write to one of the scopes (see
+    core.cache.invalidate) makes every older entry unreachable.
+
+    Args:
+        request (Request): The incoming request.
+        scopes (list): Scopes the response depends on.
+        build (callable): Coroutine function returning the JSON-serializable payload.
+
+    Returns:
+        Response: 304, or the cached or freshly built JSON body, with its ETag.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return Response(json.dumps(jsonable_encoder(await build())).encode(), media_type="application/json")
+
+    versions = await run_in_threadpool(cache.versions, scopes)
+    params = sorted(parse_qsl(request.url.query, keep_blank_values=True))
+    key = hashlib.sha256(
+        json.dumps([request.url.path, params, list(scopes), versions]).encode()
+    ).hexdigest()
+    etag = f'W/"{key[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        CACHE_LOOKUPS.inc(result="not_modified")
+        return Response(status_code=304, headers=headers)
+
+    body = await run_in_threadpool(cache.get, key)
+    if body is not None:
+        CACHE_LOOKUPS.inc(result="hit")
+    else:
+        CACHE_LOOKUPS.inc(result="miss")
+        body = json.dumps(jsonable_encoder(await build())).encode()
+        await run_in_threadpool(cache.set, key, body)
+
+    return Response(body, media_type="application/json", headers=headers)
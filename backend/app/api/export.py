@@ -0,0 +1,183 @@
+import csv
+import datetime
+import io
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.db.session import SessionLocal
+
+# Rows fetched from the server-side cursor, and written out, at a time
+EXPORT_CHUNK_SIZE = 2000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Exported columns are given as (name, kind) pairs, kind being "int",
+# "float", "str", "datetime" or "json" (serialized to text in CSV and Parquet)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _to_text(value, kind: str):
+    if value is None:
+        return None
+    if kind == "json":
+        return json.dumps(value, default=_json_default)
+    if kind == "datetime":
+        return value.isoformat()
+    return value
+
+
+def _ndjson_chunks(chunks, columns):
+    for rows in chunks:
+        yield "".join(
+            json.dumps({name: row[name] for name, _ in columns}, default=_json_default) + "\n"
+            for row in rows
+        ).encode()
+
+
+def _csv_chunks(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([_to_text(row[name], kind) for name, kind in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """A write-only file object collecting what the Parquet writer emits between chunks."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _parquet_chunks(chunks, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(),
+             "datetime": pa.timestamp("us", tz="UTC"), "json": pa.string()}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        # One row group per chunk, sent as soon as it is written
+        for rows in chunks:
+            table = pa.Table.from_pydict(
+                {
+                    name: [_to_text(row[name], kind) if kind == "json" else row[name] for row in rows]
+                    for name, kind in columns
+                },
+                schema=schema,
+            )
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "ndjson": _ndjson_chunks,
+    "csv": _csv_chunks,
+    "parquet": _parquet_chunks,
+}
+
+
+def check_format(fmt: str):
+    """
+    Validates an export format before any query runs.
+
+    Raises:
+        HTTPException: If the format is unknown, or is Parquet without pyarrow installed.
+    """
+    if fmt not in ENCODERS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(ENCODERS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+
+
+def stream_query(query, transform=None, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Yields a query's rows in chunks from a server-side cursor.
+
+    Runs on its own session, opened when iteration starts and closed when it
+    ends, so only one chunk of rows is in memory at a time.
+
+    Args:
+        query: A select() statement.
+        transform (callable, optional): Called with (db, rows) per chunk; returns
+            the row mappings to export. Rows are exported as mappings otherwise.
+        chunk_size (int): Rows per chunk.
+
+    Yields:
+        list: Row mappings.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            yield transform(db, rows) if transform else [row._mapping for row in rows]
+    finally:
+        db.close()
+
+
+def export_response(chunks, columns: list, fmt: str, filename: str) -> StreamingResponse:
+    """
+    Streams chunks of rows as an NDJSON, CSV or Parquet download.
+
+    Args:
+        chunks: Iterable of lists of row mappings, e.g. partitions of a
+            server-side result; consumed lazily as the response is sent.
+        columns (list): (name, kind) pairs giving the exported columns in order.
+        fmt (str): 'ndjson', 'csv' or 'parquet' (see check_format).
+        filename (str): Download name, without extension.
+
+    Returns:
+        StreamingResponse: A chunked response encoding one chunk at a time.
+    """
+    return StreamingResponse(
+        ENCODERS[fmt](chunks, columns),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,33 @@
+import base64
+import datetime
+import json
+
+# Upper bound for any paginated endpoint's page size
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: datetime.datetime, row_id: int) -> str:
+    """
+    Encodes the (created_at, id) keyset position of the last row on a page
+    as an opaque URL-safe cursor.
+    """
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Returns:
+        tuple: (created_at, id).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
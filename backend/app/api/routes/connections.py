@@ -1,16 +1,61 @@
 import datetime
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.api.cache import cached_json
+from app.api.export import check_format, export_response, stream_query
+from app.api.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.core.cache import connection_scope
+from app.db.async_session import get_async_db
 from app.db.session import SessionLocal
-from app.models import Connection, Dataset, SchemaSnapshot, Incident
-from app.connectors.postgres_connector import discover_tables, get_table_schema
-from app.services.monitoring import run_checks_for_dataset
-from app.services.schema import get_latest_snapshot, save_snapshot
-from app.services.schema_diff import diff_schema
+from app.models import Connection, Dataset, Incident
+from app.jobs.queue import get_job_queue
+from app.schemas.incident import IncidentPage
 
 
 router = APIRouter(prefix="/connections", tags=["connections"])
 
+
+def _ensure_connection_exists(connection_id: int):
+    db: Session = SessionLocal()
+    exists = db.query(Connection.id).filter(Connection.id == connection_id).first()
+    db.close()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Connection not found")
+
+
+def _filter_incidents(
+    query,
+    connection_id: int,
+    status=None,
+    rule_type=None,
+    severity=None,
+    dataset_id=None,
+    dataset_name=None,
+    created_after=None,
+    created_before=None,
+):
+    query = query.where(Incident.connection_id == connection_id)
+    if status:
+        query = query.where(Incident.status == status)
+    if rule_type:
+        query = query.where(Incident.rule_type == rule_type)
+    if severity:
+        query = query.where(Incident.severity == severity)
+    if dataset_id is not None:
+        query = query.where(Incident.dataset_id == dataset_id)
+    if dataset_name:
+        query = query.where(Incident.dataset_name == dataset_name)
+    if created_after:
+        query = query.where(Incident.created_at >= created_after)
+    if created_before:
+        query = query.where(Incident.created_at < created_before)
+    return query
+
+
 @router.post("")
 def create_connection(
     name: str,
@@ -53,197 +98,311 @@ def create_connection(
     return {"id": conn.id, "name": conn.name}
 
 
-@router.post("/{connection_id}/discover")
-def discover_connection_tables(connection_id: int):
+@router.post("/discover", status_code=202)
+def discover_all_connections(incremental: bool = True):
+    """
+    Queues discovery of the tables of every connection.
+
+    The catalogs of all client databases are read concurrently (up to
+    DISCOVERY_CONCURRENCY at a time) and then persisted connection by
+    connection, as POST /connections/{id}/discover does for one.
+
+    Args:
+        incremental (bool): Only re-introspect changed tables when possible (default: True).
+
+    Returns:
+        dict: The ID and status of the queued job.
     """
-    Discovers tables in the connected database and checks for schema drift.
+    job = get_job_queue().enqueue("discover_all", None, incremental=incremental)
+    return {"job_id": job.id, "status": job.status}
 
-    This function performs the following steps:
-    1. Retrieves connection details from the database.
-    2. Connects to the external database and lists all available tables.
-    3. For each table:
-        a. Registers it as a Dataset if it doesn't exist.
-        b. Fetches the current table schema (columns, types).
-        c. Compares the current schema with the latest stored snapshot.
-        d. Saves a new snapshot of the schema.
-        e. Creates a Schema Drift Incident if changes are detected; otherwise, resolves existing drift incidents.
+
+@router.post("/{connection_id}/discover", status_code=202)
+def discover_connection_tables(connection_id: int, incremental: bool = True):
+    """
+    Queues discovery of the tables in the connected database.
+
+    The job (see services.discovery.run_discovery) reads the columns of all
+    tables (or, incrementally, of the tables whose DDL changed since the last
+    run) in a single catalog query and persists the result in bulk: it
+    registers new datasets, snapshots changed schemas and opens or resolves
+    Schema Drift Incidents. Poll GET /jobs/{job_id} for progress and the summary.
 
     Args:
         connection_id (int): The ID of the connection to discover.
+        incremental (bool): Only re-introspect changed tables when possible (default: True).
 
     Returns:
-        dict: Summary of tables found and new datasets created.
+        dict: The ID and status of the queued job.
 
     Raises:
-        HTTPException: If the connection is not found or discovery fails.
+        HTTPException: If the connection is not found.
     """
-    db: Session = SessionLocal()
+    _ensure_connection_exists(connection_id)
+    job = get_job_queue().enqueue("discover", connection_id, incremental=incremental)
+    return {"job_id": job.id, "status": job.status}
 
-    # 1. Retrieve connection details
-    conn = db.query(Connection).filter(Connection.id == connection_id).first()
-    if not conn:
-        db.close()
-        raise HTTPException(status_code=404, detail="Connection not found")
+# getting dataset for the connection id
+@router.get("/{connection_id}/datasets")
+async def list_datasets_for_connection(
+    connection_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lists all datasets (tables) discovered for a specific connection.
 
-    try:
-        # 2. Connect to external DB and list tables
-        tables = discover_tables(
-            host=conn.host,
-            port=conn.port,
-            database=conn.database,
-            username=conn.username,
-            password=conn.password,
-        )
-    except Exception as e:
-        db.close()
-        raise HTTPException(status_code=400, detail=f"Discovery failed: {str(e)}")
-
-    created = 0
-
-    for full_name in tables:
-        # 3a. Register Dataset if new
-        dataset = (
-            db.query(Dataset)
-            .filter(Dataset.connection_id == conn.id)
-            .filter(Dataset.name == full_name)
-            .first()
-        )
+    Served from the response cache until discovery adds datasets to the
+    connection, retires some or their partitions change; supports If-None-Match.
 
-        if not dataset:
-            dataset = Dataset(
-                name=full_name,
-                connection_id=conn.id
-            )
-            db.add(dataset)
-            db.flush()  # get dataset.id
-            created += 1
-
-        schema, table = full_name.split(".", 1)
-
-        # 3b. Fetch current table schema
-        current_schema = get_table_schema(
-            host=conn.host,
-            port=conn.port,
-            database=conn.database,
-            username=conn.username,
-            password=conn.password,
-            schema=schema,
-            table=table,
-        )
+    Args:
+        connection_id (int): The ID of the connection.
 
-        # 3c. Fetch latest snapshot for comparison
-        latest_snapshot = get_latest_snapshot(db, dataset.id)
-
-        if latest_snapshot:
-            diff = diff_schema(
-                latest_snapshot.schema_json,
-                current_schema
-            )
-        else:
-            diff = {"added": [], "removed": [], "changed": []}
-
-        # 3d. Always save a NEW snapshot to track history
-        save_snapshot(db, dataset.id, dataset.name, current_schema)
-
-        # 3e. INCIDENT LOGIC (SCHEMA DRIFT)
-        # Check if there is already an open incident for this dataset and rule type
-        existing_incident = (
-            db.query(Incident)
-            .filter(
-                Incident.dataset_name == dataset.name,
-                Incident.rule_type == "SCHEMA_DRIFT",
-                Incident.status == "open"
-            )
-            .first()
-        )
+    Returns:
+        list: A list of datasets belonging to the connection, partitioned
+        tables with their partition_info.
+    """
+    async def build():
+        rows = (await db.execute(
+            select(Dataset.id, Dataset.name, Dataset.connection_id, Dataset.partition_info)
+            .where(Dataset.connection_id == connection_id, Dataset.retired_at.is_(None))
+        )).all()
+        return [
+            {"id": r.id, "name": r.name, "connection_id": r.connection_id, "partition_info": r.partition_info}
+            for r in rows
+        ]
 
-        if diff["added"] or diff["removed"] or diff["changed"]:
-            # Drift detected
-            if not existing_incident:
-                # Create a new incident if one doesn't already exist
-                db.add(
-                    Incident(
-                        dataset_id=dataset.id,
-                        dataset_name=dataset.name,
-                        connection_id=conn.id,
-                        rule_type="SCHEMA_DRIFT",
-                        details=diff,
-                        severity="HIGH",
-                        status="open"
-                    )
-                )
-        else:
-            # No drift detected (schema matches latest snapshot)
-            if existing_incident:
-                # Resolve the existing incident
-                existing_incident.status = "resolved"
-                existing_incident.resolved_at = datetime.datetime.now(datetime.timezone.utc)
+    return await cached_json(request, [connection_scope(connection_id, "datasets")], build)
 
 
-    db.commit()
-    db.close()
+@router.post("/{connection_id}/run_checks", status_code=202)
+def run_monitoring(connection_id: int):
+    """
+    Queues monitoring checks for all datasets associated with a connection.
 
-    return {"tables_found": len(tables), "new_datasets_created": created}
+    The job runs configured checks (e.g., freshness, volume) for every dataset.
+    Poll GET /jobs/{job_id} for progress and the result.
 
-# getting dataset for the connection id
-@router.get("/{connection_id}/datasets")
-def list_datasets_for_connection(connection_id: int):
+    Args:
+        connection_id (int): The ID of the connection.
+
+    Returns:
+        dict: The ID and status of the queued job.
+
+    Raises:
+        HTTPException: If the connection is not found.
     """
-    Lists all datasets (tables) discovered for a specific connection.
+    _ensure_connection_exists(connection_id)
+    job = get_job_queue().enqueue("run_checks", connection_id)
+    return {"job_id": job.id, "status": job.status}
+
+@router.post("/{connection_id}/profile", status_code=202)
+def profile_connection(connection_id: int):
+    """
+    Queues column profiling for all datasets of a connection.
+
+    The job reads the planner statistics (pg_stats: null fraction, distinct
+    count, most common values, histogram) of every column in one catalog
+    query, stores the ones that moved and raises Distribution Shift
+    Incidents. Poll GET /jobs/{job_id} for progress and the result.
 
     Args:
         connection_id (int): The ID of the connection.
 
     Returns:
-        list: A list of datasets belonging to the connection.
+        dict: The ID and status of the queued job.
+
+    Raises:
+        HTTPException: If the connection is not found.
     """
-    db: Session = SessionLocal()
-    rows = db.query(Dataset).filter(Dataset.connection_id == connection_id).all()
-    db.close()
-    return [{"id": r.id, "name": r.name, "connection_id": r.connection_id} for r in rows]
+    _ensure_connection_exists(connection_id)
+    job = get_job_queue().enqueue("profile", connection_id)
+    return {"job_id": job.id, "status": job.status}
+
+@router.post("/{connection_id}/run_row_checks", status_code=202)
+def run_connection_row_checks(connection_id: int):
+    """
+    Queues the row-level checks (null rate, duplicate keys, value range) of a
+    connection's datasets.
 
+    Each check reads a TABLESAMPLE of its table through a server-side cursor
+    within its row and time budget. Poll GET /jobs/{job_id} for progress and
+    the result.
 
-@router.post("/{connection_id}/run_checks")
-def run_monitoring(connection_id: int):
+    Args:
+        connection_id (int): The ID of the connection.
+
+    Returns:
+        dict: The ID and status of the queued job.
+
+    Raises:
+        HTTPException: If the connection is not found.
     """
-    Triggers monitoring checks for all datasets associated with a connection.
+    _ensure_connection_exists(connection_id)
+    job = get_job_queue().enqueue("row_checks", connection_id)
+    return {"job_id": job.id, "status": job.status}
 
-    Iterates through all datasets and runs configured checks (e.g., freshness, volume).
+@router.post("/{connection_id}/compact_snapshots", status_code=202)
+def compact_connection_snapshots(connection_id: int, retention_days: Optional[int] = None):
+    """
+    Queues compaction of the schema snapshot history of a connection's datasets.
+
+    Snapshots past the retention are deleted (the latest per dataset is kept)
+    and the remaining history is re-encoded as checkpoints plus deltas when
+    SNAPSHOT_STORAGE is "delta".
 
     Args:
         connection_id (int): The ID of the connection.
+        retention_days (int, optional): Days of history to keep; defaults to SNAPSHOT_RETENTION_DAYS.
 
     Returns:
-        dict: Status of the monitoring run.
+        dict: The ID and status of the queued job.
+
+    Raises:
+        HTTPException: If the connection is not found.
     """
-    db: Session = SessionLocal()
+    _ensure_connection_exists(connection_id)
+    job = get_job_queue().enqueue("compact_snapshots", connection_id, retention_days=retention_days)
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/{connection_id}/incidents", response_model=IncidentPage)
+async def list_incidents(
+    connection_id: int,
+    request: Request,
+    status: Optional[str] = None,
+    rule_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    dataset_id: Optional[int] = None,
+    dataset_name: Optional[str] = None,
+    created_after: Optional[datetime.datetime] = None,
+    created_before: Optional[datetime.datetime] = None,
+    include_details: bool = False,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lists incidents (e.g., schema drift, freshness failures) for a connection, newest first.
 
-    datasets = (
-        db.query(Dataset)
-        .filter(Dataset.connection_id == connection_id)
-        .all()
-    )
+    Results are paginated by keyset on (created_at, id): pass the returned
+    next_cursor as cursor to get the next page. Pages are served from the
+    response cache until discovery or a check run changes the connection's
+    incidents; supports If-None-Match.
 
-    for ds in datasets:
-        run_checks_for_dataset(db, connection_id, ds.name)
+    Args:
+        connection_id (int): The ID of the connection.
+        status (str, optional): Only incidents with this status ('open', 'resolved').
+        rule_type (str, optional): Only incidents of this rule type.
+        severity (str, optional): Only incidents of this severity.
+        dataset_id (int, optional): Only incidents of this dataset.
+        dataset_name (str, optional): Only incidents of the dataset with this name.
+        created_after (datetime, optional): Only incidents created at or after this time.
+        created_before (datetime, optional): Only incidents created before this time.
+        include_details (bool): Include each incident's details (default: False).
+        limit (int): Page size (default: 100).
+        cursor (str, optional): next_cursor from the previous page.
 
-    db.commit()
-    db.close()
+    Returns:
+        IncidentPage: The incidents on this page and the cursor of the next one.
 
-    return {"status": "checks completed", "datasets_checked": len(datasets)}
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    columns = [
+        Incident.id,
+        Incident.dataset_id,
+        Incident.dataset_name,
+        Incident.rule_type,
+        Incident.severity,
+        Incident.status,
+        Incident.created_at,
+        Incident.resolved_at,
+        Incident.occurrence_count,
+        Incident.last_seen_at,
+    ]
+    if include_details:
+        columns.append(Incident.details)
+
+    query = _filter_incidents(
+        select(*columns), connection_id, status, rule_type, severity,
+        dataset_id, dataset_name, created_after, created_before,
+    )
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(Incident.created_at, Incident.id) < tuple_(cursor_created_at, cursor_id)
+        )
 
-@router.get("/{connection_id}/incidents")
-def list_incidents(connection_id: int):
+    # One extra row tells whether there is a next page
+    query = query.order_by(Incident.created_at.desc(), Incident.id.desc()).limit(limit + 1)
+
+    async def build():
+        rows = (await db.execute(query)).mappings().all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+        return {"items": [dict(r) for r in rows], "next_cursor": next_cursor}
+
+    return await cached_json(request, [connection_scope(connection_id, "incidents")], build)
+
+INCIDENT_EXPORT_COLUMNS = [
+    ("id", "int"),
+    ("connection_id", "int"),
+    ("dataset_id", "int"),
+    ("dataset_name", "str"),
+    ("rule_type", "str"),
+    ("severity", "str"),
+    ("status", "str"),
+    ("occurrence_count", "int"),
+    ("created_at", "datetime"),
+    ("last_seen_at", "datetime"),
+    ("resolved_at", "datetime"),
+    ("details", "json"),
+]
+
+@router.get("/{connection_id}/incidents/export")
+def export_incidents(
+    connection_id: int,
+    format: str = "ndjson",
+    status: Optional[str] = None,
+    rule_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    dataset_id: Optional[int] = None,
+    dataset_name: Optional[str] = None,
+    created_after: Optional[datetime.datetime] = None,
+    created_before: Optional[datetime.datetime] = None,
+):
     """
-    Lists all incidents (e.g., schema drift, freshness failures) for a connection.
+    Streams all incidents of a connection matching the filters, oldest first.
+
+    Rows are read from a server-side cursor and encoded chunk by chunk, so
+    memory use stays flat whatever the number of incidents.
 
     Args:
         connection_id (int): The ID of the connection.
+        format (str): 'ndjson' (default), 'csv' or 'parquet'.
+        status, rule_type, severity, dataset_id, dataset_name, created_after,
+        created_before: Same filters as GET /connections/{id}/incidents.
 
     Returns:
-        list: A list of incidents associated with the connection.
+        StreamingResponse: The incidents, including their details.
+
+    Raises:
+        HTTPException: If the format is unsupported.
     """
-    db: Session = SessionLocal()
-    rows = db.query(Incident).filter(Incident.connection_id == connection_id).all()
-    db.close()
-    return rows
+    check_format(format)
+    query = _filter_incidents(
+        select(*(getattr(Incident, name) for name, _ in INCIDENT_EXPORT_COLUMNS)),
+        connection_id, status, rule_type, severity,
+        dataset_id, dataset_name, created_after, created_before,
+    ).order_by(Incident.created_at, Incident.id)
+    return export_response(
+        stream_query(query), INCIDENT_EXPORT_COLUMNS, format,
+        f"connection-{connection_id}-incidents",
+    )
@@ -1,7 +1,21 @@
-from fastapi import APIRouter
+import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.api.cache import cached_json
+from app.api.export import check_format, export_response, stream_query
+from app.api.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.core.cache import DATASETS_SCOPE, invalidate
+from app.db.async_session import get_async_db
 from app.db.session import SessionLocal
-from app.models import Dataset
+from app.connectors.row_sampler import SAMPLE_METHODS
+from app.models import ColumnStat, Dataset, RowCheck, SchemaSnapshot
+from app.services.row_checks import CHECK_TYPES
+from app.services.schema_history import get_change_events, get_schema_at
+from app.services.snapshot_store import SchemaResolver
 
 router = APIRouter(prefix="/datasets", tags=["datasets"])
 
@@ -22,17 +36,396 @@ def create_dataset(name: str):
     db.commit()
     db.refresh(ds)
     db.close()
+    invalidate(DATASETS_SCOPE)
     return {"id": ds.id, "name": ds.name}
 
 @router.get("")
-def list_datasets():
+async def list_datasets(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Lists all available datasets in the system.
 
+    Served from the response cache; send the returned ETag as If-None-Match
+    to get a 304 while no dataset was added or retired.
+
+    Returns:
+        list: A list of all datasets (ID and name), retired ones left out.
+    """
+    async def build():
+        rows = (await db.execute(select(Dataset.id, Dataset.name).where(Dataset.retired_at.is_(None)))).all()
+        return [{"id": r.id, "name": r.name} for r in rows]
+
+    return await cached_json(request, [DATASETS_SCOPE], build)
+
+@router.patch("/{dataset_id}")
+def update_dataset(dataset_id: int, freshness_threshold_hours: float | None = Query(None, gt=0)):
+    """
+    Updates a dataset's monitoring settings.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+        freshness_threshold_hours (float, optional): Hours without writes before the
+            dataset counts as stale, greater than 0; omit to fall back to the global
+            default.
+
     Returns:
-        list: A list of all datasets (ID and name).
+        dict: The ID, name and freshness threshold of the dataset.
+
+    Raises:
+        HTTPException: If the dataset is not found.
     """
     db: Session = SessionLocal()
-    rows = db.query(Dataset).all()
+    ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    if not ds:
+        db.close()
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    ds.freshness_threshold_hours = freshness_threshold_hours
+    db.commit()
+    db.refresh(ds)
     db.close()
-    return [{"id": r.id, "name": r.name} for r in rows]
+    return {
+        "id": ds.id,
+        "name": ds.name,
+        "freshness_threshold_hours": ds.freshness_threshold_hours,
+    }
+
+@router.post("/{dataset_id}/row_checks")
+def create_row_check(
+    dataset_id: int,
+    check_type: str,
+    columns: list[str] = Query(...),
+    max_null_rate: Optional[float] = None,
+    max_duplicate_rows: Optional[int] = None,
+    min_value: Optional[str] = None,
+    max_value: Optional[str] = None,
+    max_violation_rate: Optional[float] = None,
+    sample_method: Optional[str] = None,
+    sample_percent: Optional[float] = Query(None, gt=0, le=100),
+    row_budget: Optional[int] = Query(None, ge=1),
+    timeout_seconds: Optional[float] = Query(None, gt=0),
+):
+    """
+    Adds a row-level check to a dataset.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+        check_type (str): 'null_rate', 'duplicate_keys' or 'value_range'.
+        columns (list): The column checked (the key columns for duplicate_keys).
+        max_null_rate (float, optional): null_rate: highest acceptable NULL fraction (default 0).
+        max_duplicate_rows (int, optional): duplicate_keys: acceptable duplicate rows (default 0).
+        min_value / max_value (str, optional): value_range: bounds, compared as the column's type.
+        max_violation_rate (float, optional): value_range: acceptable out-of-range fraction (default 0).
+        sample_method (str, optional): 'SYSTEM' or 'BERNOULLI'.
+        sample_percent (float, optional): Sample size in percent of the table.
+        row_budget (int, optional): Maximum rows read per run.
+        timeout_seconds (float, optional): Maximum time per run.
+
+    Returns:
+        dict: The ID and definition of the created check.
+
+    Raises:
+        HTTPException: If the dataset is not found or the check is invalid.
+    """
+    if check_type not in CHECK_TYPES:
+        raise HTTPException(status_code=400, detail=f"check_type must be one of {', '.join(CHECK_TYPES)}")
+    if check_type != "duplicate_keys" and len(columns) != 1:
+        raise HTTPException(status_code=400, detail=f"{check_type} checks take exactly one column")
+    if check_type == "value_range" and min_value is None and max_value is None:
+        raise HTTPException(status_code=400, detail="value_range checks need min_value and/or max_value")
+    if sample_method and sample_method.upper() not in SAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"sample_method must be one of {', '.join(SAMPLE_METHODS)}")
+
+    params = {
+        "max_null_rate": max_null_rate,
+        "max_duplicate_rows": max_duplicate_rows,
+        "min": min_value,
+        "max": max_value,
+        "max_violation_rate": max_violation_rate,
+    }
+
+    db: Session = SessionLocal()
+    if not db.query(Dataset.id).filter(Dataset.id == dataset_id).first():
+        db.close()
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    check = RowCheck(
+        dataset_id=dataset_id,
+        check_type=check_type,
+        columns=columns,
+        params={name: value for name, value in params.items() if value is not None},
+        sample_method=sample_method.upper() if sample_method else None,
+        sample_percent=sample_percent,
+        row_budget=row_budget,
+        timeout_seconds=timeout_seconds,
+    )
+    db.add(check)
+    db.commit()
+    db.refresh(check)
+    db.close()
+    return {
+        "id": check.id,
+        "dataset_id": check.dataset_id,
+        "check_type": check.check_type,
+        "columns": check.columns,
+        "params": check.params,
+    }
+
+@router.get("/{dataset_id}/row_checks")
+async def list_row_checks(dataset_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Lists a dataset's row-level checks with the outcome of their latest run.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+
+    Returns:
+        list: The checks, oldest first.
+    """
+    checks = (await db.scalars(
+        select(RowCheck).where(RowCheck.dataset_id == dataset_id).order_by(RowCheck.id)
+    )).all()
+    return [
+        {
+            "id": c.id,
+            "check_type": c.check_type,
+            "columns": c.columns,
+            "params": c.params,
+            "sample_method": c.sample_method,
+            "sample_percent": c.sample_percent,
+            "row_budget": c.row_budget,
+            "timeout_seconds": c.timeout_seconds,
+            "enabled": c.enabled,
+            "last_result": c.last_result,
+            "last_run_at": c.last_run_at,
+        }
+        for c in checks
+    ]
+
+@router.get("/{dataset_id}/schema")
+async def get_dataset_schema(
+    dataset_id: int,
+    at: Optional[datetime.datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Returns a dataset's schema as of a point in time.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+        at (datetime, optional): The point in time; defaults to now.
+
+    Returns:
+        dict: The snapshot ID and capture time the schema comes from, and the schema.
+
+    Raises:
+        HTTPException: If no snapshot of the dataset existed at that time.
+    """
+    snapshot, schema = await db.run_sync(get_schema_at, dataset_id, at)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No schema recorded for this dataset at that time")
+    return {
+        "dataset_id": dataset_id,
+        "snapshot_id": snapshot.id,
+        "captured_at": snapshot.original_created_at or snapshot.created_at,
+        "schema": schema,
+    }
+
+@router.get("/{dataset_id}/schema/history")
+async def get_dataset_schema_history(
+    dataset_id: int,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lists a dataset's column-level schema changes, oldest first.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+        since (datetime, optional): Only changes at or after this time.
+        until (datetime, optional): Only changes before this time.
+        limit (int): Page size (default: 100).
+        cursor (str, optional): next_cursor from the previous page.
+
+    Returns:
+        dict: The change events on this page and the cursor of the next one.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    events = await db.run_sync(
+        get_change_events, dataset_id, since=since, until=until, limit=limit + 1, after=after
+    )
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].created_at, events[-1].id)
+
+    return {
+        "items": [
+            {
+                "id": e.id,
+                "snapshot_id": e.snapshot_id,
+                "change_type": e.change_type,
+                "column_name": e.column_name,
+                "old_value": e.old_value,
+                "new_value": e.new_value,
+                "created_at": e.created_at,
+            }
+            for e in events
+        ],
+        "next_cursor": next_cursor,
+    }
+
+@router.get("/{dataset_id}/column_stats")
+async def get_dataset_column_stats(
+    dataset_id: int,
+    column: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lists the recorded column statistics snapshots of a dataset, newest first.
+
+    A snapshot is only recorded when a column's statistics moved beyond the
+    profiling tolerance, so consecutive items are actual changes.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+        column (str, optional): Only snapshots of this column.
+        limit (int): Page size (default: 100).
+        cursor (str, optional): next_cursor from the previous page.
+
+    Returns:
+        dict: The snapshots on this page and the cursor of the next one.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    query = select(ColumnStat).where(ColumnStat.dataset_id == dataset_id)
+    if column:
+        query = query.where(ColumnStat.column_name == column)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(ColumnStat.created_at, ColumnStat.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    query = query.order_by(ColumnStat.created_at.desc(), ColumnStat.id.desc()).limit(limit + 1)
+
+    stats = (await db.scalars(query)).all()
+
+    next_cursor = None
+    if len(stats) > limit:
+        stats = stats[:limit]
+        next_cursor = encode_cursor(stats[-1].created_at, stats[-1].id)
+
+    return {
+        "items": [
+            {
+                "id": s.id,
+                "column_name": s.column_name,
+                "null_frac": s.null_frac,
+                "n_distinct": s.n_distinct,
+                "most_common": s.most_common,
+                "histogram_bounds": s.histogram_bounds,
+                "created_at": s.created_at,
+            }
+            for s in stats
+        ],
+        "next_cursor": next_cursor,
+    }
+
+SNAPSHOT_EXPORT_COLUMNS = [
+    ("id", "int"),
+    ("dataset_id", "int"),
+    ("dataset_name", "str"),
+    ("schema_hash", "str"),
+    ("created_at", "datetime"),
+    ("original_created_at", "datetime"),
+    ("last_seen_at", "datetime"),
+    ("schema", "json"),
+]
+
+def _resolve_snapshot_chunk(db, rows):
+    # A fresh resolver per chunk keeps at most one chunk's checkpoints in memory
+    resolver = SchemaResolver(db)
+    resolver.load(rows)
+    return [
+        {
+            "id": row.id,
+            "dataset_id": row.dataset_id,
+            "dataset_name": row.dataset_name,
+            "schema_hash": row.schema_hash,
+            "created_at": row.created_at,
+            "original_created_at": row.original_created_at,
+            "last_seen_at": row.last_seen_at,
+            "schema": resolver.schema(row),
+        }
+        for row in rows
+    ]
+
+@router.get("/{dataset_id}/snapshots/export")
+def export_dataset_snapshots(
+    dataset_id: int,
+    format: str = "ndjson",
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+):
+    """
+    Streams a dataset's full schema snapshot history, oldest first.
+
+    Snapshots are read from a server-side cursor and delta-encoded ones are
+    reconstructed chunk by chunk, so memory use stays flat whatever the
+    length of the history.
+
+    Args:
+        dataset_id (int): The ID of the dataset.
+        format (str): 'ndjson' (default), 'csv' or 'parquet'.
+        since (datetime, optional): Only snapshots taken at or after this time.
+        until (datetime, optional): Only snapshots taken before this time.
+
+    Returns:
+        StreamingResponse: The snapshots with their full schemas.
+
+    Raises:
+        HTTPException: If the format is unsupported.
+    """
+    check_format(format)
+    query = select(
+        SchemaSnapshot.id,
+        SchemaSnapshot.dataset_id,
+        SchemaSnapshot.dataset_name,
+        SchemaSnapshot.schema_hash,
+        SchemaSnapshot.created_at,
+        SchemaSnapshot.original_created_at,
+        SchemaSnapshot.last_seen_at,
+        SchemaSnapshot.kind,
+        SchemaSnapshot.base_snapshot_id,
+        SchemaSnapshot.schema_json,
+        SchemaSnapshot.body_id,
+        SchemaSnapshot.delta_json,
+    ).where(SchemaSnapshot.dataset_id == dataset_id)
+    if since:
+        query = query.where(SchemaSnapshot.created_at >= since)
+    if until:
+        query = query.where(SchemaSnapshot.created_at < until)
+    query = query.order_by(SchemaSnapshot.created_at, SchemaSnapshot.id)
+
+    return export_response(
+        stream_query(query, transform=_resolve_snapshot_chunk), SNAPSHOT_EXPORT_COLUMNS, format,
+        f"dataset-{dataset_id}-snapshots",
+    )
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from app.jobs.queue import get_job_queue
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """
+    Returns the status of a background job.
+
+    Args:
+        job_id (str): The ID returned when the job was queued.
+
+    Returns:
+        dict: Status, progress (processed out of total), timings, result or error.
+
+    Raises:
+        HTTPException: If the job is unknown (or expired).
+    """
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import render
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Exposes process metrics in the Prometheus text format: per-phase
+    discovery/check timings by connection, metadata-DB statement counts,
+    connection pool usage and HTTP request latencies.
+    """
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
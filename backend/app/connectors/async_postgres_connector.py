@@ -0,0 +1,217 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from app.connectors.governor import governors, host_key
+from app.connectors.pool import _credentials_fingerprint
+from app.connectors.postgres_connector import (
+    CATALOG_COLUMNS_SQL,
+    CATALOG_MARKERS_SQL,
+    COLUMN_STATS_SQL,
+    DATABASE_OID_SQL,
+    PARTITIONS_SQL,
+    TABLE_ACTIVITY_SQL,
+    group_activity_rows,
+    group_catalog_rows,
+    group_column_stats_rows,
+    group_marker_rows,
+    group_partition_rows,
+)
+from app.core.config import (
+    CLIENT_CONNECT_TIMEOUT_SECONDS,
+    CLIENT_HOST_MAX_SESSIONS,
+    CLIENT_POOL_MAX_SIZE,
+    CLIENT_POOL_IDLE_TIMEOUT_SECONDS,
+    CLIENT_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    CLIENT_STATEMENT_TIMEOUT_SECONDS,
+)
+from app.core.metrics import time_phase
+
+# asyncpg uses numbered placeholders instead of psycopg2's pyformat ones
+ASYNC_CATALOG_COLUMNS_SQL = CATALOG_COLUMNS_SQL.replace("%(oids)s", "$1")
+ASYNC_PARTITIONS_SQL = PARTITIONS_SQL.replace("%(oids)s", "$1")
+
+
+class AsyncPoolRegistry:
+    """
+    Keeps one asyncpg pool per Connection.id for a single event loop.
+
+    The async counterpart of connectors.pool.PoolRegistry: a pool is replaced
+    whenever the connection's host, port, database or credentials change, and
+    idle sessions are closed after CLIENT_POOL_IDLE_TIMEOUT_SECONDS. It also
+    holds each client host's session slots (CLIENT_HOST_MAX_SESSIONS), which
+    like the pools belong to the loop.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CLIENT_POOL_MAX_SIZE,
+        idle_timeout: float = CLIENT_POOL_IDLE_TIMEOUT_SECONDS,
+        checkout_timeout: float = CLIENT_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._pools = {}  # connection_id -> (fingerprint, pool)
+        self._host_slots = {}
+        self._lock = asyncio.Lock()
+
+    def host_slots(self, connection) -> asyncio.Semaphore:
+        key = host_key(connection)
+        slots = self._host_slots.get(key)
+        if slots is None:
+            slots = self._host_slots[key] = asyncio.Semaphore(CLIENT_HOST_MAX_SESSIONS)
+        return slots
+
+    async def get(self, connection) -> asyncpg.Pool:
+        fingerprint = _credentials_fingerprint(connection)
+        async with self._lock:
+            entry = self._pools.get(connection.id)
+            if entry is not None and entry[0] == fingerprint:
+                return entry[1]
+            pool = await asyncpg.create_pool(
+                host=connection.host,
+                port=connection.port,
+                database=connection.database,
+                user=connection.username,
+                password=connection.password,
+                min_size=0,
+                max_size=self.max_size,
+                max_inactive_connection_lifetime=self.idle_timeout,
+                timeout=CLIENT_CONNECT_TIMEOUT_SECONDS,
+                server_settings={"statement_timeout": str(int(CLIENT_STATEMENT_TIMEOUT_SECONDS * 1000))},
+            )
+            self._pools[connection.id] = (fingerprint, pool)
+        if entry is not None:
+            await entry[1].close()
+        return pool
+
+    async def close_all(self):
+        async with self._lock:
+            pools = [pool for _, pool in self._pools.values()]
+            self._pools.clear()
+        await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
+
+
+# asyncpg pools are bound to the loop that created them
+_registries = weakref.WeakKeyDictionary()
+
+
+def get_registry() -> AsyncPoolRegistry:
+    """Returns the AsyncPoolRegistry of the running event loop."""
+    loop = asyncio.get_running_loop()
+    registry = _registries.get(loop)
+    if registry is None:
+        registry = _registries[loop] = AsyncPoolRegistry()
+    return registry
+
+
+@asynccontextmanager
+async def client_connection_async(connection):
+    """
+    Checks out a pooled asyncpg connection for a Connection row, under its
+    host's governor (see connectors.governor).
+
+    Args:
+        connection: A Connection (anything with id, host, port, database, username, password).
+
+    Yields:
+        asyncpg connection, released back to its pool afterwards.
+
+    Raises:
+        HostUnavailable: If the host's circuit breaker is open.
+        HostBusy: If the host has no session slot free within the checkout timeout.
+    """
+    registry = get_registry()
+    governor = governors.get(connection)
+    async with governor.session_async(registry.host_slots(connection), registry.checkout_timeout):
+        with time_phase("connect", connection.id):
+            pool = await registry.get(connection)
+            conn = await pool.acquire(timeout=registry.checkout_timeout)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
+
+
+async def introspect_catalog_async(connection, relation_oids=None) -> dict:
+    """
+    Async version of postgres_connector.introspect_catalog.
+
+    Args:
+        connection: The Connection to introspect.
+        relation_oids (list, optional): Only read these tables (pg_class oids).
+
+    Returns:
+        dict: Mapping of 'schema.table' to its schema_json, in schema/table order.
+    """
+    async with client_connection_async(connection) as conn:
+        rows = await conn.fetch(ASYNC_CATALOG_COLUMNS_SQL, relation_oids)
+    return group_catalog_rows(rows)
+
+
+async def introspect_tables_async(connection, relation_oids=None):
+    """
+    Async version of postgres_connector.introspect_tables.
+
+    Args:
+        connection: The Connection to introspect.
+        relation_oids (list, optional): Only read these tables (pg_class oids).
+
+    Returns:
+        tuple: (mapping of 'schema.table' to its schema_json; mapping of
+        partitioned 'schema.table' to its partition_info).
+    """
+    async with client_connection_async(connection) as conn:
+        rows = await conn.fetch(ASYNC_CATALOG_COLUMNS_SQL, relation_oids)
+        partition_rows = await conn.fetch(ASYNC_PARTITIONS_SQL, relation_oids)
+    return group_catalog_rows(rows), group_partition_rows(partition_rows)
+
+
+async def fetch_catalog_markers_async(connection):
+    """
+    Async version of postgres_connector.fetch_catalog_markers.
+
+    Args:
+        connection: The Connection to inspect.
+
+    Returns:
+        tuple: (database oid, mapping of 'schema.table' to (table oid, marker)).
+    """
+    async with client_connection_async(connection) as conn:
+        database_oid = await conn.fetchval(DATABASE_OID_SQL)
+        rows = await conn.fetch(CATALOG_MARKERS_SQL)
+
+    return database_oid, group_marker_rows(rows)
+
+
+async def fetch_table_activity_async(connection) -> dict:
+    """
+    Async version of postgres_connector.fetch_table_activity.
+
+    Args:
+        connection: The Connection to inspect.
+
+    Returns:
+        dict: Mapping of 'schema.table' to its counters and timestamps.
+    """
+    async with client_connection_async(connection) as conn:
+        rows = await conn.fetch(TABLE_ACTIVITY_SQL)
+    return group_activity_rows(rows)
+
+
+async def fetch_column_stats_async(connection) -> dict:
+    """
+    Async version of postgres_connector.fetch_column_stats.
+
+    Args:
+        connection: The Connection to inspect.
+
+    Returns:
+        dict: Mapping of 'schema.table' to {column: compact stats}.
+    """
+    async with client_connection_async(connection) as conn:
+        rows = await conn.fetch(COLUMN_STATS_SQL)
+    return group_column_stats_rows(rows)
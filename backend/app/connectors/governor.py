@@ -0,0 +1,256 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import psycopg2
+
+from app.core.metrics import GaugeCollector, register
+from app.core.config import (
+    CLIENT_BREAKER_COOLDOWN_SECONDS,
+    CLIENT_BREAKER_FAILURES,
+    CLIENT_HOST_MAX_SESSIONS,
+)
+
+
+class HostUnavailable(Exception):
+    """Raised without contacting a client host while its circuit breaker is open."""
+
+
+class HostBusy(Exception):
+    """Raised when no session slot on a client host frees up within the checkout timeout."""
+
+
+# SQLSTATEs (classes or codes, matched as prefixes) that say the host is
+# down, unreachable or overloaded: connection exceptions (08), insufficient
+# resources (53), shutdowns and refused connections (57P0x) and statement
+# timeouts (57014). Anything else, e.g. a bad password (28P01) or a missing
+# database (3D000), is about the connection, not the host
+HOST_SQLSTATES = ("08", "53", "57P0", "57014")
+
+# Connect-time FATALs, which psycopg2 reports without a SQLSTATE, that are
+# about the host rather than the connection's credentials or database
+HOST_FATAL_MESSAGES = (
+    "starting up",
+    "shutting down",
+    "in recovery mode",
+    "too many clients",
+    "remaining connection slots",
+    "terminating connection",
+)
+
+
+def is_host_error(exc: BaseException) -> bool:
+    """
+    Tells whether an error says the client host is down, unreachable or
+    overloaded (connect failures and timeouts, statement timeouts, dropped
+    sessions), as opposed to an error in the connection's settings or in the
+    query itself.
+    """
+    if isinstance(exc, (HostUnavailable, OSError, asyncio.TimeoutError)):
+        return True
+    # psycopg2 errors carry pgcode, asyncpg errors sqlstate
+    sqlstate = getattr(exc, "pgcode", None) or getattr(exc, "sqlstate", None)
+    if sqlstate:
+        return sqlstate.startswith(HOST_SQLSTATES)
+    if isinstance(exc, psycopg2.OperationalError):
+        # No answer from the server at all (refused, unreachable, timed out,
+        # closed unexpectedly) is the host's fault; a FATAL only for some
+        message = str(exc)
+        return "FATAL:" not in message or any(text in message for text in HOST_FATAL_MESSAGES)
+    return False
+
+
+def host_key(connection) -> str:
+    return f"{connection.host}:{connection.port}"
+
+
+class HostGovernor:
+    """
+    Session cap and circuit breaker of a single client host (host:port).
+
+    At most max_sessions client sessions run against the host at once, across
+    all of its Connections. After failure_threshold consecutive host errors
+    (see is_host_error) the breaker opens and calls fail fast with
+    HostUnavailable for cooldown seconds; then a single trial call is let
+    through, which closes the breaker on success or reopens it on failure.
+    """
+
+    def __init__(self, key: str, max_sessions: int, failure_threshold: int, cooldown: float):
+        self.key = key
+        self.max_sessions = max_sessions
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._sessions = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.last_error = None
+        self._open_until = 0.0
+        self._trial = False
+        self.in_use = 0
+
+    def state(self) -> str:
+        """'closed', 'open' (failing fast) or 'half_open' (next call is a trial)."""
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return "closed"
+            return "open" if time.monotonic() < self._open_until or self._trial else "half_open"
+
+    def allow(self) -> bool:
+        """
+        Lets a call through the breaker.
+
+        Returns:
+            bool: Whether the call is the half-open trial.
+
+        Raises:
+            HostUnavailable: If the breaker is open.
+        """
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return False
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise HostUnavailable(
+                    f"{self.key} is failing ({self.failures} consecutive errors, last: {self.last_error}); "
+                    f"retrying in {max(0, round(remaining))}s"
+                )
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self, exc: BaseException):
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}".strip()[:200]
+            self._trial = False
+            if self.failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self.cooldown
+
+    def release_trial(self, trial: bool):
+        """Ends a trial call that neither proved nor disproved the host's health."""
+        if trial:
+            with self._lock:
+                self._trial = False
+
+    def _count(self, delta: int):
+        with self._lock:
+            self.in_use += delta
+
+    @contextmanager
+    def session(self, timeout: float):
+        """
+        Runs a client session on the host: through the breaker, within the
+        session cap, recording the outcome.
+
+        Raises:
+            HostUnavailable: If the breaker is open.
+            HostBusy: If no session slot frees up within timeout.
+        """
+        trial = self.allow()
+        if not self._sessions.acquire(timeout=timeout):
+            self.release_trial(trial)
+            raise HostBusy(f"No session slot on {self.key} became available within {timeout}s")
+        self._count(1)
+        try:
+            yield
+        except BaseException as exc:
+            if is_host_error(exc):
+                self.record_failure(exc)
+            else:
+                self.release_trial(trial)
+            raise
+        else:
+            self.record_success()
+        finally:
+            self._count(-1)
+            self._sessions.release()
+
+    @asynccontextmanager
+    async def session_async(self, slots: asyncio.Semaphore, timeout: float):
+        """
+        Async version of session().
+
+        Args:
+            slots (asyncio.Semaphore): The host's session slots on the running
+                loop (see async_postgres_connector.AsyncPoolRegistry.host_slots).
+            timeout (float): Seconds to wait for a slot.
+        """
+        trial = self.allow()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.release_trial(trial)
+            raise HostBusy(f"No session slot on {self.key} became available within {timeout}s")
+        self._count(1)
+        try:
+            yield
+        except BaseException as exc:
+            if is_host_error(exc):
+                self.record_failure(exc)
+            else:
+                self.release_trial(trial)
+            raise
+        else:
+            self.record_success()
+        finally:
+            self._count(-1)
+            slots.release()
+
+
+class GovernorRegistry:
+    """Keeps one HostGovernor per client host, shared by the sync and async connectors."""
+
+    def __init__(
+        self,
+        max_sessions: int = CLIENT_HOST_MAX_SESSIONS,
+        failure_threshold: int = CLIENT_BREAKER_FAILURES,
+        cooldown: float = CLIENT_BREAKER_COOLDOWN_SECONDS,
+    ):
+        self.max_sessions = max_sessions
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._governors = {}
+        self._lock = threading.Lock()
+
+    def get(self, connection) -> HostGovernor:
+        key = host_key(connection)
+        with self._lock:
+            governor = self._governors.get(key)
+            if governor is None:
+                governor = self._governors[key] = HostGovernor(
+                    key, self.max_sessions, self.failure_threshold, self.cooldown
+                )
+        return governor
+
+    def stats(self) -> dict:
+        with self._lock:
+            governors = dict(self._governors)
+        return {
+            key: {"state": g.state(), "failures": g.failures, "in_use": g.in_use, "last_error": g.last_error}
+            for key, g in governors.items()
+        }
+
+
+governors = GovernorRegistry()
+
+
+def _governor_stats():
+    samples = {}
+    for key, stats in governors.stats().items():
+        samples[(key, "in_use")] = stats["in_use"]
+        samples[(key, "failures")] = stats["failures"]
+        samples[(key, "open")] = int(stats["state"] == "open")
+    return samples
+
+
+register(GaugeCollector(
+    "veda_client_host_governor",
+    "Client host sessions in use, consecutive failures and whether the circuit breaker is open.",
+    ("host", "measure"),
+    _governor_stats,
+))
@@ -0,0 +1,282 @@
+import hashlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+from app.connectors.governor import governors
+from app.core.metrics import GaugeCollector, register, time_phase
+from app.core.config import (
+    CLIENT_CONNECT_TIMEOUT_SECONDS,
+    CLIENT_POOL_MAX_SIZE,
+    CLIENT_POOL_IDLE_TIMEOUT_SECONDS,
+    CLIENT_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    CLIENT_STATEMENT_TIMEOUT_SECONDS,
+)
+
+
+class PoolExhausted(Exception):
+    """Raised when no client connection frees up within the checkout timeout."""
+
+
+def _credentials_fingerprint(connection) -> str:
+    raw = "\x00".join(
+        str(v) for v in (
+            connection.host,
+            connection.port,
+            connection.database,
+            connection.username,
+            connection.password,
+        )
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ClientPool:
+    """
+    A bounded pool of psycopg2 connections to a single client database.
+
+    Idle connections are reused most-recently-used first, closed once they sit
+    idle longer than idle_timeout, and pinged before being handed out.
+    """
+
+    def __init__(self, connection, max_size: int, idle_timeout: float):
+        self.fingerprint = _credentials_fingerprint(connection)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._dsn = {
+            "host": connection.host,
+            "port": connection.port,
+            "dbname": connection.database,
+            "user": connection.username,
+            "password": connection.password,
+            "connect_timeout": CLIENT_CONNECT_TIMEOUT_SECONDS,
+            # Session default; row checks SET LOCAL their own budget
+            "options": f"-c statement_timeout={int(CLIENT_STATEMENT_TIMEOUT_SECONDS * 1000)}",
+        }
+        self._idle = deque()  # (conn, returned_at), oldest on the left
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.in_use = 0
+
+    def checkout(self, timeout: float):
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolExhausted(
+                f"No connection to {self._dsn['host']}:{self._dsn['port']} "
+                f"became available within {timeout}s"
+            )
+        try:
+            while True:
+                conn = self._take_idle()
+                if conn is None:
+                    conn = psycopg2.connect(**self._dsn)
+                    break
+                if self._is_healthy(conn):
+                    break
+                self._close_quietly(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.in_use += 1
+        return conn
+
+    def checkin(self, conn, discard: bool = False):
+        with self._lock:
+            self.in_use -= 1
+        try:
+            if not discard and not self._closed and not conn.closed:
+                try:
+                    # Never hand out a connection with a transaction left open
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            if discard or self._closed or conn.closed:
+                self._close_quietly(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def evict_idle(self):
+        """Closes idle connections that have been unused for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = []
+        with self._lock:
+            while self._idle and self._idle[0][1] < cutoff:
+                stale.append(self._idle.popleft()[0])
+        for conn in stale:
+            self._close_quietly(conn)
+
+    def close(self):
+        """Closes all idle connections; checked-out ones are closed on checkin."""
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"idle": len(self._idle), "in_use": self.in_use, "max_size": self.max_size}
+
+    def _take_idle(self):
+        self.evict_idle()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()[0]
+        return None
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+class PoolRegistry:
+    """
+    Keeps one ClientPool per Connection.id.
+
+    A pool is replaced whenever the connection's host, port, database or
+    credentials no longer match the ones it was created with.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CLIENT_POOL_MAX_SIZE,
+        idle_timeout: float = CLIENT_POOL_IDLE_TIMEOUT_SECONDS,
+        checkout_timeout: float = CLIENT_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def get(self, connection) -> ClientPool:
+        fingerprint = _credentials_fingerprint(connection)
+        stale = None
+        with self._lock:
+            pool = self._pools.get(connection.id)
+            if pool is None or pool.fingerprint != fingerprint:
+                stale = pool
+                pool = ClientPool(connection, self.max_size, self.idle_timeout)
+                self._pools[connection.id] = pool
+        if stale is not None:
+            stale.close()
+        self._maybe_sweep()
+        return pool
+
+    def invalidate(self, connection_id: int):
+        """Drops the pool for a connection, e.g. after its credentials changed."""
+        with self._lock:
+            pool = self._pools.pop(connection_id, None)
+        if pool is not None:
+            pool.close()
+
+    def evict_idle(self):
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.evict_idle()
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = dict(self._pools)
+        return {connection_id: pool.stats() for connection_id, pool in pools.items()}
+
+    def _maybe_sweep(self):
+        # Pools for connections that are no longer used still hold idle sessions,
+        # so every so often sweep all of them rather than only the one in hand.
+        now = time.monotonic()
+        if now - self._last_sweep < self.idle_timeout:
+            return
+        self._last_sweep = now
+        self.evict_idle()
+
+
+registry = PoolRegistry()
+
+
+def _pool_stats():
+    samples = {}
+    for connection_id, stats in registry.stats().items():
+        samples[(connection_id, "idle")] = stats["idle"]
+        samples[(connection_id, "in_use")] = stats["in_use"]
+    return samples
+
+
+register(GaugeCollector(
+    "veda_client_pool_connections",
+    "Pooled client database sessions by connection and state.",
+    ("connection_id", "state"),
+    _pool_stats,
+))
+
+
+@contextmanager
+def client_connection(connection):
+    """
+    Checks out a pooled psycopg2 connection for a Connection row.
+
+    The connection is returned to its pool afterwards; it is discarded instead
+    if it was closed or broken while in use. The session runs under its
+    host's governor (see connectors.governor): connect and statement
+    timeouts, the per-host session cap and the circuit breaker.
+
+    Args:
+        connection: A Connection (anything with id, host, port, database, username, password).
+
+    Yields:
+        psycopg2 connection.
+
+    Raises:
+        HostUnavailable: If the host's circuit breaker is open.
+        HostBusy: If the host has no session slot free within the checkout timeout.
+    """
+    with governors.get(connection).session(registry.checkout_timeout):
+        with time_phase("connect", connection.id):
+            pool = registry.get(connection)
+            conn = pool.checkout(registry.checkout_timeout)
+        try:
+            yield conn
+        except psycopg2.OperationalError:
+            pool.checkin(conn, discard=True)
+            raise
+        except BaseException:
+            pool.checkin(conn)
+            raise
+        else:
+            pool.checkin(conn)
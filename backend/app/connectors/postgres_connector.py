@@ -1,54 +1,46 @@
-import psycopg2
-
-def discover_tables(host: str, port: int, database: str, username: str, password: str):
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        dbname=database,
-        user=username,
-        password=password,
-    )
+from app.connectors.pool import client_connection
 
-    cur = conn.cursor()
+def discover_tables(connection):
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
 
-    cur.execute("""
-        SELECT table_schema, table_name
-        FROM information_schema.tables
-        WHERE table_type='BASE TABLE'
-          AND table_schema NOT IN ('pg_catalog', 'information_schema')
-        ORDER BY table_schema, table_name;
-    """)
+        cur.execute("""
+            SELECT table_schema, table_name
+            FROM information_schema.tables
+            WHERE table_type='BASE TABLE'
+              AND table_schema NOT IN ('pg_catalog', 'information_schema')
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM pg_catalog.pg_class c
+                  JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                  WHERE n.nspname = table_schema AND c.relname = table_name AND c.relispartition
+              )
+            ORDER BY table_schema, table_name;
+        """)
 
-    tables = cur.fetchall()
+        tables = cur.fetchall()
+        cur.close()
 
     results = []
     for schema, table in tables:
         results.append(f"{schema}.{table}")
 
-    cur.close()
-    conn.close()
-
     return results
 
 
-def get_table_schema(host: str, port: int, database: str, username: str, password: str, schema: str, table: str):
-    conn = psycopg2.connect(
-        host=host,
-        port=port,
-        dbname=database,
-        user=username,
-        password=password,
-    )
-    cur = conn.cursor()
+def get_table_schema(connection, schema: str, table: str):
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
 
-    cur.execute("""
-        SELECT column_name, data_type, is_nullable
-        FROM information_schema.columns
-        WHERE table_schema = %s AND table_name = %s
-        ORDER BY ordinal_position;
-    """, (schema, table))
+        cur.execute("""
+            SELECT column_name, data_type, is_nullable
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position;
+        """, (schema, table))
 
-    cols = cur.fetchall()
+        cols = cur.fetchall()
+        cur.close()
 
     schema_json = {
         "schema": schema,
@@ -59,6 +51,430 @@ def get_table_schema(host: str, port: int, database: str, username: str, passwor
         ]
     }
 
-    cur.close()
-    conn.close()
     return schema_json
+
+
+# Tables outside the system schemas: plain tables and the roots of partitioned
+# tables; partitions are folded into their root (see PARTITIONS_SQL)
+RELATION_FILTER_SQL = """
+    c.relkind IN ('r', 'p')
+      AND NOT c.relispartition
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname !~ '^pg_(toast|temp_)'
+"""
+
+# Mirrors the data_type / is_nullable derivation of information_schema.columns
+# so bulk snapshots stay comparable with ones taken through get_table_schema.
+CATALOG_COLUMNS_SQL = """
+    SELECT
+        n.nspname,
+        c.relname,
+        a.attname,
+        CASE
+            WHEN t.typtype = 'd' THEN
+                CASE
+                    WHEN bt.typelem <> 0 AND bt.typlen = -1 THEN 'ARRAY'
+                    WHEN bn.nspname = 'pg_catalog' THEN format_type(t.typbasetype, NULL)
+                    ELSE 'USER-DEFINED'
+                END
+            WHEN t.typelem <> 0 AND t.typlen = -1 THEN 'ARRAY'
+            WHEN tn.nspname = 'pg_catalog' THEN format_type(a.atttypid, NULL)
+            ELSE 'USER-DEFINED'
+        END AS data_type,
+        CASE WHEN a.attnotnull OR (t.typtype = 'd' AND t.typnotnull) THEN 'NO' ELSE 'YES' END AS is_nullable
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attribute a
+        ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_catalog.pg_type t ON t.oid = a.atttypid
+    LEFT JOIN pg_catalog.pg_namespace tn ON tn.oid = t.typnamespace
+    LEFT JOIN pg_catalog.pg_type bt ON bt.oid = t.typbasetype
+    LEFT JOIN pg_catalog.pg_namespace bn ON bn.oid = bt.typnamespace
+    WHERE """ + RELATION_FILTER_SQL + """
+      AND (%(oids)s::oid[] IS NULL OR c.oid = ANY(%(oids)s::oid[]))
+    ORDER BY n.nspname, c.relname, a.attnum;
+"""
+
+# One row per table: its oid and a marker that changes whenever the table's
+# pg_class row or any of its pg_attribute rows (including dropped columns)
+# is rewritten, i.e. on any DDL that can change the column list, and, for a
+# partitioned table, whenever a partition is created, attached or detached.
+CATALOG_MARKERS_SQL = """
+    SELECT
+        n.nspname,
+        c.relname,
+        c.oid::bigint,
+        c.xmin::text || ':' || attrs.marker || ':' || parts.marker
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    CROSS JOIN LATERAL (
+        SELECT md5(COALESCE(string_agg(a.attnum::text || '.' || a.xmin::text, ',' ORDER BY a.attnum), '')) AS marker
+        FROM pg_catalog.pg_attribute a
+        WHERE a.attrelid = c.oid AND a.attnum > 0
+    ) attrs
+    CROSS JOIN LATERAL (
+        SELECT md5(COALESCE(string_agg(p.oid::text || '.' || p.xmin::text, ',' ORDER BY p.oid), '')) AS marker
+        FROM pg_catalog.pg_partition_tree(c.oid) t
+        JOIN pg_catalog.pg_class p ON p.oid = t.relid
+        WHERE c.relkind = 'p' AND t.level > 0
+    ) parts
+    WHERE """ + RELATION_FILTER_SQL + """
+    ORDER BY n.nspname, c.relname;
+"""
+
+# One row per partitioned table with its partitioning and leaf partitions
+# summarized: count, oldest and newest (by creation, i.e. oid), the default
+# partition, the leaves whose columns (name, type, NOT NULL, in any order)
+# no longer match the root's, and the schema-qualified names of all of its
+# partitions. Needs PostgreSQL 12+ (pg_partition_tree).
+PARTITIONS_SQL = """
+    WITH roots AS (
+        SELECT c.oid, n.nspname, c.relname, pt.partstrat::text AS partstrat, pg_get_partkeydef(c.oid) AS partkey
+        FROM pg_catalog.pg_partitioned_table pt
+        JOIN pg_catalog.pg_class c ON c.oid = pt.partrelid
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE """ + RELATION_FILTER_SQL + """
+          AND (%(oids)s::oid[] IS NULL OR c.oid = ANY(%(oids)s::oid[]))
+    ),
+    leaves AS (
+        SELECT r.oid AS root_oid, p.oid, p.relname, pg_get_expr(p.relpartbound, p.oid) AS bound
+        FROM roots r
+        CROSS JOIN LATERAL pg_catalog.pg_partition_tree(r.oid) t
+        JOIN pg_catalog.pg_class p ON p.oid = t.relid
+        WHERE t.isleaf AND t.level > 0
+    ),
+    signatures AS (
+        SELECT
+            a.attrelid,
+            md5(string_agg(
+                a.attname || ':' || a.atttypid::text || ':' || a.atttypmod::text || ':' || a.attnotnull::text,
+                ',' ORDER BY a.attname
+            )) AS signature
+        FROM pg_catalog.pg_attribute a
+        WHERE a.attrelid IN (SELECT oid FROM roots UNION ALL SELECT oid FROM leaves)
+          AND a.attnum > 0 AND NOT a.attisdropped
+        GROUP BY a.attrelid
+    )
+    SELECT
+        r.nspname,
+        r.relname,
+        r.partstrat,
+        r.partkey,
+        count(l.oid),
+        (array_agg(l.relname ORDER BY l.oid) FILTER (WHERE l.bound <> 'DEFAULT'))[1],
+        (array_agg(l.bound ORDER BY l.oid) FILTER (WHERE l.bound <> 'DEFAULT'))[1],
+        (array_agg(l.relname ORDER BY l.oid DESC) FILTER (WHERE l.bound <> 'DEFAULT'))[1],
+        (array_agg(l.bound ORDER BY l.oid DESC) FILTER (WHERE l.bound <> 'DEFAULT'))[1],
+        (array_agg(l.relname) FILTER (WHERE l.bound = 'DEFAULT'))[1],
+        array_agg(l.relname ORDER BY l.relname)
+            FILTER (WHERE l.oid IS NOT NULL AND ls.signature IS DISTINCT FROM rs.signature),
+        (
+            SELECT array_agg(pn.nspname || '.' || p.relname ORDER BY p.oid)
+            FROM pg_catalog.pg_partition_tree(r.oid) t
+            JOIN pg_catalog.pg_class p ON p.oid = t.relid
+            JOIN pg_catalog.pg_namespace pn ON pn.oid = p.relnamespace
+            WHERE t.level > 0
+        )
+    FROM roots r
+    LEFT JOIN signatures rs ON rs.attrelid = r.oid
+    LEFT JOIN leaves l ON l.root_oid = r.oid
+    LEFT JOIN signatures ls ON ls.attrelid = l.oid
+    GROUP BY r.oid, r.nspname, r.relname, r.partstrat, r.partkey, rs.signature
+    ORDER BY r.nspname, r.relname;
+"""
+
+PARTITION_STRATEGIES = {"r": "range", "l": "list", "h": "hash"}
+
+# Mismatched partition names kept in a dataset's partition_info
+MAX_MISMATCHED_PARTITIONS = 20
+
+
+def group_catalog_rows(rows) -> dict:
+    """Groups CATALOG_COLUMNS_SQL rows into {'schema.table': schema_json}."""
+    results = {}
+    for schema, table, column, data_type, nullable in rows:
+        full_name = f"{schema}.{table}"
+        schema_json = results.get(full_name)
+        if schema_json is None:
+            schema_json = results[full_name] = {
+                "schema": schema,
+                "table": table,
+                "columns": [],
+            }
+        # Tables without columns still come back once via the LEFT JOIN
+        if column is not None:
+            schema_json["columns"].append(
+                {"name": column, "type": data_type, "nullable": nullable}
+            )
+
+    return results
+
+
+def group_partition_rows(rows) -> dict:
+    """Maps PARTITIONS_SQL rows to {'schema.table': partition_info}."""
+    results = {}
+    for (schema, table, strategy, key, count, oldest, oldest_bound,
+         newest, newest_bound, default, mismatched, members) in rows:
+        mismatched = list(mismatched or [])
+        results[f"{schema}.{table}"] = {
+            "strategy": PARTITION_STRATEGIES.get(strategy, strategy),
+            "key": key,
+            "partition_count": count,
+            "oldest_partition": oldest,
+            "oldest_bound": oldest_bound,
+            "newest_partition": newest,
+            "newest_bound": newest_bound,
+            "default_partition": default,
+            "mismatched_count": len(mismatched),
+            "mismatched_partitions": mismatched[:MAX_MISMATCHED_PARTITIONS],
+            "partition_names": list(members or []),
+        }
+    return results
+
+
+def introspect_catalog(connection, relation_oids=None):
+    """
+    Reads the columns of every table in the database in a single catalog query.
+
+    Equivalent to calling get_table_schema for each table returned by
+    discover_tables, but uses one session and one pass over pg_catalog.
+
+    Args:
+        connection: The Connection to introspect.
+        relation_oids (list, optional): Only read these tables (pg_class oids).
+
+    Returns:
+        dict: Mapping of 'schema.table' to its schema_json, in schema/table order.
+    """
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
+        cur.execute(CATALOG_COLUMNS_SQL, {"oids": relation_oids})
+        rows = cur.fetchall()
+        cur.close()
+
+    return group_catalog_rows(rows)
+
+
+def introspect_tables(connection, relation_oids=None):
+    """
+    Reads the columns of every table, and the partitions of every
+    partitioned table, in one catalog pass over a single session.
+
+    Partitions are not listed as tables of their own: each partitioned table
+    appears once, under its root, with its partitions summarized.
+
+    Args:
+        connection: The Connection to introspect.
+        relation_oids (list, optional): Only read these tables (pg_class oids).
+
+    Returns:
+        tuple: (mapping of 'schema.table' to its schema_json, in schema/table
+        order; mapping of partitioned 'schema.table' to its partition_info).
+    """
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
+        cur.execute(CATALOG_COLUMNS_SQL, {"oids": relation_oids})
+        rows = cur.fetchall()
+        cur.execute(PARTITIONS_SQL, {"oids": relation_oids})
+        partition_rows = cur.fetchall()
+        cur.close()
+
+    return group_catalog_rows(rows), group_partition_rows(partition_rows)
+
+
+DATABASE_OID_SQL = "SELECT oid::bigint FROM pg_catalog.pg_database WHERE datname = current_database();"
+
+
+def group_marker_rows(rows) -> dict:
+    """Maps CATALOG_MARKERS_SQL rows to {'schema.table': (oid, marker)}."""
+    return {
+        f"{schema}.{table}": (oid, f"{oid}:{marker}")
+        for schema, table, oid, marker in rows
+    }
+
+
+def fetch_catalog_markers(connection):
+    """
+    Reads a cheap per-table change marker for every table in the database.
+
+    Comparing markers between runs tells which tables were added, dropped or
+    altered without reading their columns.
+
+    Args:
+        connection: The Connection to inspect.
+
+    Returns:
+        tuple: (database oid, mapping of 'schema.table' to (table oid, marker)).
+    """
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
+        cur.execute(DATABASE_OID_SQL)
+        database_oid = cur.fetchone()[0]
+        cur.execute(CATALOG_MARKERS_SQL)
+        rows = cur.fetchall()
+        cur.close()
+
+    return database_oid, group_marker_rows(rows)
+
+
+# Partitions' counters are rolled up into their partitioned table
+TABLE_ACTIVITY_SQL = """
+    SELECT
+        n.nspname,
+        c.relname,
+        sum(s.n_tup_ins)::bigint,
+        sum(s.n_tup_upd)::bigint,
+        sum(s.n_tup_del)::bigint,
+        max(GREATEST(s.last_vacuum, s.last_autovacuum)),
+        max(GREATEST(s.last_analyze, s.last_autoanalyze))
+    FROM pg_catalog.pg_stat_user_tables s
+    JOIN pg_catalog.pg_class c ON c.oid = COALESCE(pg_catalog.pg_partition_root(s.relid), s.relid)
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    GROUP BY n.nspname, c.relname;
+"""
+
+
+def group_activity_rows(rows) -> dict:
+    """Maps TABLE_ACTIVITY_SQL rows to {'schema.table': counters and timestamps}."""
+    return {
+        f"{schema}.{table}": {
+            "n_tup_ins": ins,
+            "n_tup_upd": upd,
+            "n_tup_del": dele,
+            "last_vacuum_at": last_vacuum,
+            "last_analyze_at": last_analyze,
+        }
+        for schema, table, ins, upd, dele, last_vacuum, last_analyze in rows
+    }
+
+
+def fetch_table_activity(connection):
+    """
+    Reads cumulative write counters and maintenance timestamps of every table
+    from pg_stat_user_tables in a single query.
+
+    Args:
+        connection: The Connection to inspect.
+
+    Returns:
+        dict: Mapping of 'schema.table' to its counters and timestamps.
+    """
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
+        cur.execute(TABLE_ACTIVITY_SQL)
+        rows = cur.fetchall()
+        cur.close()
+
+    return group_activity_rows(rows)
+
+
+# Planner statistics of every analyzed column; for partitioned tables only the
+# inherited (whole hierarchy) row exists, otherwise the table's own row is used
+COLUMN_STATS_SQL = """
+    SELECT DISTINCT ON (s.schemaname, s.tablename, s.attname)
+        s.schemaname,
+        s.tablename,
+        s.attname,
+        s.null_frac,
+        s.n_distinct,
+        s.most_common_vals::text,
+        s.most_common_freqs,
+        s.histogram_bounds::text
+    FROM pg_catalog.pg_stats s
+    WHERE s.schemaname NOT IN ('pg_catalog', 'information_schema')
+      AND s.schemaname !~ '^pg_(toast|temp_)'
+    ORDER BY s.schemaname, s.tablename, s.attname, s.inherited;
+"""
+
+# Kept per column: the top most common values and a decile-like sample of the histogram
+STATS_MOST_COMMON_LIMIT = 5
+STATS_HISTOGRAM_POINTS = 11
+STATS_VALUE_MAX_LENGTH = 200
+
+
+def parse_pg_array(text):
+    """
+    Parses a one-dimensional Postgres array literal into a list of strings.
+
+    Args:
+        text (str): e.g. '{a,"b c",NULL}'.
+
+    Returns:
+        list: The elements (None for NULL), or None for NULL input and
+        multi-dimensional arrays.
+    """
+    if text is None or not text.startswith("{") or text.startswith("{{"):
+        return None
+    body = text[1:-1]
+    items = []
+    i = 0
+    while i < len(body):
+        if body[i] == '"':
+            i += 1
+            chars = []
+            while body[i] != '"':
+                if body[i] == "\\":
+                    i += 1
+                chars.append(body[i])
+                i += 1
+            items.append("".join(chars))
+            i += 1
+        else:
+            end = body.find(",", i)
+            if end == -1:
+                end = len(body)
+            token = body[i:end]
+            items.append(None if token == "NULL" else token)
+            i = end
+        i += 1  # the comma
+    return items
+
+
+def _sample_bounds(bounds: list, points: int) -> list:
+    if len(bounds) <= points:
+        return bounds
+    step = (len(bounds) - 1) / (points - 1)
+    return [bounds[round(i * step)] for i in range(points)]
+
+
+def group_column_stats_rows(rows) -> dict:
+    """Maps COLUMN_STATS_SQL rows to {'schema.table': {column: compact stats}}."""
+    results = {}
+    for schema, table, column, null_frac, n_distinct, mcv_text, mcv_freqs, histogram_text in rows:
+        values = parse_pg_array(mcv_text) or []
+        freqs = list(mcv_freqs or [])
+        histogram = parse_pg_array(histogram_text)
+        results.setdefault(f"{schema}.{table}", {})[column] = {
+            "null_frac": float(null_frac),
+            "n_distinct": float(n_distinct),
+            "most_common": [
+                [value if value is None else value[:STATS_VALUE_MAX_LENGTH], float(freq)]
+                for value, freq in list(zip(values, freqs))[:STATS_MOST_COMMON_LIMIT]
+            ],
+            "histogram": (
+                [b if b is None else b[:STATS_VALUE_MAX_LENGTH] for b in _sample_bounds(histogram, STATS_HISTOGRAM_POINTS)]
+                if histogram else None
+            ),
+        }
+    return results
+
+
+def fetch_column_stats(connection):
+    """
+    Reads the planner statistics (pg_stats) of every column of every table
+    in a single catalog query; no user table is scanned.
+
+    Args:
+        connection: The Connection to inspect.
+
+    Returns:
+        dict: Mapping of 'schema.table' to {column: {'null_frac', 'n_distinct',
+        'most_common', 'histogram'}}. Tables never analyzed are left out.
+    """
+    with client_connection(connection) as conn:
+        cur = conn.cursor()
+        cur.execute(COLUMN_STATS_SQL)
+        rows = cur.fetchall()
+        cur.close()
+
+    return group_column_stats_rows(rows)
@@ -0,0 +1,240 @@
+import time
+import uuid
+
+import psycopg2
+import psycopg2.errors
+from psycopg2 import sql
+
+from app.connectors.pool import client_connection
+from app.core.config import ROW_CHECK_BATCH_SIZE
+
+SAMPLE_METHODS = ("SYSTEM", "BERNOULLI")
+
+# Examples kept by accumulators that report offending values
+MAX_EXAMPLES = 5
+
+
+def _example(value):
+    return None if value is None else str(value)[:200]
+
+
+class NullRateAccumulator:
+    """Counts the NULLs of a single column."""
+
+    def __init__(self):
+        self.rows = 0
+        self.nulls = 0
+
+    @staticmethod
+    def columns(column_names: list) -> list:
+        return [sql.Identifier(column_names[0])]
+
+    def add(self, row):
+        self.rows += 1
+        if row[0] is None:
+            self.nulls += 1
+
+    def result(self) -> dict:
+        return {
+            "nulls": self.nulls,
+            "null_rate": self.nulls / self.rows if self.rows else None,
+        }
+
+
+class DuplicateKeyAccumulator:
+    """
+    Counts rows repeating a key (one or more columns).
+
+    Rows must arrive sorted by the key, so only the previous key is kept.
+    Keys containing NULL never count as duplicates, as with UNIQUE.
+    """
+
+    ordered = True
+
+    def __init__(self):
+        self.rows = 0
+        self.duplicate_rows = 0
+        self.duplicate_keys = 0
+        self.examples = []
+        self._previous = None
+        self._in_run = False
+
+    @staticmethod
+    def columns(column_names: list) -> list:
+        return [sql.Identifier(name) for name in column_names]
+
+    def add(self, row):
+        self.rows += 1
+        key = tuple(row)
+        if None in key:
+            self._previous = None
+            return
+        if key == self._previous:
+            self.duplicate_rows += 1
+            if not self._in_run:
+                self._in_run = True
+                self.duplicate_keys += 1
+                if len(self.examples) < MAX_EXAMPLES:
+                    self.examples.append([_example(v) for v in key])
+        else:
+            self._previous = key
+            self._in_run = False
+
+    def result(self) -> dict:
+        return {
+            "duplicate_rows": self.duplicate_rows,
+            "duplicate_keys": self.duplicate_keys,
+            "examples": self.examples,
+        }
+
+
+class RangeAccumulator:
+    """
+    Counts values of a column outside [min_value, max_value].
+
+    The comparisons run on the server (so bounds given as strings compare as
+    the column's type); only the flags and the observed extremes are kept.
+    """
+
+    def __init__(self, min_value=None, max_value=None):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.rows = 0
+        self.non_null = 0
+        self.below = 0
+        self.above = 0
+        self.observed_min = None
+        self.observed_max = None
+        self.examples = []
+
+    def columns(self, column_names: list) -> list:
+        column = sql.Identifier(column_names[0])
+        below = sql.Literal(False) if self.min_value is None else sql.SQL("{} < {}").format(column, sql.Literal(self.min_value))
+        above = sql.Literal(False) if self.max_value is None else sql.SQL("{} > {}").format(column, sql.Literal(self.max_value))
+        return [column, below, above]
+
+    def add(self, row):
+        value, below, above = row
+        self.rows += 1
+        if value is None:
+            return
+        self.non_null += 1
+        if self.observed_min is None or value < self.observed_min:
+            self.observed_min = value
+        if self.observed_max is None or value > self.observed_max:
+            self.observed_max = value
+        if below or above:
+            self.below += bool(below)
+            self.above += bool(above)
+            if len(self.examples) < MAX_EXAMPLES:
+                self.examples.append(_example(value))
+
+    def result(self) -> dict:
+        violations = self.below + self.above
+        return {
+            "below_min": self.below,
+            "above_max": self.above,
+            "violation_rate": violations / self.non_null if self.non_null else None,
+            "observed_min": _example(self.observed_min),
+            "observed_max": _example(self.observed_max),
+            "examples": self.examples,
+        }
+
+
+def scan_sample(
+    connection,
+    schema: str,
+    table: str,
+    column_names: list,
+    accumulator,
+    method: str,
+    percent: float,
+    row_budget: int,
+    timeout_seconds: float,
+    batch_size: int = ROW_CHECK_BATCH_SIZE,
+) -> dict:
+    """
+    Streams a TABLESAMPLE of a client table through an accumulator.
+
+    Rows are read from a named (server-side) cursor in batches, so memory use
+    does not depend on the table or sample size. The scan stops at
+    row_budget rows (a LIMIT on the server) or when timeout_seconds have
+    elapsed: every statement runs with statement_timeout set to the time
+    left, and the budget is also checked between batches.
+
+    Args:
+        connection: The Connection the table belongs to.
+        schema (str): The table's schema.
+        table (str): The table's name.
+        column_names (list): Columns handed to the accumulator.
+        accumulator: NullRateAccumulator, DuplicateKeyAccumulator or RangeAccumulator.
+        method (str): 'SYSTEM' (sample pages) or 'BERNOULLI' (sample rows).
+        percent (float): Sample size in percent of the table.
+        row_budget (int): Maximum rows to read.
+        timeout_seconds (float): Maximum time to spend.
+        batch_size (int): Rows per fetch.
+
+    Returns:
+        dict: rows_scanned, elapsed_seconds, how the scan ended ('complete',
+        'row_budget' or 'time_budget') and the accumulator's result.
+
+    Raises:
+        ValueError: If the sampling method is unknown.
+    """
+    method = method.upper()
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Unknown sample method: {method}")
+
+    columns = accumulator.columns(column_names)
+    query = sql.SQL("SELECT {columns} FROM {table} TABLESAMPLE {method} (%(percent)s){order} LIMIT %(limit)s").format(
+        columns=sql.SQL(", ").join(columns),
+        table=sql.Identifier(schema, table),
+        method=sql.SQL(method),
+        order=(
+            sql.SQL(" ORDER BY {}").format(sql.SQL(", ").join(columns))
+            if getattr(accumulator, "ordered", False) else sql.SQL("")
+        ),
+    )
+
+    started = time.monotonic()
+    deadline = started + timeout_seconds
+    rows_scanned = 0
+    ended = "complete"
+
+    def set_timeout(cur):
+        remaining_ms = max(1, int((deadline - time.monotonic()) * 1000))
+        cur.execute("SET LOCAL statement_timeout = %s", (remaining_ms,))
+
+    with client_connection(connection) as conn:
+        control = conn.cursor()
+        try:
+            set_timeout(control)
+            cur = conn.cursor(name=f"veda_sample_{uuid.uuid4().hex[:12]}")
+            cur.execute(query, {"percent": percent, "limit": row_budget})
+            while True:
+                if time.monotonic() >= deadline:
+                    ended = "time_budget"
+                    break
+                set_timeout(control)
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    accumulator.add(row)
+                rows_scanned += len(batch)
+            cur.close()
+        except psycopg2.errors.QueryCanceled:
+            ended = "time_budget"
+        finally:
+            control.close()
+            conn.rollback()
+
+    if ended == "complete" and rows_scanned >= row_budget:
+        ended = "row_budget"
+
+    return {
+        "rows_scanned": rows_scanned,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+        "ended": ended,
+        **accumulator.result(),
+    }
@@ -0,0 +1,156 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from app.core.config import (
+    REDIS_URL,
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from app.core.metrics import Counter, register
+
+CACHE_LOOKUPS = register(Counter(
+    "veda_response_cache_lookups_total",
+    "Cached list endpoint lookups by result (hit, miss, not_modified).",
+    ("result",),
+))
+
+# Every cached response depends on one or more scopes. Writes bump the version
+# of the scopes they touch, which changes the cache key and ETag of every
+# response built from them; nothing is ever deleted explicitly.
+DATASETS_SCOPE = "datasets"
+
+
+def connection_scope(connection_id: int, resource: str) -> str:
+    """Scope of one connection's 'datasets' or 'incidents'."""
+    return f"connection:{connection_id}:{resource}"
+
+
+class ResponseCache:
+    """
+    Base class for response cache backends.
+
+    Subclasses store scope versions and serialized response bodies; bodies
+    are looked up by a key that already includes the versions they were
+    built from.
+    """
+
+    def versions(self, scopes) -> list:
+        raise NotImplementedError
+
+    def bump(self, scopes):
+        raise NotImplementedError
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, body: bytes):
+        raise NotImplementedError
+
+
+class InProcessResponseCache(ResponseCache):
+    """
+    An LRU of response bodies and a dict of scope versions in process memory.
+
+    Only sees invalidations made by the same process, so it fits the
+    in-process job backend; use the Redis cache when jobs run elsewhere.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # Versions restart at 0 with the process; the token keeps ETags issued
+        # by an earlier process from matching
+        self._token = uuid.uuid4().hex[:8]
+        self._versions = {}
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def versions(self, scopes) -> list:
+        with self._lock:
+            return [f"{self._token}.{self._versions.get(scope, 0)}" for scope in scopes]
+
+    def bump(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def get(self, key: str):
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes):
+        with self._lock:
+            self._bodies[key] = body
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Keeps scope versions and response bodies in Redis, shared by every API
+    process and job worker.
+    """
+
+    VERSION_KEY = "veda:cache:version:{}"
+    BODY_KEY = "veda:cache:body:{}"
+
+    def __init__(self, url: str = REDIS_URL, ttl: int = RESPONSE_CACHE_TTL_SECONDS):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def versions(self, scopes) -> list:
+        values = self._redis.mget([self.VERSION_KEY.format(scope) for scope in scopes])
+        return [(value or b"0").decode() for value in values]
+
+    def bump(self, scopes):
+        pipe = self._redis.pipeline(transaction=False)
+        for scope in scopes:
+            pipe.incr(self.VERSION_KEY.format(scope))
+        pipe.execute()
+
+    def get(self, key: str):
+        return self._redis.get(self.BODY_KEY.format(key))
+
+    def set(self, key: str, body: bytes):
+        self._redis.set(self.BODY_KEY.format(key), body, ex=self.ttl)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide response cache, or None when RESPONSE_CACHE_BACKEND is "off"."""
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            if RESPONSE_CACHE_BACKEND == "redis":
+                _cache = RedisResponseCache()
+            elif RESPONSE_CACHE_BACKEND == "inprocess":
+                _cache = InProcessResponseCache()
+            elif RESPONSE_CACHE_BACKEND != "off":
+                raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {RESPONSE_CACHE_BACKEND}")
+        return _cache
+
+
+def invalidate(*scopes):
+    """
+    Invalidates every cached response built from any of the given scopes.
+
+    Call after the write is committed, so a response rebuilt right away
+    already sees it.
+
+    Args:
+        *scopes (str): DATASETS_SCOPE and/or connection_scope(...) values.
+    """
+    cache = get_response_cache()
+    if cache is not None and scopes:
+        cache.bump(scopes)
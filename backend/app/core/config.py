@@ -1,4 +1,5 @@
 import os
+import re
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,3 +8,110 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is missing. Add it to backend/.env")
+
+# Async routes use the same database through asyncpg unless overridden
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or re.sub(
+    r"^postgres(ql)?(\+\w+)?://", "postgresql+asyncpg://", DATABASE_URL
+)
+
+# Client database connection pools (one pool per Connection.id)
+CLIENT_POOL_MAX_SIZE = int(os.getenv("CLIENT_POOL_MAX_SIZE", "5"))
+CLIENT_POOL_IDLE_TIMEOUT_SECONDS = float(os.getenv("CLIENT_POOL_IDLE_TIMEOUT_SECONDS", "300"))
+CLIENT_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("CLIENT_POOL_CHECKOUT_TIMEOUT_SECONDS", "30"))
+
+# Client-call governor (connectors.governor): time budgets of every client
+# session, concurrent sessions per client host (across its connections), and
+# the circuit breaker failing a host fast for a cooldown after consecutive
+# connection errors or timeouts
+CLIENT_CONNECT_TIMEOUT_SECONDS = int(os.getenv("CLIENT_CONNECT_TIMEOUT_SECONDS", "10"))
+CLIENT_STATEMENT_TIMEOUT_SECONDS = float(os.getenv("CLIENT_STATEMENT_TIMEOUT_SECONDS", "60"))
+CLIENT_HOST_MAX_SESSIONS = int(os.getenv("CLIENT_HOST_MAX_SESSIONS", "10"))
+CLIENT_BREAKER_FAILURES = int(os.getenv("CLIENT_BREAKER_FAILURES", "3"))
+CLIENT_BREAKER_COOLDOWN_SECONDS = float(os.getenv("CLIENT_BREAKER_COOLDOWN_SECONDS", "60"))
+
+# Background jobs (discovery, checks): "inprocess", "redis" or "database"
+# (work items in the metadata DB, run by `python -m app.worker` processes)
+JOB_BACKEND = os.getenv("JOB_BACKEND", "inprocess")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Database job backend: a claimed item is reclaimed by another worker once its
+# lease lapses (renewed every third of it while running), at most
+# WORK_MAX_ATTEMPTS times (the redis backend requeues a dead worker's jobs as
+# often); WORK_MAX_PER_HOST caps running items per client host
+WORK_LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", "60"))
+WORK_MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", "3"))
+WORK_MAX_PER_HOST = int(os.getenv("WORK_MAX_PER_HOST", "2"))
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+
+# Incremental discovery falls back to a full catalog scan at least this often
+INCREMENTAL_FULL_SCAN_HOURS = float(os.getenv("INCREMENTAL_FULL_SCAN_HOURS", "24"))
+
+# Client databases whose catalogs are read at the same time by fleet discovery
+DISCOVERY_CONCURRENCY = int(os.getenv("DISCOVERY_CONCURRENCY", "16"))
+
+# Default hours without inserts/updates/deletes before a table counts as stale
+FRESHNESS_THRESHOLD_HOURS = float(os.getenv("FRESHNESS_THRESHOLD_HOURS", "24"))
+
+# Threads running row-level checks (services.row_checks) for a connection
+CHECK_WORKERS = int(os.getenv("CHECK_WORKERS", "4"))
+
+# Incident hysteresis: an open incident is only resolved after this many
+# consecutive passing checks, and one resolved less than
+# INCIDENT_REOPEN_WINDOW_MINUTES ago is reopened instead of duplicated
+INCIDENT_RESOLVE_AFTER = int(os.getenv("INCIDENT_RESOLVE_AFTER", "2"))
+INCIDENT_REOPEN_WINDOW_MINUTES = float(os.getenv("INCIDENT_REOPEN_WINDOW_MINUTES", "60"))
+
+# Column profiling (pg_stats): a column's stats are only stored again once its
+# null fraction moved by more than PROFILE_NULL_FRAC_TOLERANCE, its distinct
+# count by more than PROFILE_DISTINCT_TOLERANCE (relative), or its most common
+# value changed. A null fraction rise of PROFILE_NULL_RATE_SPIKE or a relative
+# distinct count change of PROFILE_DISTINCT_SHIFT against the stored stats
+# raises a DISTRIBUTION_SHIFT incident.
+PROFILE_NULL_FRAC_TOLERANCE = float(os.getenv("PROFILE_NULL_FRAC_TOLERANCE", "0.01"))
+PROFILE_DISTINCT_TOLERANCE = float(os.getenv("PROFILE_DISTINCT_TOLERANCE", "0.1"))
+PROFILE_NULL_RATE_SPIKE = float(os.getenv("PROFILE_NULL_RATE_SPIKE", "0.1"))
+PROFILE_DISTINCT_SHIFT = float(os.getenv("PROFILE_DISTINCT_SHIFT", "0.5"))
+
+# Row-level checks read a TABLESAMPLE of the table through a server-side
+# cursor in ROW_CHECK_BATCH_SIZE batches; these are the defaults for checks
+# that set no sample / budget of their own
+ROW_CHECK_SAMPLE_METHOD = os.getenv("ROW_CHECK_SAMPLE_METHOD", "SYSTEM")
+ROW_CHECK_SAMPLE_PERCENT = float(os.getenv("ROW_CHECK_SAMPLE_PERCENT", "1"))
+ROW_CHECK_ROW_BUDGET = int(os.getenv("ROW_CHECK_ROW_BUDGET", "100000"))
+ROW_CHECK_TIMEOUT_SECONDS = float(os.getenv("ROW_CHECK_TIMEOUT_SECONDS", "30"))
+ROW_CHECK_BATCH_SIZE = int(os.getenv("ROW_CHECK_BATCH_SIZE", "5000"))
+
+# Schema snapshot storage: "full" stores every snapshot's schema_json,
+# "delta" stores a full checkpoint every SNAPSHOT_CHECKPOINT_INTERVAL
+# snapshots and only the changes against it in between
+SNAPSHOT_STORAGE = os.getenv("SNAPSHOT_STORAGE", "full")
+SNAPSHOT_CHECKPOINT_INTERVAL = int(os.getenv("SNAPSHOT_CHECKPOINT_INTERVAL", "20"))
+# Store the columns of full snapshots once per distinct content in
+# schema_bodies, shared by every dataset with an identical table
+SNAPSHOT_INTERN_BODIES = os.getenv("SNAPSHOT_INTERN_BODIES", "true").lower() in ("1", "true", "yes")
+# Snapshots older than this are removed by compaction (the latest one per
+# dataset is always kept); 0 keeps history forever
+SNAPSHOT_RETENTION_DAYS = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "0"))
+
+# Range-partition incidents and schema_snapshots by month of created_at.
+# Applies when init_db creates the tables (existing tables are not converted);
+# `python -m app.db.partitions` keeps PARTITION_PREMAKE_MONTHS months ahead and
+# drops partitions past SNAPSHOT_RETENTION_DAYS / INCIDENT_RETENTION_DAYS
+# (0 keeps them forever)
+PARTITION_METADATA_TABLES = os.getenv("PARTITION_METADATA_TABLES", "false").lower() in ("1", "true", "yes")
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+INCIDENT_RETENTION_DAYS = int(os.getenv("INCIDENT_RETENTION_DAYS", "0"))
+
+# Response cache for the list endpoints: "inprocess" (LRU per API process,
+# only invalidated by jobs running in that process), "redis" or "off". Jobs run
+# by separate worker processes (JOB_BACKEND=database) cannot invalidate an
+# in-process cache, so that combination is refused and the default is "off"
+RESPONSE_CACHE_BACKEND = os.getenv(
+    "RESPONSE_CACHE_BACKEND",
+    {"redis": "redis", "database": "off"}.get(JOB_BACKEND, "inprocess"),
+)
+if RESPONSE_CACHE_BACKEND == "inprocess" and JOB_BACKEND == "database":
+    raise ValueError("RESPONSE_CACHE_BACKEND=inprocess cannot be used with JOB_BACKEND=database; use redis or off")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
@@ -0,0 +1,25 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import ASYNC_DATABASE_URL
+from app.core.metrics import instrument_engine
+
+# created the async db engine (asyncpg), used by the async routes
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+instrument_engine(async_engine.sync_engine, name="async")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    """
+    FastAPI dependency yielding a request-scoped AsyncSession.
+
+    Yields:
+        AsyncSession: Closed once the response has been sent.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
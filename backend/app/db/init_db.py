@@ -1,3 +1,4 @@
+from app.core.config import PARTITION_METADATA_TABLES
 from app.db.session import engine
 from app.models import Base
 
@@ -6,5 +7,11 @@ def init():
     Base.metadata.create_all(bind=engine)
     print("✅ VEDA DB tables created")
 
+    if PARTITION_METADATA_TABLES:
+        from app.db.partitions import ensure_partitions
+
+        created = ensure_partitions(engine)
+        print(f"✅ {len(created)} monthly partitions created")
+
 if __name__ == "__main__":
-    init()
\ No newline at end of file
+    init()
@@ -0,0 +1,271 @@
+"""
+Monthly partition maintenance for incidents and schema_snapshots.
+
+With PARTITION_METADATA_TABLES on, init_db creates both tables range-partitioned
+by created_at, and this module keeps one partition per calendar month (UTC),
+named <table>_pYYYY_MM, plus a <table>_default catch-all. Run it periodically,
+e.g. daily from cron:
+
+    python -m app.db.partitions [--detach] [--dry-run]
+
+It creates the partitions of the next PARTITION_PREMAKE_MONTHS months (moving
+rows that already landed in the default partition for such a month into
+it), then removes whole partitions that fell out of retention (SNAPSHOT_RETENTION_DAYS
+for schema_snapshots, INCIDENT_RETENTION_DAYS for incidents; 0 keeps them),
+which is a catalog operation instead of a large DELETE:
+
+- Before a snapshot partition goes, each dataset's latest snapshot, if it
+  is still in the partition, is moved forward to the partition's upper bound
+  (keeping its capture time in original_created_at), and the retained deltas
+  whose checkpoint is in the partition are re-anchored, in the same
+  transaction as the drop (services.snapshot_store.release_snapshot_range).
+- An incident partition still holding open incidents is kept and reported;
+  the cached incident lists of the connections in a removed one are
+  invalidated.
+
+Removed partitions are dropped, or detached with --detach so they can be
+archived. Tables created unpartitioned are left alone: converting one needs
+a manual copy into a partitioned table.
+"""
+import argparse
+import datetime
+import re
+
+from sqlalchemy import text
+
+from app.core.config import (
+    INCIDENT_RETENTION_DAYS,
+    PARTITION_PREMAKE_MONTHS,
+    SNAPSHOT_RETENTION_DAYS,
+)
+from app.core.cache import connection_scope, invalidate
+from app.db.session import SessionLocal, engine
+from app.services.snapshot_store import release_snapshot_range
+
+PARTITIONED_TABLES = ("incidents", "schema_snapshots")
+
+_PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def _month_start(value: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def _add_months(month: datetime.datetime, count: int) -> datetime.datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.datetime(index // 12, index % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def partition_name(table: str, month: datetime.datetime) -> str:
+    """Returns the name of a table's partition for the month starting at month."""
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    """Tells whether a table exists as a partitioned table."""
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.oid = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).first() is not None
+
+
+def list_partitions(conn, table: str) -> list:
+    """
+    Lists a table's monthly partitions.
+
+    Args:
+        conn: A connection to the metadata DB.
+        table (str): The partitioned table.
+
+    Returns:
+        list: (name, lower bound, upper bound) tuples sorted by month; the
+        default partition and partitions named otherwise are left out.
+    """
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).scalars()
+
+    partitions = []
+    for name in rows:
+        match = _PARTITION_NAME.search(name)
+        if name.startswith(f"{table}_p") and match:
+            lower = datetime.datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=datetime.timezone.utc)
+            partitions.append((name, lower, _add_months(lower, 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_partitions(bind=engine, now=None, months_ahead: int = PARTITION_PREMAKE_MONTHS) -> list:
+    """
+    Creates the default partition and the monthly partitions from the current
+    month through months_ahead months ahead, where missing.
+
+    Postgres refuses to create a partition while the default partition holds
+    rows in its range (e.g. after maintenance did not run for a while), so in
+    that case the default is detached, the partition created, the rows moved
+    into it and the default attached again. Each partition is created in its
+    own transaction.
+
+    Args:
+        bind: Engine of the metadata DB.
+        now (datetime, optional): Current time (UTC); defaults to now.
+        months_ahead (int): Months to create beyond the current one.
+
+    Returns:
+        list: Names of the partitions created.
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    current = _month_start(now)
+    created = []
+
+    for table in PARTITIONED_TABLES:
+        default = f"{table}_default"
+        with bind.begin() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            existing = {name for name, _, _ in list_partitions(conn, table)}
+            conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{default}" PARTITION OF "{table}" DEFAULT'))
+
+        for offset in range(max(0, months_ahead) + 1):
+            lower = _add_months(current, offset)
+            upper = _add_months(lower, 1)
+            name = partition_name(table, lower)
+            if name in existing:
+                continue
+
+            in_range = {"lower": lower, "upper": upper}
+            create = text(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            with bind.begin() as conn:
+                stranded = conn.execute(
+                    text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE created_at >= :lower AND created_at < :upper)'),
+                    in_range,
+                ).scalar()
+                if not stranded:
+                    conn.execute(create)
+                else:
+                    conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"'))
+                    conn.execute(create)
+                    conn.execute(
+                        text(
+                            f'INSERT INTO "{name}" SELECT * FROM "{default}" '
+                            "WHERE created_at >= :lower AND created_at < :upper"
+                        ),
+                        in_range,
+                    )
+                    conn.execute(
+                        text(f'DELETE FROM "{default}" WHERE created_at >= :lower AND created_at < :upper'),
+                        in_range,
+                    )
+                    conn.execute(text(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT'))
+            created.append(name)
+
+    return created
+
+
+def prune_partitions(
+    bind=engine,
+    now=None,
+    detach: bool = False,
+    dry_run: bool = False,
+    snapshot_retention_days: int = SNAPSHOT_RETENTION_DAYS,
+    incident_retention_days: int = INCIDENT_RETENTION_DAYS,
+) -> dict:
+    """
+    Drops (or detaches) the monthly partitions that ended before their
+    table's retention cutoff.
+
+    Args:
+        bind: Engine of the metadata DB.
+        now (datetime, optional): Current time (UTC); defaults to now.
+        detach (bool): Detach the partitions instead of dropping them.
+        dry_run (bool): Only report what would be removed.
+        snapshot_retention_days (int): schema_snapshots history to keep; 0 keeps everything.
+        incident_retention_days (int): incidents history to keep; 0 keeps everything.
+
+    Returns:
+        dict: Names of the partitions 'removed', of the ones 'kept' because
+        they still hold open incidents, and the number of latest snapshots
+        moved out of removed partitions ('snapshots_moved').
+    """
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    retention = {"schema_snapshots": snapshot_retention_days, "incidents": incident_retention_days}
+    result = {"removed": [], "kept": [], "snapshots_moved": 0}
+
+    for table in PARTITIONED_TABLES:
+        if not retention[table]:
+            continue
+        cutoff = now - datetime.timedelta(days=retention[table])
+
+        with bind.connect() as conn:
+            if not is_partitioned(conn, table):
+                continue
+            expired = [p for p in list_partitions(conn, table) if p[2] <= cutoff]
+
+        for name, lower, upper in expired:
+            if table == "incidents":
+                with bind.connect() as conn:
+                    open_incidents = conn.execute(
+                        text(f"SELECT count(*) FROM \"{name}\" WHERE status = 'open'")
+                    ).scalar()
+                if open_incidents:
+                    result["kept"].append(name)
+                    continue
+
+            result["removed"].append(name)
+            if dry_run:
+                continue
+
+            db = SessionLocal(bind=bind)
+            try:
+                connection_ids = []
+                if table == "schema_snapshots":
+                    result["snapshots_moved"] += release_snapshot_range(db, lower, upper)
+                else:
+                    connection_ids = db.execute(text(f'SELECT DISTINCT connection_id FROM "{name}"')).scalars().all()
+                if detach:
+                    db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+                else:
+                    db.execute(text(f'DROP TABLE "{name}"'))
+                db.commit()
+            finally:
+                db.close()
+
+            if connection_ids:
+                invalidate(*(connection_scope(connection_id, "incidents") for connection_id in connection_ids))
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detach", action="store_true",
+                        help="detach expired partitions instead of dropping them")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report expired partitions without changing anything")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        for name in ensure_partitions():
+            print(f"created {name}")
+
+    result = prune_partitions(detach=args.detach, dry_run=args.dry_run)
+    verb = "would remove" if args.dry_run else ("detached" if args.detach else "dropped")
+    for name in result["removed"]:
+        print(f"{verb} {name}")
+    for name in result["kept"]:
+        print(f"kept {name} (open incidents)")
+
+
+if __name__ == "__main__":
+    main()
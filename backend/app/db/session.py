@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import DATABASE_URL
+from app.core.metrics import instrument_engine
 
 # created the db engine
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
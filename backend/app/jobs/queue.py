@@ -0,0 +1,510 @@
+import datetime
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import (
+    JOB_BACKEND,
+    JOB_WORKERS,
+    REDIS_URL,
+    WORK_LEASE_SECONDS,
+    WORK_MAX_ATTEMPTS,
+    WORK_MAX_PER_HOST,
+)
+from app.db.session import SessionLocal
+from app.models import Connection, WorkItem
+
+logger = logging.getLogger(__name__)
+
+# kind -> callable(job, report) returning a JSON-serializable result;
+# filled in by app.jobs.tasks
+HANDLERS = {}
+
+# Persist progress at most this often while a job is running
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class Job:
+    """
+    A unit of background work (e.g. discovery of one connection) and its status.
+
+    Attributes:
+        id (str): Unique identifier for the job.
+        kind (str): Handler name ('discover', 'run_checks').
+        connection_id (int): The connection the job works on (None for fleet-wide jobs).
+        params (dict): Handler options (e.g. {'incremental': False}).
+        status (str): 'queued', 'running', 'succeeded' or 'failed'.
+        processed (int): Items (tables, datasets) processed so far.
+        total (int): Items to process, once known.
+        result (dict): Handler result on success.
+        error (str): Error message on failure.
+        timings (dict): Seconds spent per phase, as reported by the handler.
+        enqueued_at / started_at / finished_at (str): ISO timestamps.
+    """
+
+    FIELDS = (
+        "id", "kind", "connection_id", "params", "status", "processed", "total",
+        "result", "error", "timings", "enqueued_at", "started_at", "finished_at",
+    )
+
+    def __init__(self, kind: str, connection_id: int, **fields):
+        self.id = fields.pop("id", None) or uuid.uuid4().hex
+        self.kind = kind
+        self.connection_id = connection_id
+        self.params = {}
+        self.status = "queued"
+        self.processed = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.timings = {}
+        self.enqueued_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        data = dict(data)
+        return cls(data.pop("kind"), data.pop("connection_id"), **data)
+
+
+class JobQueue:
+    """
+    Base class for job backends.
+
+    Subclasses store jobs (save/get) and decide where enqueued jobs run;
+    execute() is shared and runs a job's handler while keeping its status current.
+    """
+
+    def enqueue(self, kind: str, connection_id: int, **params) -> Job:
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(kind, connection_id, params=params)
+        self.save(job)
+        self._dispatch(job)
+        return job
+
+    def get(self, job_id: str):
+        raise NotImplementedError
+
+    def save(self, job: Job):
+        raise NotImplementedError
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _dispatch(self, job: Job):
+        raise NotImplementedError
+
+    def execute(self, job: Job):
+        job.status = "running"
+        job.started_at = _now()
+        self.save(job)
+
+        last_saved = time.monotonic()
+
+        def report(processed: int, total: int = None, **timings):
+            nonlocal last_saved
+            job.processed = processed
+            if total is not None:
+                job.total = total
+            job.timings.update(timings)
+            if time.monotonic() - last_saved >= PROGRESS_INTERVAL_SECONDS:
+                self.save(job)
+                last_saved = time.monotonic()
+
+        try:
+            job.result = HANDLERS[job.kind](job, report)
+            job.status = "succeeded"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = _now()
+        self.save(job)
+
+
+class InProcessJobQueue(JobQueue):
+    """Runs jobs on a thread pool inside the API process; job state lives in memory."""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="veda-job")
+
+    def get(self, job_id: str):
+        with self._lock:
+            data = self._jobs.get(job_id)
+        return Job.from_dict(data) if data else None
+
+    def save(self, job: Job):
+        data = json.loads(json.dumps(job.to_dict(), default=str))
+        with self._lock:
+            self._jobs[job.id] = data
+
+    def stop(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self, job: Job):
+        self._executor.submit(self.execute, job)
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Queues jobs in a Redis list and keeps their status in Redis, so any API
+    process can report on jobs run by any other process's workers.
+
+    A worker takes a job by atomically moving it (BLMOVE) from the queue into
+    its own processing list, and removes it from there once the job has
+    finished. Each process keeps an alive key refreshed by a heartbeat; the
+    jobs left in the processing lists of a process whose key expired (it
+    died mid-job) are moved back to the front of the queue by any other
+    process, at most WORK_MAX_ATTEMPTS times per job before it is failed.
+    """
+
+    QUEUE_KEY = "veda:jobs:queue"
+    JOB_KEY = "veda:job:{}"
+    # Processing lists of all worker threads, as "<process id>:<thread index>"
+    WORKERS_KEY = "veda:jobs:workers"
+    PROCESSING_KEY = "veda:jobs:processing:{}"
+    ALIVE_KEY = "veda:jobs:alive:{}"
+    ATTEMPTS_KEY = "veda:jobs:attempts"
+    # Finished jobs are kept around for status polling this long
+    JOB_TTL_SECONDS = 7 * 24 * 3600
+    # A process whose heartbeat is this late is considered dead
+    HEARTBEAT_SECONDS = 10
+    ALIVE_TTL_SECONDS = 30
+
+    def __init__(self, url: str = REDIS_URL, workers: int = JOB_WORKERS, max_attempts: int = WORK_MAX_ATTEMPTS):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._workers = workers
+        self.max_attempts = max_attempts
+        self.process_id = uuid.uuid4().hex
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def get(self, job_id: str):
+        raw = self._redis.get(self.JOB_KEY.format(job_id))
+        return Job.from_dict(json.loads(raw)) if raw else None
+
+    def save(self, job: Job):
+        self._redis.set(
+            self.JOB_KEY.format(job.id),
+            json.dumps(job.to_dict(), default=str),
+            ex=self.JOB_TTL_SECONDS,
+        )
+
+    def start(self):
+        self._beat()
+        threads = [threading.Thread(target=self._heartbeat, name="veda-job-heartbeat", daemon=True)]
+        for i in range(self._workers):
+            worker = f"{self.process_id}:{i}"
+            self._redis.sadd(self.WORKERS_KEY, worker)
+            threads.append(threading.Thread(target=self._work, args=(worker,), name=f"veda-job-{i}", daemon=True))
+        for thread in threads:
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+
+    def _dispatch(self, job: Job):
+        self._redis.lpush(self.QUEUE_KEY, job.id)
+
+    def _beat(self):
+        self._redis.set(self.ALIVE_KEY.format(self.process_id), 1, ex=self.ALIVE_TTL_SECONDS)
+
+    def _heartbeat(self):
+        while not self._stopping.wait(self.HEARTBEAT_SECONDS):
+            try:
+                self._beat()
+                self.requeue_stale()
+            except Exception:
+                logger.exception("Job queue heartbeat failed")
+
+    def requeue_stale(self) -> int:
+        """
+        Moves the jobs of dead processes' workers back to the front of the queue.
+
+        Returns:
+            int: Number of jobs requeued.
+        """
+        requeued = 0
+        for worker in self._redis.smembers(self.WORKERS_KEY):
+            worker = worker.decode()
+            process_id = worker.rsplit(":", 1)[0]
+            if self._redis.exists(self.ALIVE_KEY.format(process_id)):
+                continue
+            processing = self.PROCESSING_KEY.format(worker)
+            # Jobs leave the list by one atomic move (or removal) each, so
+            # concurrent requeuers never duplicate or drop one
+            while (job_id := self._redis.lindex(processing, -1)) is not None:
+                if self._redis.hincrby(self.ATTEMPTS_KEY, job_id, 1) < self.max_attempts:
+                    if self._redis.lmove(processing, self.QUEUE_KEY, "RIGHT", "RIGHT") is not None:
+                        requeued += 1
+                elif self._redis.lrem(processing, 1, job_id):
+                    self._redis.hdel(self.ATTEMPTS_KEY, job_id)
+                    job = self.get(job_id.decode())
+                    if job is not None:
+                        job.status = "failed"
+                        job.error = f"Worker died {self.max_attempts} times"
+                        job.finished_at = _now()
+                        self.save(job)
+            self._redis.srem(self.WORKERS_KEY, worker)
+        return requeued
+
+    def _work(self, worker: str):
+        processing = self.PROCESSING_KEY.format(worker)
+        while not self._stopping.is_set():
+            try:
+                job_id = self._redis.blmove(self.QUEUE_KEY, processing, 1, "RIGHT", "LEFT")
+            except Exception:
+                logger.exception("Polling the job queue failed")
+                time.sleep(1)
+                continue
+            if job_id is None:
+                continue
+            job = self.get(job_id.decode())
+            if job is not None:
+                self.execute(job)
+            self._redis.lrem(processing, 1, job_id)
+            self._redis.hdel(self.ATTEMPTS_KEY, job_id)
+
+
+def _parse_timestamp(value):
+    return datetime.datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class DatabaseJobQueue(JobQueue):
+    """
+    Stores jobs as WorkItem rows in the metadata DB.
+
+    Enqueueing only inserts the row; any number of `python -m app.worker`
+    processes claim items with SELECT ... FOR UPDATE SKIP LOCKED, so no two
+    workers take the same item and none waits on another. A claimed item
+    carries a lease that its worker keeps renewing; if the worker dies the
+    lease lapses and another worker reclaims the item. Per-client-host caps
+    are enforced with session-level advisory locks held by the claiming
+    worker's connection, so they are released even if the worker crashes.
+    """
+
+    # Candidates locked per claim attempt, so items of busy hosts can be skipped
+    CLAIM_BATCH_SIZE = 20
+
+    UPDATABLE = ("status", "processed", "total", "result", "error", "timings", "started_at", "finished_at")
+
+    def __init__(
+        self,
+        worker_id: str = None,
+        lease_seconds: float = WORK_LEASE_SECONDS,
+        max_attempts: int = WORK_MAX_ATTEMPTS,
+        max_per_host: int = WORK_MAX_PER_HOST,
+    ):
+        self.worker_id = worker_id
+        self.lease = datetime.timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.max_per_host = max_per_host
+
+    def get(self, job_id: str):
+        db = SessionLocal()
+        try:
+            item = db.get(WorkItem, job_id)
+            return self._job_from_item(item) if item else None
+        finally:
+            db.close()
+
+    def save(self, job: Job):
+        values = {name: getattr(job, name) for name in Job.FIELDS}
+        for name in ("enqueued_at", "started_at", "finished_at"):
+            values[name] = _parse_timestamp(values[name])
+        values["host"] = (
+            select(Connection.host).where(Connection.id == job.connection_id).scalar_subquery()
+        )
+        stmt = pg_insert(WorkItem).values(**values)
+        # Only the worker holding the lease may update the item; a worker whose
+        # lease lapsed and was reclaimed elsewhere silently stops writing
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WorkItem.id],
+            set_={name: stmt.excluded[name] for name in self.UPDATABLE},
+            where=WorkItem.lease_owner == self.worker_id,
+        )
+        db = SessionLocal()
+        try:
+            db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+
+    def _dispatch(self, job: Job):
+        pass  # the inserted row is the queue entry
+
+    def claim(self, lock_conn):
+        """
+        Claims the oldest runnable work item whose client host has a free slot.
+
+        Args:
+            lock_conn: A SQLAlchemy Connection dedicated to this worker; it holds
+                the host slot lock until release_host_slot is called, and is
+                invalidated if the claim fails.
+
+        Returns:
+            tuple: (Job, host slot) or (None, None) when there is nothing to run.
+        """
+        now = func.now()
+        try:
+            with lock_conn.begin():
+                # Items whose workers kept dying are given up on
+                lock_conn.execute(
+                    update(WorkItem)
+                    .where(WorkItem.status == "running")
+                    .where(WorkItem.lease_expires_at < now)
+                    .where(WorkItem.attempts >= self.max_attempts)
+                    .values(
+                        status="failed",
+                        error=f"Lease expired {self.max_attempts} times",
+                        finished_at=now,
+                    )
+                )
+
+                candidates = lock_conn.execute(
+                    select(WorkItem.id, WorkItem.host)
+                    .where(WorkItem.attempts < self.max_attempts)
+                    .where(
+                        (WorkItem.status == "queued")
+                        | ((WorkItem.status == "running") & (WorkItem.lease_expires_at < now))
+                    )
+                    .order_by(WorkItem.enqueued_at)
+                    .limit(self.CLAIM_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                ).all()
+
+                for item_id, host in candidates:
+                    slot = None
+                    if host is not None:
+                        slot = self._try_host_slot(lock_conn, host)
+                        if slot is None:
+                            continue
+                    item = lock_conn.execute(
+                        update(WorkItem)
+                        .where(WorkItem.id == item_id)
+                        .values(
+                            status="running",
+                            attempts=WorkItem.attempts + 1,
+                            lease_owner=self.worker_id,
+                            lease_expires_at=now + self.lease,
+                            started_at=now,
+                            error=None,
+                        )
+                        .returning(*WorkItem.__table__.c)
+                    ).first()
+                    return self._job_from_item(item), (host, slot)
+        except BaseException:
+            # Host slot locks are session-level and survive the rollback: end
+            # the session instead of returning it to the pool holding a slot
+            lock_conn.invalidate()
+            raise
+
+        return None, None
+
+    def renew_lease(self, job_id: str) -> bool:
+        """Extends the lease of a running item; False if this worker lost it."""
+        db = SessionLocal()
+        try:
+            renewed = db.execute(
+                update(WorkItem)
+                .where(WorkItem.id == job_id)
+                .where(WorkItem.lease_owner == self.worker_id)
+                .values(lease_expires_at=func.now() + self.lease)
+            ).rowcount
+            db.commit()
+            return renewed > 0
+        finally:
+            db.close()
+
+    def execute_leased(self, job: Job):
+        """Runs a claimed job while renewing its lease in the background."""
+        finished = threading.Event()
+
+        def heartbeat():
+            while not finished.wait(self.lease.total_seconds() / 3):
+                try:
+                    if not self.renew_lease(job.id):
+                        logger.warning("Lost the lease on job %s (%s)", job.id, job.kind)
+                        return
+                except Exception:
+                    logger.exception("Renewing the lease on job %s failed", job.id)
+
+        thread = threading.Thread(target=heartbeat, name=f"veda-lease-{job.id[:8]}", daemon=True)
+        thread.start()
+        try:
+            self.execute(job)
+        finally:
+            finished.set()
+            thread.join()
+
+    def release_host_slot(self, lock_conn, slot):
+        if slot is None or slot[1] is None:
+            return
+        host, index = slot
+        with lock_conn.begin():
+            lock_conn.execute(select(func.pg_advisory_unlock(self._host_key(host), index)))
+
+    def _try_host_slot(self, lock_conn, host: str):
+        for index in range(self.max_per_host):
+            if lock_conn.execute(select(func.pg_try_advisory_lock(self._host_key(host), index))).scalar():
+                return index
+        return None
+
+    @staticmethod
+    def _host_key(host: str):
+        return func.hashtext(f"veda:host:{host}")
+
+    @staticmethod
+    def _job_from_item(item) -> Job:
+        data = {name: getattr(item, name) for name in Job.FIELDS}
+        for name in ("enqueued_at", "started_at", "finished_at"):
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return Job.from_dict(data)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue for the configured JOB_BACKEND."""
+    global _queue
+    import app.jobs.tasks  # noqa: F401  registers the handlers
+
+    with _queue_lock:
+        if _queue is None:
+            if JOB_BACKEND == "redis":
+                _queue = RedisJobQueue()
+            elif JOB_BACKEND == "inprocess":
+                _queue = InProcessJobQueue()
+            elif JOB_BACKEND == "database":
+                _queue = DatabaseJobQueue()
+            else:
+                raise ValueError(f"Unknown JOB_BACKEND: {JOB_BACKEND}")
+        return _queue
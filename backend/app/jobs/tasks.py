@@ -0,0 +1,192 @@
+import time
+
+from app.db.session import SessionLocal
+from app.core.config import JOB_BACKEND
+from app.jobs.queue import HANDLERS, get_job_queue
+from app.models import Connection
+from app.services.discovery import run_discovery, run_fleet_discovery
+from app.services.monitoring import run_checks_for_connection
+from app.services.profiling import run_profiling
+from app.services.row_checks import run_row_checks_for_connection
+from app.services.snapshot_store import compact_snapshots as compact_snapshot_history
+
+
+def _load_connection(db, connection_id: int) -> Connection:
+    conn = db.query(Connection).filter(Connection.id == connection_id).first()
+    if not conn:
+        raise ValueError(f"Connection {connection_id} not found")
+    return conn
+
+
+def discover(job, report):
+    """
+    Job handler: discovers a connection's tables and persists their schemas.
+
+    Job params:
+        incremental (bool): Allow incremental discovery (default True).
+
+    Args:
+        job (Job): The running job.
+        report (callable): Progress callback (processed, total, **timings).
+
+    Returns:
+        dict: Summary from run_discovery.
+    """
+    db = SessionLocal()
+    try:
+        conn = _load_connection(db, job.connection_id)
+        return run_discovery(
+            db, conn,
+            incremental=job.params.get("incremental", True),
+            progress=report,
+        )
+    finally:
+        db.close()
+
+
+def discover_all(job, report):
+    """
+    Job handler: discovers the tables of every connection, reading their
+    catalogs concurrently (see services.discovery.run_fleet_discovery).
+
+    Job params:
+        incremental (bool): Allow incremental discovery (default True).
+
+    Args:
+        job (Job): The running job.
+        report (callable): Progress callback (processed, total, **timings).
+
+    With JOB_BACKEND=database the fleet is instead fanned out as one
+    'discover' work item per connection, so every worker process shares it.
+
+    Returns:
+        dict: Per connection id, the discovery summary or an error (or the
+        queued job ID when fanned out).
+    """
+    db = SessionLocal()
+    try:
+        connections = db.query(Connection).order_by(Connection.id).all()
+        if JOB_BACKEND == "database":
+            queue = get_job_queue()
+            incremental = job.params.get("incremental", True)
+            return {
+                conn.id: {"job_id": queue.enqueue("discover", conn.id, incremental=incremental).id}
+                for conn in connections
+            }
+        return run_fleet_discovery(
+            db, connections,
+            incremental=job.params.get("incremental", True),
+            progress=report,
+        )
+    finally:
+        db.close()
+
+
+def run_checks(job, report):
+    """
+    Job handler: runs monitoring checks for every dataset of a connection.
+
+    Args:
+        job (Job): The running job.
+        report (callable): Progress callback (processed, total, **timings).
+
+    Returns:
+        dict: Status of the monitoring run.
+    """
+    db = SessionLocal()
+    try:
+        conn = _load_connection(db, job.connection_id)
+
+        started = time.perf_counter()
+        result = run_checks_for_connection(db, conn, progress=report)
+        report(result["datasets_checked"], result["datasets_checked"],
+               checks=round(time.perf_counter() - started, 3))
+        return result
+    finally:
+        db.close()
+
+
+def profile(job, report):
+    """
+    Job handler: profiles the columns of a connection's datasets from pg_stats.
+
+    Args:
+        job (Job): The running job.
+        report (callable): Progress callback (processed, total, **timings).
+
+    Returns:
+        dict: Summary from run_profiling.
+    """
+    db = SessionLocal()
+    try:
+        conn = _load_connection(db, job.connection_id)
+
+        started = time.perf_counter()
+        result = run_profiling(db, conn, progress=report)
+        report(result["tables_profiled"], None, profiling=round(time.perf_counter() - started, 3))
+        return result
+    finally:
+        db.close()
+
+
+def row_checks(job, report):
+    """
+    Job handler: runs the sampled row-level checks of a connection's datasets.
+
+    Args:
+        job (Job): The running job.
+        report (callable): Progress callback (processed, total, **timings).
+
+    Returns:
+        dict: Summary from run_row_checks_for_connection.
+    """
+    db = SessionLocal()
+    try:
+        conn = _load_connection(db, job.connection_id)
+
+        started = time.perf_counter()
+        result = run_row_checks_for_connection(db, conn, progress=report)
+        report(result["checks_run"], result["checks_run"], row_checks=round(time.perf_counter() - started, 3))
+        return result
+    finally:
+        db.close()
+
+
+def compact_snapshots(job, report):
+    """
+    Job handler: deletes snapshots past retention and re-encodes the rest of a
+    connection's snapshot history (see services.snapshot_store.compact_snapshots).
+
+    Job params:
+        retention_days (int): Override SNAPSHOT_RETENTION_DAYS.
+
+    Args:
+        job (Job): The running job.
+        report (callable): Progress callback (processed, total, **timings).
+
+    Returns:
+        dict: Number of snapshots deleted and rewritten.
+    """
+    db = SessionLocal()
+    try:
+        _load_connection(db, job.connection_id)
+
+        started = time.perf_counter()
+        kwargs = {}
+        if job.params.get("retention_days") is not None:
+            kwargs["retention_days"] = job.params["retention_days"]
+        result = compact_snapshot_history(db, job.connection_id, **kwargs)
+        report(0, None, compaction=round(time.perf_counter() - started, 3))
+        return result
+    finally:
+        db.close()
+
+
+HANDLERS.update({
+    "discover": discover,
+    "discover_all": discover_all,
+    "run_checks": run_checks,
+    "profile": profile,
+    "row_checks": row_checks,
+    "compact_snapshots": compact_snapshots,
+})
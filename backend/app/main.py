@@ -1,16 +1,57 @@
 
-from app.api.routes import datasets, connections
-from fastapi import FastAPI
+import time
+
+from app.api.routes import datasets, connections, jobs, metrics
+from app.connectors.async_postgres_connector import get_registry as get_async_client_pools
+from app.connectors.pool import registry as client_pools
+from app.core.metrics import REQUEST_SECONDS
+from app.db.async_session import async_engine
+from app.jobs.queue import get_job_queue
+from fastapi import FastAPI, Request
 
 
 app = FastAPI(title="Veda API")
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep series bounded
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status,
+        )
+
 @app.get("/")
 def read_root():
     return {"message": "Veda backend is running"}
 
 app.include_router(datasets.router)
 app.include_router(connections.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
+
+@app.on_event("startup")
+def start_job_workers():
+    get_job_queue().start()
+
+@app.on_event("shutdown")
+def stop_background_work():
+    get_job_queue().stop()
+    client_pools.close_all()
+
+@app.on_event("shutdown")
+async def close_async_connections():
+    await get_async_client_pools().close_all()
+    await async_engine.dispose()
 
 import logging
 
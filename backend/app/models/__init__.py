@@ -2,3 +2,10 @@ from .models import Base, Dataset
 from .connection import Connection
 from .schema_snapshot import SchemaSnapshot
 from .incident import Incident
+from .catalog_watermark import CatalogWatermark
+from .table_activity import TableActivity
+from .schema_change_event import SchemaChangeEvent
+from .work_item import WorkItem
+from .column_stat import ColumnStat
+from .row_check import RowCheck
+from .schema_body import SchemaBody
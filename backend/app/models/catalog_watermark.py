@@ -0,0 +1,30 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, BigInteger, String, DateTime, func, JSON, ForeignKey
+from app.models.models import Base
+
+class CatalogWatermark(Base):
+    """
+    Catalog state of a connection as of its last discovery run, used by
+    incremental discovery to find the tables whose DDL changed since.
+
+    Attributes:
+        connection_id (int): The connection the watermark belongs to.
+        target (str): 'host:port/database' the markers were read from.
+        database_oid (int): pg_database oid of the client database.
+        relations (dict): Mapping of 'schema.table' to its catalog change marker.
+        full_scan_at (datetime): When the last full catalog scan ran.
+        updated_at (datetime): When the watermark was last advanced.
+    """
+    __tablename__ = "catalog_watermarks"
+
+    connection_id: Mapped[int] = mapped_column(Integer, ForeignKey("connections.id"), primary_key=True)
+
+    target: Mapped[str] = mapped_column(String(1024))
+
+    database_oid: Mapped[int] = mapped_column(BigInteger)
+
+    relations: Mapped[dict] = mapped_column(JSON)
+
+    full_scan_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
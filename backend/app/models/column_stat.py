@@ -0,0 +1,39 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Float, DateTime, func, JSON, Index
+from app.models.models import Base
+
+class ColumnStat(Base):
+    """
+    A snapshot of a column's planner statistics (pg_stats), recorded by
+    profiling only when they moved beyond the configured tolerance.
+
+    Attributes:
+        id (int): Unique identifier for the snapshot.
+        dataset_id (int): The dataset the column belongs to.
+        column_name (str): The column.
+        null_frac (float): Fraction of NULL values.
+        n_distinct (float): Distinct values; negative values are a fraction of the row count.
+        most_common (list): Top most common values as [value, frequency] pairs.
+        histogram_bounds (list): A sample of the histogram bounds, lowest first.
+        created_at (datetime): When the statistics were read.
+    """
+    __tablename__ = "column_stats"
+    __table_args__ = (
+        Index("ix_column_stats_dataset_column_created", "dataset_id", "column_name", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+
+    dataset_id: Mapped[int] = mapped_column(Integer)
+
+    column_name: Mapped[str] = mapped_column(String(255))
+
+    null_frac: Mapped[float] = mapped_column(Float)
+
+    n_distinct: Mapped[float] = mapped_column(Float)
+
+    most_common: Mapped[list] = mapped_column(JSON, nullable=True)
+
+    histogram_bounds: Mapped[list] = mapped_column(JSON, nullable=True)
+
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, DateTime, func, JSON, ForeignKey
-from app.models.models import Base
+from sqlalchemy import Integer, String, DateTime, func, JSON, ForeignKey, Index
+from app.core.config import PARTITION_METADATA_TABLES
+from app.models.models import Base, partitioned_by_created_at
 
 class Incident(Base):
     """
@@ -9,22 +10,35 @@ class Incident(Base):
     Attributes:
         id (int): Unique identifier for the incident.
         connection_id (int): ID of the affected connection.
+        dataset_id (int): ID of the affected dataset.
         dataset_name (str): Name of the affected dataset.
         rule_type (str): The type of rule that failed (e.g., 'SCHEMA_DRIFT', 'FRESHNESS').
         severity (str): Severity level of the incident ('LOW', 'MEDIUM', 'HIGH').
         details (dict): JSON details about the incident (e.g., schema diff).
         created_at (datetime): Timestamp when the incident was created.
         status (str): Current status of the incident ('open', 'resolved').
+        resolved_at (datetime): Timestamp when the incident was resolved.
+        occurrence_count (int): Check runs that have observed the failure.
+        last_seen_at (datetime): When the failure was last observed.
+        passing_streak (int): Consecutive passing checks while open (see services.incidents).
     """
     __tablename__ = "incidents"
+    __table_args__ = (
+        # Keyset pagination of a connection's incidents, newest first,
+        # optionally narrowed by status or dataset
+        Index("ix_incidents_connection_created", "connection_id", "created_at", "id"),
+        Index("ix_incidents_connection_status_created", "connection_id", "status", "created_at", "id"),
+        Index("ix_incidents_connection_dataset_created", "connection_id", "dataset_id", "created_at", "id"),
+        partitioned_by_created_at(),
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
 
     connection_id: Mapped[int] = mapped_column(Integer, index=True)
     
     dataset_name: Mapped[str] = mapped_column(String(255), index=True)
     
-    # dataset_id: Mapped[int] = mapped_column(Integer,index=True)
+    dataset_id: Mapped[int] = mapped_column(Integer, index=True, nullable=True)
     
     rule_type: Mapped[str] = mapped_column(String(100))  # SCHEMA_DRIFT, FRESHNESS
    
@@ -32,8 +46,16 @@ class Incident(Base):
 
     details: Mapped[dict] = mapped_column(JSON)
     
-    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), primary_key=PARTITION_METADATA_TABLES
+    )
 
     status: Mapped[str] = mapped_column(String, default="open")  # open | resolved
     # started_at: Mapped[str]= mapped_column(DateTime(timezone=True), server_default=func.now())
-    # resolved_at:Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+    resolved_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    occurrence_count: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+
+    last_seen_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    passing_streak: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime, func, ForeignKey
+from sqlalchemy import String, Integer, Float, DateTime, func, ForeignKey, JSON
+from app.core.config import PARTITION_METADATA_TABLES
 
 class Base(DeclarativeBase):
     """
@@ -7,6 +8,18 @@ class Base(DeclarativeBase):
     """
     pass
 
+def partitioned_by_created_at() -> dict:
+    """
+    Table options range-partitioning a table by created_at on PostgreSQL,
+    when PARTITION_METADATA_TABLES is on (see app.db.partitions).
+
+    A partitioned table's primary key must include created_at, so such
+    tables declare it as part of the key under the same setting.
+    """
+    if not PARTITION_METADATA_TABLES:
+        return {}
+    return {"postgresql_partition_by": "RANGE (created_at)"}
+
 class Dataset(Base):
     """
     Represents a dataset (table) discovered from a connection.
@@ -16,6 +29,14 @@ class Dataset(Base):
         connection_id (int): Foreign key referencing the Connection this dataset belongs to.
         name (str): The full name of the dataset (e.g., 'schema.table').
         created_at (datetime): Timestamp when the dataset was first registered.
+        freshness_threshold_hours (float): Hours without writes before the dataset is
+            stale; NULL uses FRESHNESS_THRESHOLD_HOURS.
+        partition_info (dict): For a partitioned table, its strategy, key, partition
+            count, oldest/newest partition and bound, default partition and the
+            partitions whose columns no longer match it; NULL otherwise.
+        retired_at (datetime): When discovery found the table to be a partition
+            of a partitioned table, which is monitored as a whole under its root
+            instead; NULL for live datasets.
     """
     __tablename__ = "datasets"
 
@@ -25,4 +46,10 @@ class Dataset(Base):
     
     name: Mapped[str] = mapped_column(String(255),index=True)
     
-    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    freshness_threshold_hours: Mapped[float] = mapped_column(Float, nullable=True)
+
+    partition_info: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+    retired_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
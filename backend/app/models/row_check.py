@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, Float, Boolean, DateTime, func, JSON, ForeignKey
+from app.models.models import Base
+
+class RowCheck(Base):
+    """
+    A row-level data quality check on a dataset, evaluated on a table sample.
+
+    Attributes:
+        id (int): Unique identifier for the check.
+        dataset_id (int): The dataset the check runs on.
+        check_type (str): 'null_rate', 'duplicate_keys' or 'value_range'.
+        columns (list): Column(s) checked (the key columns for duplicate_keys).
+        params (dict): Thresholds: max_null_rate; max_duplicate_rows; min, max and max_violation_rate.
+        sample_method (str): 'SYSTEM' or 'BERNOULLI'; NULL uses ROW_CHECK_SAMPLE_METHOD.
+        sample_percent (float): Sample size in percent; NULL uses ROW_CHECK_SAMPLE_PERCENT.
+        row_budget (int): Maximum rows read; NULL uses ROW_CHECK_ROW_BUDGET.
+        timeout_seconds (float): Maximum run time; NULL uses ROW_CHECK_TIMEOUT_SECONDS.
+        enabled (bool): Whether check runs evaluate it.
+        last_result (dict): Outcome of the latest run.
+        last_run_at (datetime): When it last ran.
+        created_at (datetime): When the check was created.
+    """
+    __tablename__ = "row_checks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+
+    dataset_id: Mapped[int] = mapped_column(Integer, ForeignKey("datasets.id"), index=True)
+
+    check_type: Mapped[str] = mapped_column(String(50))
+
+    columns: Mapped[list] = mapped_column(JSON)
+
+    params: Mapped[dict] = mapped_column(JSON, default=dict)
+
+    sample_method: Mapped[str] = mapped_column(String(16), nullable=True)
+
+    sample_percent: Mapped[float] = mapped_column(Float, nullable=True)
+
+    row_budget: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    timeout_seconds: Mapped[float] = mapped_column(Float, nullable=True)
+
+    enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    last_result: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+    last_run_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,27 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, DateTime, func, JSON
+from app.models.models import Base
+
+class SchemaBody(Base):
+    """
+    A column list shared by every snapshot with the same content.
+
+    Full snapshots reference their body instead of carrying their own copy of
+    the columns (see services.snapshot_store.intern_bodies), so identical
+    tables, e.g. one per tenant schema, store their schema once.
+
+    Attributes:
+        id (int): Unique identifier for the body.
+        body_hash (str): Content address: the columns' fingerprint (services.schema.schema_fingerprint).
+        columns_json (list): The columns, in table order.
+        created_at (datetime): When the body was first stored.
+    """
+    __tablename__ = "schema_bodies"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+
+    body_hash: Mapped[str] = mapped_column(String(64), unique=True, index=True)
+
+    columns_json: Mapped[list] = mapped_column(JSON)
+
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,38 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, DateTime, func, JSON, ForeignKey, Index
+from app.models.models import Base
+
+class SchemaChangeEvent(Base):
+    """
+    A single column-level change detected between two schema snapshots.
+
+    Attributes:
+        id (int): Unique identifier for the event.
+        dataset_id (int): The dataset whose schema changed.
+        snapshot_id (int): The snapshot that recorded the new schema.
+        change_type (str): 'added', 'removed', 'type_changed', 'nullability_changed', ...
+        column_name (str): The affected column.
+        old_value (dict): The column before the change (NULL for added columns).
+        new_value (dict): The column after the change (NULL for removed columns).
+        created_at (datetime): When the change was detected.
+    """
+    __tablename__ = "schema_change_events"
+    __table_args__ = (
+        Index("ix_schema_change_events_dataset_created", "dataset_id", "created_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    dataset_id: Mapped[int] = mapped_column(Integer, ForeignKey("datasets.id"))
+
+    snapshot_id: Mapped[int] = mapped_column(Integer)
+
+    change_type: Mapped[str] = mapped_column(String(50))
+
+    column_name: Mapped[str] = mapped_column(String(255))
+
+    old_value: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+    new_value: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,16 +1,51 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, DateTime, func, JSON, ForeignKey
-from app.models.models import Base
+from sqlalchemy import Integer, String, DateTime, func, JSON, ForeignKey, Index
+from app.core.config import PARTITION_METADATA_TABLES
+from app.models.models import Base, partitioned_by_created_at
 
 class SchemaSnapshot(Base):
     __tablename__ = "schema_snapshots"
+    __table_args__ = (
+        # latest snapshot / snapshot as of a point in time is a single index seek
+        Index("ix_schema_snapshots_dataset_created", "dataset_id", "created_at"),
+        partitioned_by_created_at(),
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
     
     dataset_id: Mapped[int] = mapped_column(Integer, ForeignKey("datasets.id"),index=True)
 
     dataset_name: Mapped[str] = mapped_column(String(255),index=True)
 
-    schema_json: Mapped[dict] = mapped_column(JSON)
+    # full schema; NULL for delta snapshots and for full ones stored as a
+    # shared body, see services.snapshot_store
+    schema_json: Mapped[dict] = mapped_column(JSON, nullable=True)
 
-    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # interned columns of a full snapshot (schema and table come from dataset_name)
+    body_id: Mapped[int] = mapped_column(Integer, ForeignKey("schema_bodies.id"), index=True, nullable=True)
+
+    # "full" (a checkpoint) or "delta" (changes against base_snapshot_id)
+    kind: Mapped[str] = mapped_column(String(10), default="full", server_default="full")
+
+    # checkpoint a delta snapshot applies to; plain integer, not a foreign key,
+    # so compaction can rewrite chains freely
+    base_snapshot_id: Mapped[int] = mapped_column(Integer, index=True, nullable=True)
+
+    delta_json: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+    # position in the checkpoint's chain: 0 for the checkpoint itself
+    checkpoint_seq: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    # sha256 of the canonical column list, see services.schema.schema_fingerprint
+    schema_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=True)
+
+    created_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), primary_key=PARTITION_METADATA_TABLES
+    )
+
+    # capture time of a snapshot moved out of an expired partition, whose
+    # created_at is then that partition's upper bound (see app.db.partitions)
+    original_created_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # first discovery run that found the schema unchanged (NULL until then)
+    last_seen_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, BigInteger, DateTime, ForeignKey
+from app.models.models import Base
+
+class TableActivity(Base):
+    """
+    Last observed pg_stat_user_tables write counters of a dataset.
+
+    Attributes:
+        dataset_id (int): The dataset the counters belong to.
+        connection_id (int): The connection of the dataset.
+        n_tup_ins / n_tup_upd / n_tup_del (int): Cumulative rows inserted, updated, deleted.
+        last_vacuum_at (datetime): Latest manual or automatic vacuum.
+        last_analyze_at (datetime): Latest manual or automatic analyze.
+        changed_at (datetime): When the counters were last seen to move, i.e. the data changed.
+        observed_at (datetime): When the counters were last read.
+    """
+    __tablename__ = "table_activity"
+
+    dataset_id: Mapped[int] = mapped_column(Integer, ForeignKey("datasets.id"), primary_key=True)
+
+    connection_id: Mapped[int] = mapped_column(Integer, index=True)
+
+    n_tup_ins: Mapped[int] = mapped_column(BigInteger)
+
+    n_tup_upd: Mapped[int] = mapped_column(BigInteger)
+
+    n_tup_del: Mapped[int] = mapped_column(BigInteger)
+
+    last_vacuum_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    last_analyze_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    changed_at: Mapped[str] = mapped_column(DateTime(timezone=True))
+
+    observed_at: Mapped[str] = mapped_column(DateTime(timezone=True))
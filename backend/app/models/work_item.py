@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, String, DateTime, Text, func, JSON, Index
+from app.models.models import Base
+
+class WorkItem(Base):
+    """
+    A background job stored in the metadata DB, claimed by `python -m app.worker`
+    processes (JOB_BACKEND=database).
+
+    Attributes:
+        id (str): The job ID.
+        kind (str): Handler name ('discover', 'run_checks', ...).
+        connection_id (int): The connection the job works on, if any.
+        host (str): Host of that connection's client database, for per-host concurrency caps.
+        params (dict): Handler options.
+        status (str): 'queued', 'running', 'succeeded' or 'failed'.
+        processed (int): Items processed so far.
+        total (int): Items to process, once known.
+        result (dict): Handler result on success.
+        error (str): Error message on failure.
+        timings (dict): Seconds spent per phase.
+        attempts (int): How many times the item has been claimed.
+        lease_owner (str): ID of the worker currently holding the item.
+        lease_expires_at (datetime): When another worker may reclaim a running item.
+        enqueued_at / started_at / finished_at (datetime): Lifecycle timestamps.
+    """
+    __tablename__ = "work_items"
+    __table_args__ = (
+        Index("ix_work_items_status_enqueued", "status", "enqueued_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+
+    kind: Mapped[str] = mapped_column(String(64))
+
+    connection_id: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+
+    host: Mapped[str] = mapped_column(String(255), nullable=True)
+
+    params: Mapped[dict] = mapped_column(JSON, default=dict)
+
+    status: Mapped[str] = mapped_column(String(16), default="queued")
+
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+
+    total: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    result: Mapped[dict] = mapped_column(JSON, nullable=True)
+
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+
+    timings: Mapped[dict] = mapped_column(JSON, default=dict)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+
+    lease_owner: Mapped[str] = mapped_column(String(128), nullable=True)
+
+    lease_expires_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    enqueued_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    started_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    finished_at: Mapped[str] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,65 @@
+from app.core.config import (
+    PROFILE_DISTINCT_SHIFT,
+    PROFILE_DISTINCT_TOLERANCE,
+    PROFILE_NULL_FRAC_TOLERANCE,
+    PROFILE_NULL_RATE_SPIKE,
+)
+
+
+def _relative_change(old: float, new: float) -> float:
+    scale = max(abs(old), abs(new))
+    return abs(new - old) / scale if scale else 0.0
+
+
+def _top_value(stats: dict):
+    most_common = stats.get("most_common") or []
+    return most_common[0][0] if most_common else None
+
+
+def stats_moved(old: dict, new: dict) -> bool:
+    """
+    Tells whether a column's statistics moved enough to be worth storing again.
+
+    Args:
+        old (dict): The stored stats ('null_frac', 'n_distinct', 'most_common', ...).
+        new (dict): The current stats.
+
+    Returns:
+        bool: True when beyond PROFILE_NULL_FRAC_TOLERANCE / PROFILE_DISTINCT_TOLERANCE
+        or the most common value changed.
+    """
+    if abs(new["null_frac"] - old["null_frac"]) > PROFILE_NULL_FRAC_TOLERANCE:
+        return True
+    if _relative_change(old["n_distinct"], new["n_distinct"]) > PROFILE_DISTINCT_TOLERANCE:
+        return True
+    return _top_value(old) != _top_value(new)
+
+
+def detect_distribution_shift(baseline: dict, current: dict) -> dict:
+    """
+    Detects distribution shifts of a table's columns against stored stats.
+
+    Args:
+        baseline (dict): Stored stats per column name.
+        current (dict): Current stats per column name.
+
+    Returns:
+        dict: Per shifted column, the shifted measures as {measure: [old, new]};
+        empty when nothing shifted. Columns without stored stats are skipped.
+    """
+    shifts = {}
+    for column, new in current.items():
+        old = baseline.get(column)
+        if old is None:
+            continue
+
+        shift = {}
+        if new["null_frac"] - old["null_frac"] >= PROFILE_NULL_RATE_SPIKE:
+            shift["null_frac"] = [old["null_frac"], new["null_frac"]]
+        # Absolute and row-relative (negative) distinct counts are not comparable
+        if (old["n_distinct"] > 0) == (new["n_distinct"] > 0) and \
+                _relative_change(old["n_distinct"], new["n_distinct"]) >= PROFILE_DISTINCT_SHIFT:
+            shift["n_distinct"] = [old["n_distinct"], new["n_distinct"]]
+        if shift:
+            shifts[column] = shift
+    return shifts
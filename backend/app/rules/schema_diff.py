@@ -0,0 +1,182 @@
+from bisect import bisect_left
+from itertools import repeat
+
+CHANGE_KINDS = ("added", "removed", "type_changed", "nullability_changed", "renamed", "reordered")
+
+
+def _moved_columns(old_positions: list, names: list) -> list:
+    """
+    Returns the names whose relative order changed.
+
+    old_positions[i] is the old position of names[i] (in new order). The
+    longest increasing subsequence of old positions is the largest set of
+    columns that kept their relative order; everything else moved.
+    O(n log n).
+    """
+    tails = []       # tails[k]: index into names ending the best run of length k + 1
+    tail_values = []
+    parents = [-1] * len(names)
+    for i, pos in enumerate(old_positions):
+        k = bisect_left(tail_values, pos)
+        if k > 0:
+            parents[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(pos)
+        else:
+            tails[k] = i
+            tail_values[k] = pos
+
+    in_order = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        in_order.add(i)
+        i = parents[i]
+    return [name for i, name in enumerate(names) if i not in in_order]
+
+
+def diff_columns(old_columns: list, new_columns: list) -> dict:
+    """
+    Compares two column lists in linear time (n log n for reorders).
+
+    Detects added and removed columns, type and nullability changes, probable
+    renames and reorders. A removed and an added column are reported as a
+    rename when they have the same type and nullability and either sit at
+    the same position, or are the only removed/added pair with that
+    type and nullability.
+
+    Args:
+        old_columns (list): Previous columns ({'name', 'type', 'nullable'} dicts, in table order).
+        new_columns (list): Current columns, same shape.
+
+    Returns:
+        dict: Lists of column names under 'added', 'removed', 'type_changed',
+        'nullability_changed' and 'reordered' (moved relative to the other
+        columns), and {'from', 'to'} pairs under 'renamed'.
+    """
+    old_index = {c["name"]: i for i, c in enumerate(old_columns)}
+    new_index = {c["name"]: i for i, c in enumerate(new_columns)}
+
+    type_changed = []
+    nullability_changed = []
+    added = []
+    for col in new_columns:
+        name = col["name"]
+        i = old_index.get(name)
+        if i is None:
+            added.append(name)
+            continue
+        old = old_columns[i]
+        if old["type"] != col["type"]:
+            type_changed.append(name)
+        if old["nullable"] != col["nullable"]:
+            nullability_changed.append(name)
+    removed = [c["name"] for c in old_columns if c["name"] not in new_index]
+
+    # ---- Renames ----
+    renamed = []
+    if added and removed:
+        matched = {}  # added name -> removed name
+        by_position = {old_index[name]: name for name in removed}
+        for name in added:
+            candidate = by_position.get(new_index[name])
+            if candidate is not None:
+                old, new = old_columns[old_index[candidate]], new_columns[new_index[name]]
+                if old["type"] == new["type"] and old["nullable"] == new["nullable"]:
+                    matched[name] = candidate
+
+        taken = set(matched.values())
+        removed_by_sig = {}
+        for name in removed:
+            if name not in taken:
+                col = old_columns[old_index[name]]
+                removed_by_sig.setdefault((col["type"], col["nullable"]), []).append(name)
+        added_by_sig = {}
+        for name in added:
+            if name not in matched:
+                col = new_columns[new_index[name]]
+                added_by_sig.setdefault((col["type"], col["nullable"]), []).append(name)
+        for sig, names in added_by_sig.items():
+            candidates = removed_by_sig.get(sig)
+            if len(names) == 1 and candidates and len(candidates) == 1:
+                matched[names[0]] = candidates[0]
+
+        if matched:
+            renamed = [{"from": matched[name], "to": name} for name in added if name in matched]
+            taken = set(matched.values())
+            added = [name for name in added if name not in matched]
+            removed = [name for name in removed if name not in taken]
+
+    # ---- Reorders (renamed columns count as the same column) ----
+    previous_name = {pair["to"]: pair["from"] for pair in renamed}
+    common = []
+    old_positions = []
+    for col in new_columns:
+        name = col["name"]
+        i = old_index.get(previous_name.get(name, name))
+        if i is not None:
+            common.append(name)
+            old_positions.append(i)
+    reordered = _moved_columns(old_positions, common)
+
+    return {
+        "added": added,
+        "removed": removed,
+        "type_changed": type_changed,
+        "nullability_changed": nullability_changed,
+        "renamed": renamed,
+        "reordered": reordered,
+    }
+
+
+def has_changes(diff: dict) -> bool:
+    """Returns True if a diff from diff_columns/diff_schema reports any change."""
+    return any(diff[kind] for kind in CHANGE_KINDS)
+
+
+def diff_schema(old: dict, new: dict) -> dict:
+    """
+    Compares the columns of two schema dictionaries (schema_json shape).
+
+    Args:
+        old (dict): The previous schema ({'schema', 'table', 'columns': [...]}).
+        new (dict): The current schema.
+
+    Returns:
+        dict: See diff_columns.
+    """
+    return diff_columns(old["columns"], new["columns"])
+
+
+def diff_schemas_batch(pairs, keys=None) -> list:
+    """
+    Diffs many (old, new) schema pairs in one call.
+
+    Pairs whose column lists are equal skip the diff entirely. With keys,
+    e.g. the (old, new) schema fingerprints, each distinct key is diffed only
+    once and pairs with the same key share its result, so tables with
+    identical layouts that changed identically cost a single diff.
+
+    Args:
+        pairs (iterable): (old schema, new schema) tuples.
+        keys (iterable, optional): One hashable content key per pair.
+
+    Returns:
+        list: One diff per pair, in order; pairs sharing a key share the
+        same dict, which must not be modified.
+    """
+    results = []
+    seen = {}
+    for (old, new), key in zip(pairs, repeat(None) if keys is None else keys):
+        if key is not None and key in seen:
+            results.append(seen[key])
+            continue
+        old_columns, new_columns = old["columns"], new["columns"]
+        if old_columns == new_columns:
+            diff = {kind: [] for kind in CHANGE_KINDS}
+        else:
+            diff = diff_columns(old_columns, new_columns)
+        if key is not None:
+            seen[key] = diff
+        results.append(diff)
+    return results
@@ -0,0 +1,32 @@
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class IncidentSummary(BaseModel):
+    """
+    An incident as returned by list endpoints; details are only included on request.
+    """
+    id: int
+    dataset_id: Optional[int] = None
+    dataset_name: str
+    rule_type: str
+    severity: str
+    status: str
+    created_at: datetime.datetime
+    resolved_at: Optional[datetime.datetime] = None
+    occurrence_count: int = 1
+    last_seen_at: Optional[datetime.datetime] = None
+    details: Optional[dict] = None
+
+
+class IncidentPage(BaseModel):
+    """
+    One page of incidents, newest first.
+
+    next_cursor is passed back as ?cursor= to fetch the following page; it is
+    null on the last page.
+    """
+    items: list[IncidentSummary]
+    next_cursor: Optional[str] = None
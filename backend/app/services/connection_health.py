@@ -0,0 +1,44 @@
+from app.connectors.governor import governors
+from app.core.cache import connection_scope, invalidate
+from app.services.incidents import IncidentTracker
+
+RULE_TYPE = "CONNECTION_HEALTH"
+
+
+def health_target(conn) -> str:
+    """The dataset_name CONNECTION_HEALTH incidents of a connection are recorded under."""
+    return f"{conn.host}:{conn.port}/{conn.database}"
+
+
+def health_details(conn, exc: BaseException) -> dict:
+    governor = governors.get(conn)
+    return {
+        "error": f"{type(exc).__name__}: {exc}".strip(),
+        "host": governor.key,
+        "circuit": governor.state(),
+        "consecutive_failures": governor.failures,
+    }
+
+
+def record_connection_failure(db, conn, exc: BaseException) -> int:
+    """
+    Opens (or re-observes) a connection's CONNECTION_HEALTH incident and commits it.
+
+    Passing runs count towards resolving the incident where the connection's
+    catalog is persisted (see services.discovery.persist_discovery).
+
+    Args:
+        db: The database session.
+        conn (Connection): The connection that could not be reached.
+        exc (BaseException): The host error (see connectors.governor.is_host_error).
+
+    Returns:
+        int: Number of incidents written.
+    """
+    incidents = IncidentTracker(db, conn.id, (RULE_TYPE,))
+    incidents.fail(None, health_target(conn), RULE_TYPE, "HIGH", health_details(conn, exc))
+    written = incidents.flush()
+    db.commit()
+
+    invalidate(connection_scope(conn.id, "incidents"))
+    return written
@@ -0,0 +1,565 @@
+import asyncio
+import datetime
+import time
+
+from sqlalchemy import func, insert, select, update
+
+from app.connectors.governor import is_host_error
+from app.connectors.postgres_connector import fetch_catalog_markers, introspect_tables
+from app.core.cache import DATASETS_SCOPE, connection_scope, invalidate
+from app.core.config import DISCOVERY_CONCURRENCY, INCREMENTAL_FULL_SCAN_HOURS
+from app.core.metrics import time_phase
+from app.models import CatalogWatermark, Dataset, Incident, SchemaChangeEvent, SchemaSnapshot
+from app.services.connection_health import (
+    RULE_TYPE as CONNECTION_HEALTH,
+    health_target,
+    record_connection_failure,
+)
+from app.services.incidents import IncidentTracker
+from app.services.schema import get_latest_snapshots, schema_fingerprint, snapshot_fingerprint
+from app.rules.schema_diff import diff_schemas_batch, has_changes
+from app.services.schema_history import column_change_events
+from app.services.snapshot_store import SchemaResolver, encode_snapshot, intern_bodies
+
+
+def _watermark_target(conn) -> str:
+    return f"{conn.host}:{conn.port}/{conn.database}"
+
+
+def _watermark_is_valid(watermark, conn, database_oid: int, now) -> bool:
+    """A watermark is only trusted for the same database and within the full-scan interval."""
+    if watermark is None or watermark.full_scan_at is None:
+        return False
+    if watermark.target != _watermark_target(conn) or watermark.database_oid != database_oid:
+        return False
+
+    full_scan_at = watermark.full_scan_at
+    if full_scan_at.tzinfo is None:
+        full_scan_at = full_scan_at.replace(tzinfo=datetime.timezone.utc)
+    return now - full_scan_at < datetime.timedelta(hours=INCREMENTAL_FULL_SCAN_HOURS)
+
+
+def _plan_scan(markers: dict, watermark, conn, database_oid: int, incremental: bool, now) -> dict:
+    """
+    Decides between a full and an incremental scan from the catalog markers.
+
+    Returns:
+        dict: full_scan, and for incremental scans the oids of the tables to
+        introspect (changed_oids) and the names of unchanged and dropped tables.
+    """
+    if not incremental or not _watermark_is_valid(watermark, conn, database_oid, now):
+        return {"full_scan": True, "changed_oids": None, "unchanged": [], "dropped": []}
+
+    previous = watermark.relations
+    return {
+        "full_scan": False,
+        "changed_oids": [
+            oid for full_name, (oid, marker) in markers.items()
+            if previous.get(full_name) != marker
+        ],
+        "unchanged": [
+            full_name for full_name, (_, marker) in markers.items()
+            if previous.get(full_name) == marker
+        ],
+        "dropped": [full_name for full_name in previous if full_name not in markers],
+    }
+
+
+def _apply_scan(db, conn, watermark, fetched: dict, now, progress=None) -> dict:
+    """Advances the watermark and persists a fetched catalog (see run_discovery)."""
+    catalog = fetched["catalog"]
+    markers = fetched["markers"]
+    plan = fetched["plan"]
+
+    # A full scan reads every table, so any live dataset it did not find is gone
+    dropped = plan["dropped"]
+    if plan["full_scan"]:
+        dropped = [
+            full_name
+            for full_name in db.scalars(
+                select(Dataset.name)
+                .where(Dataset.connection_id == conn.id, Dataset.retired_at.is_(None))
+            )
+            if full_name not in catalog
+        ]
+
+    # Advanced in the same transaction as the snapshots it vouches for
+    if watermark is None:
+        watermark = CatalogWatermark(connection_id=conn.id)
+        db.add(watermark)
+    watermark.target = _watermark_target(conn)
+    watermark.database_oid = fetched["database_oid"]
+    watermark.relations = {full_name: marker for full_name, (_, marker) in markers.items()}
+    if plan["full_scan"]:
+        watermark.full_scan_at = now
+
+    started = time.perf_counter()
+    result = persist_discovery(
+        db, conn, catalog, progress=progress, unchanged=plan["unchanged"], partitions=fetched["partitions"],
+        dropped=dropped,
+    )
+    if progress:
+        progress(len(catalog), len(catalog), persist=round(time.perf_counter() - started, 3))
+
+    result.update({
+        "mode": "full" if plan["full_scan"] else "incremental",
+        "tables_found": len(markers),
+        "tables_introspected": len(catalog),
+        "tables_dropped": len(dropped),
+    })
+    return result
+
+
+def run_discovery(db, conn, incremental: bool = True, progress=None) -> dict:
+    """
+    Discovers a connection's tables and records their schemas.
+
+    A partitioned table is discovered as a single dataset (its root), with
+    its partitions summarized in the dataset's partition_info.
+
+    In incremental mode, a cheap per-table change marker is read for every
+    table and compared with the connection's CatalogWatermark; only tables
+    that were added or altered since the last run are introspected and
+    compared. A full scan runs instead when incremental is off or the
+    watermark is missing, belongs to another database, or is older than
+    INCREMENTAL_FULL_SCAN_HOURS.
+
+    The datasets of tables that were dropped (missing from the watermark's
+    tables in incremental mode, from the catalog on a full scan) are retired
+    with their open incidents resolved (see persist_discovery).
+
+    If the client host cannot be reached (or its circuit breaker is open, see
+    connectors.governor), the connection's CONNECTION_HEALTH incident is
+    recorded before the error is raised.
+
+    Args:
+        db: The database session.
+        conn (Connection): The connection to discover.
+        incremental (bool): Allow an incremental run when the watermark is valid.
+        progress (callable, optional): Called with (processed, total, **timings).
+
+    Returns:
+        dict: Summary of the run (see persist_discovery), plus the mode used
+        and the number of tables introspected and dropped.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    started = time.perf_counter()
+    try:
+        with time_phase("catalog_fetch", conn.id):
+            database_oid, markers = fetch_catalog_markers(conn)
+            watermark = (
+                db.query(CatalogWatermark)
+                .filter(CatalogWatermark.connection_id == conn.id)
+                .first()
+            )
+            plan = _plan_scan(markers, watermark, conn, database_oid, incremental, now)
+            if plan["full_scan"]:
+                catalog, partitions = introspect_tables(conn)
+            elif plan["changed_oids"]:
+                catalog, partitions = introspect_tables(conn, plan["changed_oids"])
+            else:
+                catalog, partitions = {}, {}
+    except Exception as exc:
+        if is_host_error(exc):
+            db.rollback()
+            record_connection_failure(db, conn, exc)
+        raise
+
+    if progress:
+        progress(0, len(catalog), introspect=round(time.perf_counter() - started, 3))
+
+    fetched = {
+        "database_oid": database_oid, "markers": markers, "plan": plan,
+        "catalog": catalog, "partitions": partitions,
+    }
+    return _apply_scan(db, conn, watermark, fetched, now, progress=progress)
+
+
+async def _fetch_scan_async(conn, watermark, incremental: bool, now) -> dict:
+    from app.connectors.async_postgres_connector import fetch_catalog_markers_async, introspect_tables_async
+
+    with time_phase("catalog_fetch", conn.id):
+        database_oid, markers = await fetch_catalog_markers_async(conn)
+        plan = _plan_scan(markers, watermark, conn, database_oid, incremental, now)
+        if plan["full_scan"]:
+            catalog, partitions = await introspect_tables_async(conn)
+        elif plan["changed_oids"]:
+            catalog, partitions = await introspect_tables_async(conn, plan["changed_oids"])
+        else:
+            catalog, partitions = {}, {}
+    return {
+        "database_oid": database_oid, "markers": markers, "plan": plan,
+        "catalog": catalog, "partitions": partitions,
+    }
+
+
+async def _discover_fleet_async(targets: list, incremental: bool, concurrency: int, now, persist):
+    """
+    Fetches the targets' catalogs concurrently and hands each to persist as
+    soon as it is read.
+
+    persist runs on a worker thread, one call at a time, so the fetches still
+    in flight carry on meanwhile. A fetch slot is only released once its
+    catalog is persisted, so at most `concurrency` catalogs are held in memory.
+    """
+    from app.connectors.async_postgres_connector import get_registry
+
+    semaphore = asyncio.Semaphore(concurrency)
+    persist_lock = asyncio.Lock()
+
+    async def discover(conn, watermark):
+        async with semaphore:
+            try:
+                scan = await _fetch_scan_async(conn, watermark, incremental, now)
+            except Exception as exc:
+                scan = exc
+            async with persist_lock:
+                await asyncio.to_thread(persist, conn, watermark, scan)
+
+    try:
+        await asyncio.gather(*(discover(conn, watermark) for conn, watermark in targets))
+    finally:
+        await get_registry().close_all()
+
+
+def run_fleet_discovery(
+    db,
+    connections: list,
+    incremental: bool = True,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    progress=None,
+) -> dict:
+    """
+    Discovers the tables of many connections at once.
+
+    The catalogs of all connections are read concurrently over asyncpg (at
+    most `concurrency` client databases at a time), so the run takes about as
+    long as the slowest client database rather than the sum of all of them.
+    Each catalog is persisted as soon as it has been read, exactly as
+    run_discovery would, one connection (and transaction) at a time.
+
+    Every client host is read under its governor (see connectors.governor):
+    connect and statement timeouts bound how long a stalled host can hold the
+    run up, and a host whose circuit breaker is open fails immediately.
+    Connections whose host failed get a CONNECTION_HEALTH incident.
+
+    Args:
+        db: The database session.
+        connections (list): The Connections to discover.
+        incremental (bool): Allow incremental runs where the watermark is valid.
+        concurrency (int): Client databases read at the same time.
+        progress (callable, optional): Called with (processed, total) as
+            connections are persisted.
+
+    Returns:
+        dict: Per connection id, the run_discovery summary or an error message.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    watermarks = {
+        w.connection_id: w
+        for w in db.query(CatalogWatermark).filter(
+            CatalogWatermark.connection_id.in_([c.id for c in connections])
+        )
+    }
+    targets = [(conn, watermarks.get(conn.id)) for conn in connections]
+    results = {}
+
+    def persist(conn, watermark, scan):
+        if isinstance(scan, Exception):
+            results[conn.id] = {"error": f"{type(scan).__name__}: {scan}"}
+            if is_host_error(scan):
+                try:
+                    record_connection_failure(db, conn, scan)
+                except Exception:
+                    db.rollback()
+        else:
+            try:
+                results[conn.id] = _apply_scan(db, conn, watermark, scan, now)
+            except Exception as exc:
+                db.rollback()
+                results[conn.id] = {"error": f"{type(exc).__name__}: {exc}"}
+        if progress:
+            progress(len(results), len(connections))
+
+    asyncio.run(_discover_fleet_async(targets, incremental, concurrency, now, persist))
+    return {conn.id: results[conn.id] for conn in connections}
+
+
+def persist_discovery(db, conn, catalog: dict, progress=None, unchanged=(), partitions=None, dropped=()) -> dict:
+    """
+    Records the result of a catalog introspection for a connection.
+
+    Everything the comparison needs (datasets, latest snapshots, open
+    SCHEMA_DRIFT incidents) is loaded up front into dicts, so the number of
+    metadata-DB round trips does not depend on the number of tables. All
+    writes are batched and committed in a single transaction.
+
+    For each table:
+        a. Registers it as a Dataset if it doesn't exist.
+        b. Compares the schema's fingerprint with the latest stored snapshot.
+        c. Saves a new snapshot and diffs it only if the fingerprint changed
+           (stored as a shared schema body or as a delta, see
+           services.snapshot_store), recording its column-level changes as
+           SchemaChangeEvents.
+        d. Opens (or re-observes) the dataset's Schema Drift Incident if
+           changes are detected; otherwise counts towards resolving it (see
+           services.incidents.IncidentTracker).
+
+    The catalog having been read, the connection's CONNECTION_HEALTH
+    incident, if any, also counts this run towards its resolution.
+
+    Partitioned tables are diffed once, as their root. When partitions are
+    given, each introspected dataset's partition_info is refreshed, and a
+    PARTITION_MISMATCH incident is opened while any of its partitions' columns
+    no longer match the root's (resolved through the tracker otherwise).
+
+    Datasets of dropped tables, and the ones registered for the partitions
+    themselves (by discovery runs that listed partitions as tables), are
+    retired: marked with retired_at, which keeps them out of checks,
+    profiling and the dataset lists, and their open incidents resolved. A
+    retired dataset found as a table again is reinstated.
+
+    Args:
+        db: The database session.
+        conn (Connection): The connection that was introspected.
+        catalog (dict): Mapping of 'schema.table' to schema_json, as returned by introspect_tables.
+        progress (callable, optional): Called with (processed, total) as tables are compared.
+        unchanged (list, optional): Names of tables known to be unchanged without
+            being introspected (incremental discovery); their latest snapshot is
+            marked as confirmed and they count towards resolving SCHEMA_DRIFT.
+        partitions (dict, optional): Mapping of partitioned 'schema.table' to its
+            partition_info, as returned by introspect_tables; None leaves
+            partition_info as it is.
+        dropped (list, optional): Names of tables that no longer exist.
+
+    Returns:
+        dict: Summary of tables found, new datasets created, schemas changed,
+        partitioned tables and datasets retired.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    # Bulk loads
+    datasets = {
+        ds.name: ds
+        for ds in db.query(Dataset).filter(Dataset.connection_id == conn.id)
+    }
+
+    # The partitions' names only serve to retire their datasets; partition_info
+    # keeps the summary
+    partition_names = set()
+    if partitions is not None:
+        partitions = dict(partitions)
+        for full_name, info in partitions.items():
+            if "partition_names" in info:
+                info = partitions[full_name] = dict(info)
+                partition_names.update(info.pop("partition_names"))
+
+    gone = partition_names.union(dropped)
+    retired = [
+        dataset for full_name, dataset in datasets.items()
+        if full_name in gone and full_name not in catalog and dataset.retired_at is None
+    ]
+    for dataset in retired:
+        dataset.retired_at = now
+    reinstated = [
+        datasets[full_name] for full_name in (*catalog, *unchanged)
+        if full_name in datasets and datasets[full_name].retired_at is not None
+    ]
+    for dataset in reinstated:
+        dataset.retired_at = None
+
+    new_datasets = [
+        Dataset(
+            name=full_name,
+            connection_id=conn.id,
+            partition_info=partitions.get(full_name) if partitions is not None else None,
+        )
+        for full_name in catalog
+        if full_name not in datasets
+    ]
+    if new_datasets:
+        db.add_all(new_datasets)
+        db.flush()  # one batched INSERT ... RETURNING for the new ids
+        datasets.update((ds.name, ds) for ds in new_datasets)
+
+    # An incremental run only compares the few tables it introspected
+    latest_snapshots = get_latest_snapshots(
+        db, conn.id,
+        dataset_ids=[datasets[full_name].id for full_name in catalog] if unchanged else None,
+    )
+
+    incidents = IncidentTracker(db, conn.id, ("SCHEMA_DRIFT", "PARTITION_MISMATCH", CONNECTION_HEALTH), now=now)
+    incidents.ok(health_target(conn), CONNECTION_HEALTH)
+
+    # Partition summaries: written only where they changed (the ORM batches
+    # the UPDATEs), checked against the root once per partitioned table
+    partition_info_changed = 0
+    if partitions is not None:
+        for full_name in catalog:
+            dataset = datasets[full_name]
+            info = partitions.get(full_name)
+            if dataset.partition_info != info:
+                dataset.partition_info = info
+                partition_info_changed += 1
+            if info and info["mismatched_count"]:
+                incidents.fail(dataset.id, dataset.name, "PARTITION_MISMATCH", "MEDIUM", {
+                    "mismatched_count": info["mismatched_count"],
+                    "partitions": info["mismatched_partitions"],
+                })
+            else:
+                incidents.ok(dataset.name, "PARTITION_MISMATCH")
+
+    # Tables skipped as unchanged by an incremental run pass the drift check too
+    for full_name in unchanged:
+        if full_name in datasets:
+            incidents.ok(full_name, "SCHEMA_DRIFT")
+
+    # Rows stored before schema_hash existed are fingerprinted from their
+    # schema; load what reconstructing it needs in one go
+    resolver = SchemaResolver(db)
+    resolver.load([
+        latest
+        for full_name in catalog
+        for latest in latest_snapshots.get(datasets[full_name].id, [])[:1]
+        if latest.schema_hash is None
+    ])
+
+    # In-memory comparison: fingerprints first, then diff only what changed
+    new_snapshots = []
+    seen_snapshot_ids = []
+    changed = []
+    change_events = []
+
+    with time_phase("diff", conn.id):
+        for full_name, current_schema in catalog.items():
+            dataset = datasets[full_name]
+            latest = latest_snapshots.get(dataset.id, [None])[0]
+            current_hash = schema_fingerprint(current_schema)
+
+            if latest and snapshot_fingerprint(latest, resolver) == current_hash:
+                # Unchanged: no new snapshot, no diff; note the first confirmation
+                if latest.last_seen_at is None:
+                    seen_snapshot_ids.append(latest.id)
+                incidents.ok(dataset.name, "SCHEMA_DRIFT")
+            else:
+                changed.append((dataset, current_schema, current_hash, latest))
+
+        # Delta snapshots need their checkpoints to be diffed against; fetch them in one go
+        resolver.load([latest for _, _, _, latest in changed if latest])
+
+        # Tables sharing a layout (one per tenant, per date shard...) tend to
+        # change the same way: each distinct (previous, current) content pair
+        # is diffed, and turned into change events, only once
+        previous_schemas = [resolver.schema(latest) if latest else None for _, _, _, latest in changed]
+        compared = [
+            (previous_schema, current_schema, (snapshot_fingerprint(latest, resolver), current_hash))
+            for previous_schema, (_, current_schema, current_hash, latest) in zip(previous_schemas, changed)
+            if latest
+        ]
+        diffs = iter(diff_schemas_batch(
+            [(previous_schema, current_schema) for previous_schema, current_schema, _ in compared],
+            keys=[key for _, _, key in compared],
+        ))
+        events_by_pair = {}
+
+        for processed, (dataset, current_schema, current_hash, latest) in enumerate(changed, 1):
+            if latest:
+                previous_schema = previous_schemas[processed - 1]
+                diff = next(diffs)
+                checkpoint = resolver.checkpoint_schema(latest)
+                key = (snapshot_fingerprint(latest, resolver), current_hash)
+                if key not in events_by_pair:
+                    events_by_pair[key] = column_change_events(previous_schema, current_schema, diff)
+                # Indexed by position in new_snapshots until the snapshot ids exist
+                change_events.append((len(new_snapshots), events_by_pair[key]))
+            else:
+                diff = None
+                checkpoint = None
+
+            new_snapshots.append({
+                "dataset_id": dataset.id,
+                "dataset_name": dataset.name,
+                "schema_hash": current_hash,
+                **encode_snapshot(current_schema, latest, checkpoint),
+            })
+
+            if diff and has_changes(diff):
+                incidents.fail(dataset.id, dataset.name, "SCHEMA_DRIFT", "HIGH", diff)
+            else:
+                incidents.ok(dataset.name, "SCHEMA_DRIFT")
+
+            if progress:
+                progress(len(catalog) - len(changed) + processed, len(catalog))
+
+    # Batched writes
+    with time_phase("snapshot_persist", conn.id):
+        intern_bodies(db, new_snapshots)
+        if seen_snapshot_ids:
+            db.execute(
+                update(SchemaSnapshot)
+                .where(SchemaSnapshot.id.in_(seen_snapshot_ids))
+                .values(last_seen_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        unchanged_ids = [datasets[full_name].id for full_name in unchanged if full_name in datasets]
+        if unchanged_ids:
+            latest_ids = (
+                select(func.max(SchemaSnapshot.id))
+                .where(SchemaSnapshot.dataset_id.in_(unchanged_ids))
+                .group_by(SchemaSnapshot.dataset_id)
+            )
+            db.execute(
+                update(SchemaSnapshot)
+                .where(SchemaSnapshot.id.in_(latest_ids))
+                .where(SchemaSnapshot.last_seen_at.is_(None))
+                .values(last_seen_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        if new_snapshots:
+            snapshot_ids = db.scalars(
+                insert(SchemaSnapshot).returning(SchemaSnapshot.id, sort_by_parameter_order=True),
+                new_snapshots,
+            ).all()
+            event_rows = [
+                {
+                    **event,
+                    "dataset_id": new_snapshots[index]["dataset_id"],
+                    "snapshot_id": snapshot_ids[index],
+                }
+                for index, events in change_events
+                for event in events
+            ]
+            if event_rows:
+                db.execute(insert(SchemaChangeEvent), event_rows)
+
+    with time_phase("incident_persist", conn.id):
+        incidents_written = incidents.flush()
+        if retired:
+            incidents_written += db.execute(
+                update(Incident)
+                .where(Incident.dataset_id.in_([dataset.id for dataset in retired]))
+                .where(Incident.status == "open")
+                .values(status="resolved", resolved_at=now, passing_streak=0)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+    db.commit()
+
+    # Only the list responses this run actually changed
+    stale_scopes = []
+    if new_datasets or retired or reinstated:
+        stale_scopes += [DATASETS_SCOPE, connection_scope(conn.id, "datasets")]
+    elif partition_info_changed:
+        stale_scopes.append(connection_scope(conn.id, "datasets"))
+    if incidents_written:
+        stale_scopes.append(connection_scope(conn.id, "incidents"))
+    invalidate(*stale_scopes)
+
+    return {
+        "tables_found": len(catalog),
+        "new_datasets_created": len(new_datasets),
+        "schemas_changed": len(new_snapshots),
+        "partitioned_tables": sum(1 for full_name in catalog if partitions and full_name in partitions),
+        "datasets_retired": len(retired),
+    }
@@ -0,0 +1,89 @@
+import datetime
+
+from sqlalchemy import insert
+
+from app.connectors.postgres_connector import fetch_table_activity
+from app.core.config import FRESHNESS_THRESHOLD_HOURS
+from app.core.metrics import time_phase
+from app.models import Dataset, TableActivity
+from app.rules.freshness import is_stale
+
+COUNTERS = ("n_tup_ins", "n_tup_upd", "n_tup_del")
+
+
+def evaluate_freshness(db, conn, datasets=None) -> dict:
+    """
+    Determines which datasets of a connection have stopped receiving writes.
+
+    Reads pg_stat_user_tables once for the whole connection and compares each
+    table's insert/update/delete counters with the ones stored by the previous
+    run. When they moved, the table's changed_at becomes now; a table is stale
+    when changed_at is older than its dataset's freshness threshold.
+
+    Counters that went backwards (stats reset, server restart without stats)
+    only re-baseline the table; they do not count as a change. Tables seen
+    for the first time start out as changed now.
+
+    The updated counters are added to the session; the caller commits.
+
+    Args:
+        db: The database session.
+        conn (Connection): The connection to evaluate.
+        datasets (list, optional): The connection's datasets, if already loaded.
+
+    Returns:
+        dict: Mapping of dataset ID to {'stale', 'changed_at', 'threshold_hours'}.
+            Datasets missing from pg_stat_user_tables are left out.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    with time_phase("catalog_fetch", conn.id):
+        activity = fetch_table_activity(conn)
+
+    if datasets is None:
+        datasets = db.query(Dataset).filter(Dataset.connection_id == conn.id, Dataset.retired_at.is_(None)).all()
+    stored = {
+        row.dataset_id: row
+        for row in db.query(TableActivity).filter(TableActivity.connection_id == conn.id)
+    }
+
+    new_rows = []
+    results = {}
+
+    for ds in datasets:
+        stats = activity.get(ds.name)
+        if stats is None:
+            continue
+
+        row = stored.get(ds.id)
+        if row is None:
+            changed_at = now
+            new_rows.append({
+                "dataset_id": ds.id,
+                "connection_id": conn.id,
+                **stats,
+                "changed_at": now,
+                "observed_at": now,
+            })
+        else:
+            old = [getattr(row, name) for name in COUNTERS]
+            new = [stats[name] for name in COUNTERS]
+            if new != old and all(n >= o for n, o in zip(new, old)):
+                row.changed_at = now
+            for name, value in stats.items():
+                setattr(row, name, value)
+            row.observed_at = now
+            changed_at = row.changed_at
+
+        threshold = ds.freshness_threshold_hours
+        if threshold is None:
+            threshold = FRESHNESS_THRESHOLD_HOURS
+        results[ds.id] = {
+            "stale": is_stale(changed_at, threshold_hours=threshold),
+            "changed_at": changed_at,
+            "threshold_hours": threshold,
+        }
+
+    if new_rows:
+        db.execute(insert(TableActivity), new_rows)
+
+    return results
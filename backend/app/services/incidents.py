@@ -1,8 +1,166 @@
+import datetime
+
+from sqlalchemy import insert, or_, select, update
+
+from app.core.config import INCIDENT_REOPEN_WINDOW_MINUTES, INCIDENT_RESOLVE_AFTER
 from app.models.incident import Incident
 
+# Incident state the tracker keeps per (dataset, rule) and writes back
+_STATE_COLUMNS = (
+    Incident.id,
+    Incident.created_at,
+    Incident.dataset_name,
+    Incident.rule_type,
+    Incident.status,
+    Incident.resolved_at,
+    Incident.occurrence_count,
+    Incident.passing_streak,
+)
+
+
 def get_open_incident(db, dataset_id, incident_type):
     return db.query(Incident).filter(
         Incident.dataset_id == dataset_id,
-        Incident.type == incident_type,
+        Incident.rule_type == incident_type,
         Incident.status == "open"
     ).first()
+
+
+class IncidentTracker:
+    """
+    Keeps one incident per (dataset, rule) of a connection across check runs.
+
+    The connection's open incidents, and the ones resolved within the reopen
+    window, are loaded once into an in-memory index. Rule outcomes are then
+    recorded with fail()/ok() without any queries, and flush() writes all
+    resulting inserts and updates in bulk.
+
+    - A failure on an open incident bumps its occurrence_count and last_seen_at
+      instead of inserting a new row.
+    - A failure shortly after the incident was resolved reopens it (flap
+      suppression); otherwise a new incident is opened.
+    - An open incident is only resolved after resolve_after consecutive passes.
+
+    Duplicate open incidents left by earlier versions are folded into the
+    oldest one (and resolved) when the index is loaded.
+    """
+
+    def __init__(
+        self,
+        db,
+        connection_id: int,
+        rule_types,
+        now=None,
+        resolve_after: int = INCIDENT_RESOLVE_AFTER,
+        reopen_window_minutes: float = INCIDENT_REOPEN_WINDOW_MINUTES,
+    ):
+        self.db = db
+        self.connection_id = connection_id
+        self.now = now or datetime.datetime.now(datetime.timezone.utc)
+        self.resolve_after = max(1, resolve_after)
+        reopen_after = self.now - datetime.timedelta(minutes=reopen_window_minutes)
+
+        rows = db.execute(
+            select(*_STATE_COLUMNS)
+            .where(Incident.connection_id == connection_id)
+            .where(Incident.rule_type.in_(list(rule_types)))
+            .where(or_(Incident.status == "open", Incident.resolved_at >= reopen_after))
+            .order_by(Incident.created_at, Incident.id)
+        ).mappings().all()
+
+        self._index = {}
+        self._new = []
+        self._changed = {}
+        for row in rows:
+            state = dict(row)
+            key = (state["dataset_name"], state["rule_type"])
+            current = self._index.get(key)
+            if current is None:
+                self._index[key] = state
+            elif current["status"] == "open" and state["status"] == "open":
+                current["occurrence_count"] = (current["occurrence_count"] or 1) + (state["occurrence_count"] or 1)
+                state.update(status="resolved", resolved_at=self.now)
+                self._changed[current["id"]] = current
+                self._changed[state["id"]] = state
+            elif state["status"] == "open" or (
+                current["status"] != "open" and state["resolved_at"] > current["resolved_at"]
+            ):
+                self._index[key] = state
+
+    def fail(self, dataset_id: int, dataset_name: str, rule_type: str, severity: str, details: dict):
+        """Records a failing check of a rule on a dataset."""
+        state = self._index.get((dataset_name, rule_type))
+        if state is None:
+            state = {
+                "connection_id": self.connection_id,
+                "dataset_id": dataset_id,
+                "dataset_name": dataset_name,
+                "rule_type": rule_type,
+                "status": "open",
+                "occurrence_count": 1,
+                "last_seen_at": self.now,
+                "passing_streak": 0,
+                "severity": severity,
+                "details": details,
+            }
+            self._index[(dataset_name, rule_type)] = state
+            self._new.append(state)
+            return
+
+        if "id" not in state:  # opened earlier in this run
+            state.update(occurrence_count=state["occurrence_count"] + 1, severity=severity, details=details)
+            return
+
+        state.update(
+            status="open",
+            resolved_at=None,
+            occurrence_count=(state["occurrence_count"] or 1) + 1,
+            last_seen_at=self.now,
+            passing_streak=0,
+            severity=severity,
+            details=details,
+        )
+        self._changed[state["id"]] = state
+
+    def ok(self, dataset_name: str, rule_type: str):
+        """Records a passing check of a rule on a dataset."""
+        state = self._index.get((dataset_name, rule_type))
+        if state is None or state["status"] != "open" or "id" not in state:
+            return
+
+        streak = (state["passing_streak"] or 0) + 1
+        if streak >= self.resolve_after:
+            state.update(status="resolved", resolved_at=self.now, passing_streak=0)
+        else:
+            state["passing_streak"] = streak
+        self._changed[state["id"]] = state
+
+    def flush(self) -> int:
+        """
+        Writes the recorded outcomes in bulk; the caller commits.
+
+        Returns:
+            int: Number of incidents inserted or updated.
+        """
+        if self._new:
+            self.db.execute(insert(Incident), self._new)
+
+        # Bulk UPDATE by primary key needs the same columns in every row, and
+        # created_at when it is part of the key (partitioned table)
+        identity = {"dataset_name", "rule_type"}
+        if "created_at" not in Incident.__table__.primary_key.columns:
+            identity.add("created_at")
+        by_columns = {}
+        for state in self._changed.values():
+            values = {
+                name: value for name, value in state.items()
+                if name not in identity
+            }
+            by_columns.setdefault(frozenset(values), []).append(values)
+        for rows in by_columns.values():
+            self.db.execute(update(Incident), rows)
+
+        written = len(self._new) + len(self._changed)
+        self._new = []
+        self._changed = {}
+        return written
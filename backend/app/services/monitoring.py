@@ -1,80 +1,122 @@
+import datetime
+
 from sqlalchemy.orm import Session
-from app.models import SchemaSnapshot, Incident
+from app.core.cache import connection_scope, invalidate
+from app.core.metrics import time_phase
+from app.models import Dataset
 from app.rules.schema_drift import detect_schema_drift
-from app.rules.freshness import is_stale
+from app.services.freshness import evaluate_freshness
+from app.services.incidents import IncidentTracker
+from app.services.schema import get_latest_snapshots, snapshot_fingerprint
+from app.rules.schema_diff import has_changes
+from app.services.snapshot_store import SchemaResolver
+
+# Datasets evaluated between progress reports
+PROGRESS_INTERVAL = 500
+
+def evaluate_dataset(dataset: Dataset, snapshots: list, resolver: SchemaResolver, freshness: dict = None) -> dict:
+    """
+    Evaluates the Schema Drift and Freshness rules for one dataset.
+
+    Pure function of already-loaded data.
+
+    Args:
+        dataset (Dataset): The dataset being checked.
+        snapshots (list): Its latest snapshots, newest first (at most two are used).
+        resolver (SchemaResolver): Resolver with the snapshots' checkpoints loaded.
+        freshness (dict, optional): Its evaluate_freshness result.
+
+    Returns:
+        dict: 'drift' (the drift dict, {} when the schema matches, or None when
+        there is not enough history to tell) and 'stale' (the freshness result
+        when stale, else None).
+    """
+    drift = None
+    if len(snapshots) >= 2:
+        latest, previous = snapshots[0], snapshots[1]
+        # Discovery only writes a snapshot when the schema changes, so once a later
+        # run has seen the latest snapshot unchanged the drift is no longer new.
+        if latest.last_seen_at is not None or (
+            snapshot_fingerprint(latest, resolver) == snapshot_fingerprint(previous, resolver)
+        ):
+            drift = {}
+        else:
+            drift = detect_schema_drift(resolver.schema(previous), resolver.schema(latest))
+            if not has_changes(drift):
+                drift = {}
+
+    stale = freshness if freshness and freshness["stale"] else None
+    return {"drift": drift, "stale": stale}
 
-def run_checks_for_dataset(
-    db: Session,
-    connection_id: int,
-    dataset_id: int
-):
+
+def run_checks_for_connection(db: Session, conn, progress=None) -> dict:
     """
-    Runs monitoring checks (Schema Drift and Freshness) for a specific dataset.
-    
+    Runs monitoring checks for all datasets of a connection and commits the results.
+
+    Everything the rules need is loaded up front: the connection's datasets,
+    the latest two snapshots of each (one ROW_NUMBER() query), its open
+    incidents (see services.incidents.IncidentTracker) and the freshness of
+    every table (one pg_stat_user_tables read, see
+    services.freshness.evaluate_freshness). Rules are then evaluated in memory
+    and the resulting incident upserts are written back in a single
+    transaction.
+
     Args:
         db (Session): Database session.
-        connection_id (int): ID of the connection the dataset belongs to.
-        dataset_id (int): ID or Name of the dataset (Note: Type hint says int but usage suggests str might be passed).
+        conn (Connection): The connection to check.
+        progress (callable, optional): Called with (processed, total) as datasets are evaluated.
+
+    Returns:
+        dict: Status of the monitoring run.
     """
-    snapshots = (
-        db.query(SchemaSnapshot)
-        .filter(SchemaSnapshot.dataset_id == dataset_id)
-        .order_by(SchemaSnapshot.created_at.desc())
-        .limit(2)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    datasets = (
+        db.query(Dataset)
+        .filter(Dataset.connection_id == conn.id, Dataset.retired_at.is_(None))
         .all()
     )
+    snapshots = get_latest_snapshots(db, conn.id, per_dataset=2)
+    incidents = IncidentTracker(db, conn.id, ("SCHEMA_DRIFT", "FRESHNESS"), now=now)
+    freshness = evaluate_freshness(db, conn, datasets)
 
-    if len(snapshots) < 2:
-        return
+    # Only unconfirmed snapshots get diffed; load the checkpoints they need up front
+    resolver = SchemaResolver(db)
+    resolver.load([
+        s for pair in snapshots.values() if pair[0].last_seen_at is None for s in pair
+    ])
 
-    latest, previous = snapshots[0], snapshots[1]
+    with time_phase("diff", conn.id):
+        for processed, ds in enumerate(datasets, 1):
+            findings = evaluate_dataset(ds, snapshots.get(ds.id, []), resolver, freshness.get(ds.id))
 
-    # ---- Schema Drift ----
-    drift = detect_schema_drift(previous.schema_json, latest.schema_json)
+            # ---- Schema Drift ----
+            drift = findings["drift"]
+            if drift:
+                incidents.fail(ds.id, ds.name, "SCHEMA_DRIFT", "HIGH", drift)
+            elif drift is not None:
+                incidents.ok(ds.name, "SCHEMA_DRIFT")
 
-    has_drift = (
-        drift["added_columns"]
-        or drift["removed_columns"]
-        or drift["type_changed"]
-    )
+            # ---- Freshness ----
+            stale = findings["stale"]
+            if stale:
+                incidents.fail(ds.id, ds.name, "FRESHNESS", "MEDIUM", {
+                    "message": "Dataset has not been updated recently",
+                    "last_changed_at": stale["changed_at"].isoformat(),
+                    "threshold_hours": stale["threshold_hours"],
+                })
+            elif ds.id in freshness:
+                incidents.ok(ds.name, "FRESHNESS")
 
-    existing = (
-        db.query(Incident)
-        .filter(
-            Incident.connection_id == connection_id,
-            # change it here so it resposne show name instead of id
-            Incident.dataset_name == str(dataset_id),
-            Incident.rule_type == "SCHEMA_DRIFT",
-            Incident.status == "open",
-        )
-        .first()
-    )
+            if progress and (processed % PROGRESS_INTERVAL == 0 or processed == len(datasets)):
+                progress(processed, len(datasets))
+
+    with time_phase("incident_persist", conn.id):
+        incidents_written = incidents.flush()
+
+    db.commit()
+
+    if incidents_written:
+        invalidate(connection_scope(conn.id, "incidents"))
 
-    if has_drift:
-        if not existing:
-            db.add(
-                Incident(
-                    connection_id=connection_id,
-                    # change it here so it resposne show name instead of id
-                    dataset_name=str(dataset_id),
-                    rule_type="SCHEMA_DRIFT",
-                    severity="HIGH",
-                    details=drift,
-                    status="open",
-                )
-            )
-    else:
-        if existing:
-            existing.status = "resolved"
-    
-
-    # ---- Freshness ----
-    if is_stale(latest.created_at):
-        incident = Incident(
-            connection_id=connection_id,
-            dataset_name=str(dataset_id),
-            rule_type="FRESHNESS",
-            severity="MEDIUM",
-            details={"message": "Dataset has not been updated recently"},
-        )
-        db.add(incident)
+    return {"status": "checks completed", "datasets_checked": len(datasets)}
@@ -0,0 +1,132 @@
+import datetime
+
+from sqlalchemy import func, insert, select
+
+from app.connectors.postgres_connector import fetch_column_stats
+from app.core.cache import connection_scope, invalidate
+from app.core.metrics import time_phase
+from app.models import ColumnStat, Dataset
+from app.rules.distribution import detect_distribution_shift, stats_moved
+from app.services.incidents import IncidentTracker
+
+
+def _stats_of(row) -> dict:
+    return {
+        "null_frac": row.null_frac,
+        "n_distinct": row.n_distinct,
+        "most_common": row.most_common,
+        "histogram": row.histogram_bounds,
+    }
+
+
+def get_latest_column_stats(db, connection_id: int) -> dict:
+    """
+    Retrieves the latest stored stats of every column of a connection's datasets in one query.
+
+    Args:
+        db: The database session.
+        connection_id (int): The ID of the connection.
+
+    Returns:
+        dict: Mapping of dataset ID to {column name: stats}.
+    """
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=(ColumnStat.dataset_id, ColumnStat.column_name),
+            order_by=(ColumnStat.created_at.desc(), ColumnStat.id.desc()),
+        )
+        .label("rank")
+    )
+    ranked = (
+        select(ColumnStat, rank)
+        .join(Dataset, Dataset.id == ColumnStat.dataset_id)
+        .where(Dataset.connection_id == connection_id)
+        .subquery()
+    )
+    rows = db.execute(select(ranked).where(ranked.c.rank == 1)).all()
+
+    latest = {}
+    for row in rows:
+        latest.setdefault(row.dataset_id, {})[row.column_name] = _stats_of(row)
+    return latest
+
+
+def run_profiling(db, conn, progress=None) -> dict:
+    """
+    Profiles every column of a connection's datasets from pg_stats and commits the results.
+
+    The planner statistics of all tables are read in one catalog query (no
+    user table is scanned). A column's stats are stored as a new ColumnStat
+    only when they moved beyond the configured tolerance (see
+    rules.distribution.stats_moved), and each dataset's DISTRIBUTION_SHIFT
+    incident is opened, re-observed or counted towards resolution through
+    the IncidentTracker.
+
+    Args:
+        db: The database session.
+        conn (Connection): The connection to profile.
+        progress (callable, optional): Called with (processed, total) as datasets are compared.
+
+    Returns:
+        dict: Numbers of tables profiled, column stats recorded and datasets with a shift.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    with time_phase("catalog_fetch", conn.id):
+        stats = fetch_column_stats(conn)
+
+    datasets = db.query(Dataset).filter(Dataset.connection_id == conn.id, Dataset.retired_at.is_(None)).all()
+    baselines = get_latest_column_stats(db, conn.id)
+    incidents = IncidentTracker(db, conn.id, ("DISTRIBUTION_SHIFT",), now=now)
+
+    new_stats = []
+    tables_profiled = 0
+    shifted = 0
+
+    with time_phase("diff", conn.id):
+        for processed, ds in enumerate(datasets, 1):
+            table_stats = stats.get(ds.name)
+            if table_stats:
+                tables_profiled += 1
+                baseline = baselines.get(ds.id, {})
+
+                shifts = detect_distribution_shift(baseline, table_stats)
+                if shifts:
+                    shifted += 1
+                    incidents.fail(ds.id, ds.name, "DISTRIBUTION_SHIFT", "MEDIUM", {"columns": shifts})
+                else:
+                    incidents.ok(ds.name, "DISTRIBUTION_SHIFT")
+
+                for column, current in table_stats.items():
+                    if column not in baseline or stats_moved(baseline[column], current):
+                        new_stats.append({
+                            "dataset_id": ds.id,
+                            "column_name": column,
+                            "null_frac": current["null_frac"],
+                            "n_distinct": current["n_distinct"],
+                            "most_common": current["most_common"],
+                            "histogram_bounds": current["histogram"],
+                            "created_at": now,
+                        })
+
+            if progress:
+                progress(processed, len(datasets))
+
+    with time_phase("snapshot_persist", conn.id):
+        if new_stats:
+            db.execute(insert(ColumnStat), new_stats)
+
+    with time_phase("incident_persist", conn.id):
+        incidents_written = incidents.flush()
+
+    db.commit()
+
+    if incidents_written:
+        invalidate(connection_scope(conn.id, "incidents"))
+
+    return {
+        "tables_profiled": tables_profiled,
+        "column_stats_recorded": len(new_stats),
+        "distribution_shifts": shifted,
+    }
@@ -0,0 +1,173 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+
+from app.connectors.row_sampler import (
+    DuplicateKeyAccumulator,
+    NullRateAccumulator,
+    RangeAccumulator,
+    scan_sample,
+)
+from app.core.cache import connection_scope, invalidate
+from app.core.config import (
+    CHECK_WORKERS,
+    CLIENT_POOL_MAX_SIZE,
+    ROW_CHECK_ROW_BUDGET,
+    ROW_CHECK_SAMPLE_METHOD,
+    ROW_CHECK_SAMPLE_PERCENT,
+    ROW_CHECK_TIMEOUT_SECONDS,
+)
+from app.core.metrics import time_phase
+from app.models import Dataset, RowCheck
+from app.services.incidents import IncidentTracker
+
+# check_type -> (incident rule_type, severity)
+CHECK_TYPES = {
+    "null_rate": ("NULL_RATE", "MEDIUM"),
+    "duplicate_keys": ("DUPLICATE_KEYS", "HIGH"),
+    "value_range": ("VALUE_RANGE", "MEDIUM"),
+}
+
+
+def make_accumulator(check: RowCheck):
+    """
+    Returns a fresh streaming accumulator for a check.
+
+    Raises:
+        ValueError: If the check type is unknown.
+    """
+    if check.check_type == "null_rate":
+        return NullRateAccumulator()
+    if check.check_type == "duplicate_keys":
+        return DuplicateKeyAccumulator()
+    if check.check_type == "value_range":
+        params = check.params or {}
+        return RangeAccumulator(params.get("min"), params.get("max"))
+    raise ValueError(f"Unknown check type: {check.check_type}")
+
+
+def check_failed(check: RowCheck, result: dict):
+    """
+    Compares a check's result with its thresholds.
+
+    Returns:
+        bool: Whether the check failed, or None when the sample had no rows to judge.
+    """
+    params = check.params or {}
+    if check.check_type == "null_rate":
+        if result["null_rate"] is None:
+            return None
+        return result["null_rate"] > params.get("max_null_rate", 0.0)
+    if check.check_type == "duplicate_keys":
+        if not result["rows_scanned"]:
+            return None
+        return result["duplicate_rows"] > params.get("max_duplicate_rows", 0)
+    if result["violation_rate"] is None:
+        return None
+    return result["violation_rate"] > params.get("max_violation_rate", 0.0)
+
+
+def run_row_check(conn, dataset: Dataset, check: RowCheck) -> dict:
+    """
+    Runs one row-level check on a sample of its table.
+
+    Args:
+        conn (Connection): The dataset's connection.
+        dataset (Dataset): The dataset ('schema.table').
+        check (RowCheck): The check to run.
+
+    Returns:
+        dict: See connectors.row_sampler.scan_sample, plus 'failed'.
+    """
+    schema, table = dataset.name.split(".", 1)
+    result = scan_sample(
+        conn, schema, table, check.columns, make_accumulator(check),
+        method=check.sample_method or ROW_CHECK_SAMPLE_METHOD,
+        percent=check.sample_percent or ROW_CHECK_SAMPLE_PERCENT,
+        row_budget=check.row_budget or ROW_CHECK_ROW_BUDGET,
+        timeout_seconds=check.timeout_seconds or ROW_CHECK_TIMEOUT_SECONDS,
+    )
+    result["failed"] = check_failed(check, result)
+    return result
+
+
+def run_row_checks_for_connection(db, conn, progress=None) -> dict:
+    """
+    Runs the enabled row-level checks of a connection's datasets and commits the results.
+
+    Checks run concurrently (bounded by CHECK_WORKERS and the client pool
+    size), each reading a bounded sample through a server-side cursor. Each
+    check's outcome is stored on it, and failures are recorded per
+    (dataset, check type) through the IncidentTracker, so several failing
+    checks of one type on a dataset share one incident.
+
+    Args:
+        db: The database session.
+        conn (Connection): The connection to check.
+        progress (callable, optional): Called with (processed, total) as checks finish.
+
+    Returns:
+        dict: Numbers of checks run, failed and errored.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    rows = (
+        db.query(RowCheck, Dataset)
+        .join(Dataset, Dataset.id == RowCheck.dataset_id)
+        .filter(Dataset.connection_id == conn.id, Dataset.retired_at.is_(None), RowCheck.enabled.is_(True))
+        .order_by(RowCheck.dataset_id, RowCheck.id)
+        .all()
+    )
+    incidents = IncidentTracker(db, conn.id, [rule for rule, _ in CHECK_TYPES.values()], now=now)
+
+    def run(pair):
+        check, dataset = pair
+        try:
+            return run_row_check(conn, dataset, check)
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "failed": None}
+
+    results = []
+    workers = max(1, min(CHECK_WORKERS, CLIENT_POOL_MAX_SIZE))
+    with time_phase("row_checks", conn.id), ThreadPoolExecutor(max_workers=workers) as pool:
+        for processed, result in enumerate(pool.map(run, rows), 1):
+            results.append(result)
+            if progress:
+                progress(processed, len(rows))
+
+    # Group outcomes per (dataset, rule) so one passing check can't resolve
+    # the incident of another failing check of the same type
+    outcomes = {}
+    for (check, dataset), result in zip(rows, results):
+        rule_type, severity = CHECK_TYPES[check.check_type]
+        entry = outcomes.setdefault((dataset.id, dataset.name, rule_type), {"severity": severity, "failed": [], "judged": False})
+        if result["failed"] is not None:
+            entry["judged"] = True
+        if result["failed"]:
+            entry["failed"].append({"check_id": check.id, "columns": check.columns, **result})
+
+    for (dataset_id, dataset_name, rule_type), entry in outcomes.items():
+        if entry["failed"]:
+            incidents.fail(dataset_id, dataset_name, rule_type, entry["severity"], {"checks": entry["failed"]})
+        elif entry["judged"]:
+            incidents.ok(dataset_name, rule_type)
+
+    with time_phase("incident_persist", conn.id):
+        if rows:
+            db.execute(update(RowCheck), [
+                {"id": check.id, "last_result": result, "last_run_at": now}
+                for (check, _), result in zip(rows, results)
+            ])
+        incidents_written = incidents.flush()
+
+    db.commit()
+
+    if incidents_written:
+        invalidate(connection_scope(conn.id, "incidents"))
+
+    return {
+        "checks_run": len(rows),
+        "checks_failed": sum(1 for r in results if r["failed"]),
+        "checks_errored": sum(1 for r in results if "error" in r),
+    }
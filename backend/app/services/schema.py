@@ -1,7 +1,57 @@
+import hashlib
+import json
+
+from sqlalchemy import func, select
+
+from app.models.models import Dataset
 from app.models.schema_snapshot import SchemaSnapshot
 
 
-def save_snapshot(db, dataset_id: int, dataset_name: str, schema: dict):
+def schema_fingerprint(schema: dict) -> str:
+    """
+    Computes a stable content hash of a schema's columns.
+
+    Only column names, types, nullability and their order are hashed; the
+    schema and table names are not, so identical tables hash identically.
+
+    Args:
+        schema (dict): The JSON representation of the schema.
+
+    Returns:
+        str: Hex sha256 digest.
+    """
+    canonical = json.dumps(
+        [[c["name"], c["type"], c["nullable"]] for c in schema["columns"]],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def snapshot_fingerprint(snapshot: SchemaSnapshot, resolver=None) -> str:
+    """
+    Returns a snapshot's fingerprint, computing it for rows stored before
+    schema_hash existed.
+
+    Args:
+        snapshot (SchemaSnapshot): The snapshot.
+        resolver (SchemaResolver, optional): Reconstructs the schema of such a
+            row when it holds no schema_json either (a delta, or a shared
+            body; see services.snapshot_store).
+
+    Raises:
+        ValueError: If the schema has to be reconstructed and no resolver is given.
+    """
+    if snapshot.schema_hash:
+        return snapshot.schema_hash
+    if snapshot.schema_json is not None:
+        return schema_fingerprint(snapshot.schema_json)
+    if resolver is None:
+        raise ValueError(f"Snapshot {snapshot.id} has no schema_hash; pass a SchemaResolver")
+    return schema_fingerprint(resolver.schema(snapshot))
+
+
+def save_snapshot(db, dataset_id: int, dataset_name: str, schema: dict, commit: bool = True):
     """
     Saves a new snapshot of a dataset's schema to the database.
 
@@ -10,6 +60,7 @@ def save_snapshot(db, dataset_id: int, dataset_name: str, schema: dict):
         dataset_id (int): The ID of the dataset.
         dataset_name (str): The name of the dataset.
         schema (dict): The JSON representation of the schema.
+        commit (bool): Commit immediately; pass False to leave it to the caller's transaction.
     
     Raises:
         TypeError: If dataset_id is not an integer.
@@ -19,10 +70,12 @@ def save_snapshot(db, dataset_id: int, dataset_name: str, schema: dict):
     snapshot = SchemaSnapshot(
         dataset_id=dataset_id,
         dataset_name=dataset_name,
-        schema_json=schema
+        schema_json=schema,
+        schema_hash=schema_fingerprint(schema),
     )
     db.add(snapshot)
-    db.commit()
+    if commit:
+        db.commit()
 
 def get_latest_snapshot(db, dataset_id: int):
     """
@@ -41,3 +94,48 @@ def get_latest_snapshot(db, dataset_id: int):
         .order_by(SchemaSnapshot.created_at.desc())
         .first()
     )
+
+
+def get_latest_snapshots(db, connection_id: int, per_dataset: int = 1, dataset_ids=None):
+    """
+    Retrieves the most recent snapshots of every dataset of a connection in one query.
+
+    Args:
+        db: The database session.
+        connection_id (int): The ID of the connection.
+        per_dataset (int): How many snapshots to return per dataset.
+        dataset_ids (list, optional): Only these datasets of the connection.
+
+    Returns:
+        dict: Mapping of dataset ID to its snapshots, newest first.
+    """
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=SchemaSnapshot.dataset_id,
+            order_by=(SchemaSnapshot.created_at.desc(), SchemaSnapshot.id.desc()),
+        )
+        .label("rank")
+    )
+    ranked = (
+        select(SchemaSnapshot.id, rank)
+        .join(Dataset, Dataset.id == SchemaSnapshot.dataset_id)
+        .where(Dataset.connection_id == connection_id)
+    )
+    if dataset_ids is not None:
+        if not dataset_ids:
+            return {}
+        ranked = ranked.where(SchemaSnapshot.dataset_id.in_(dataset_ids))
+    ranked = ranked.subquery()
+    rows = (
+        db.query(SchemaSnapshot)
+        .join(ranked, ranked.c.id == SchemaSnapshot.id)
+        .filter(ranked.c.rank <= per_dataset)
+        .order_by(SchemaSnapshot.dataset_id, ranked.c.rank)
+        .all()
+    )
+
+    latest = {}
+    for snapshot in rows:
+        latest.setdefault(snapshot.dataset_id, []).append(snapshot)
+    return latest
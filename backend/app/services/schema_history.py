@@ -0,0 +1,113 @@
+from sqlalchemy import tuple_
+
+from app.models import SchemaChangeEvent, SchemaSnapshot
+from app.rules.schema_diff import diff_schema
+from app.services.snapshot_store import SchemaResolver
+
+
+def column_change_events(old_schema: dict, new_schema: dict, diff: dict = None) -> list:
+    """
+    Lists the column-level changes between two schemas.
+
+    Args:
+        old_schema (dict): The previous schema.
+        new_schema (dict): The current schema.
+        diff (dict, optional): Their diff_schema result, if already computed.
+
+    Returns:
+        list: Dicts with change_type, column_name, old_value and new_value.
+    """
+    if diff is None:
+        diff = diff_schema(old_schema, new_schema)
+    old_cols = {c["name"]: c for c in old_schema["columns"]}
+    new_cols = {c["name"]: c for c in new_schema["columns"]}
+    old_positions = {c["name"]: i for i, c in enumerate(old_schema["columns"])}
+    new_positions = {c["name"]: i for i, c in enumerate(new_schema["columns"])}
+
+    events = []
+    for name in diff["added"]:
+        events.append({"change_type": "added", "column_name": name, "old_value": None, "new_value": new_cols[name]})
+    for name in diff["removed"]:
+        events.append({"change_type": "removed", "column_name": name, "old_value": old_cols[name], "new_value": None})
+    for kind in ("type_changed", "nullability_changed"):
+        for name in diff[kind]:
+            events.append({"change_type": kind, "column_name": name, "old_value": old_cols[name], "new_value": new_cols[name]})
+    for pair in diff["renamed"]:
+        events.append({
+            "change_type": "renamed",
+            "column_name": pair["to"],
+            "old_value": old_cols[pair["from"]],
+            "new_value": new_cols[pair["to"]],
+        })
+    renamed_from = {pair["to"]: pair["from"] for pair in diff["renamed"]}
+    for name in diff["reordered"]:
+        events.append({
+            "change_type": "reordered",
+            "column_name": name,
+            "old_value": {"position": old_positions[renamed_from.get(name, name)]},
+            "new_value": {"position": new_positions[name]},
+        })
+    return events
+
+
+def get_schema_at(db, dataset_id: int, at=None):
+    """
+    Returns the schema a dataset had at a point in time.
+
+    Served by the (dataset_id, created_at) index: one seek for the last
+    snapshot taken at or before `at`, plus its checkpoint if it is a delta.
+    A snapshot moved out of an expired partition still counts from its
+    original capture time (see app.db.partitions).
+
+    Args:
+        db: The database session.
+        dataset_id (int): The ID of the dataset.
+        at (datetime, optional): The point in time; defaults to now.
+
+    Returns:
+        tuple: (SchemaSnapshot, schema dict), or (None, None) if no snapshot existed yet.
+    """
+    query = db.query(SchemaSnapshot).filter(SchemaSnapshot.dataset_id == dataset_id)
+    if at is not None:
+        query = query.filter(SchemaSnapshot.created_at <= at)
+    snapshot = query.order_by(SchemaSnapshot.created_at.desc(), SchemaSnapshot.id.desc()).first()
+    if snapshot is None and at is not None:
+        snapshot = (
+            db.query(SchemaSnapshot)
+            .filter(SchemaSnapshot.dataset_id == dataset_id)
+            .filter(SchemaSnapshot.original_created_at <= at)
+            .order_by(SchemaSnapshot.created_at.desc(), SchemaSnapshot.id.desc())
+            .first()
+        )
+    if snapshot is None:
+        return None, None
+    return snapshot, SchemaResolver(db).schema(snapshot)
+
+
+def get_change_events(db, dataset_id: int, since=None, until=None, limit: int = 100, after=None):
+    """
+    Lists a dataset's column-level change events in chronological order.
+
+    Args:
+        db: The database session.
+        dataset_id (int): The ID of the dataset.
+        since (datetime, optional): Only events at or after this time.
+        until (datetime, optional): Only events before this time.
+        limit (int): Maximum number of events.
+        after (tuple, optional): (created_at, id) keyset position to continue from.
+
+    Returns:
+        list: SchemaChangeEvent rows.
+    """
+    query = db.query(SchemaChangeEvent).filter(SchemaChangeEvent.dataset_id == dataset_id)
+    if since is not None:
+        query = query.filter(SchemaChangeEvent.created_at >= since)
+    if until is not None:
+        query = query.filter(SchemaChangeEvent.created_at < until)
+    if after is not None:
+        query = query.filter(tuple_(SchemaChangeEvent.created_at, SchemaChangeEvent.id) > tuple_(*after))
+    return (
+        query.order_by(SchemaChangeEvent.created_at, SchemaChangeEvent.id)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,443 @@
+import datetime
+from itertools import groupby
+from types import SimpleNamespace
+
+from sqlalchemy import delete, exists, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
+
+from app.core.config import (
+    SNAPSHOT_CHECKPOINT_INTERVAL,
+    SNAPSHOT_INTERN_BODIES,
+    SNAPSHOT_RETENTION_DAYS,
+    SNAPSHOT_STORAGE,
+)
+from app.models import Dataset, SchemaBody, SchemaSnapshot
+from app.services.schema import schema_fingerprint
+
+# Datasets whose history is compacted per transaction
+COMPACTION_BATCH_SIZE = 200
+
+
+def _apply_columns(base: dict, delta: dict) -> list:
+    removed = set(delta["removed"])
+    upserted = {c["name"]: c for c in delta["upserted"]}
+
+    columns = []
+    for col in base["columns"]:
+        if col["name"] in removed:
+            continue
+        columns.append(upserted.pop(col["name"], col))
+    # Whatever is left was added after the checkpoint
+    columns.extend(upserted.values())
+
+    if "order" in delta:
+        by_name = {c["name"]: c for c in columns}
+        columns = [by_name[name] for name in delta["order"]]
+    return columns
+
+
+def encode_delta(base: dict, schema: dict) -> dict:
+    """
+    Encodes a schema as the changes against a checkpoint schema.
+
+    The delta lists removed column names and added or modified columns.
+    Columns keep the checkpoint's order with added ones appended; the full
+    name order is only stored when the table was reordered otherwise.
+
+    Args:
+        base (dict): The checkpoint's schema.
+        schema (dict): The schema to encode.
+
+    Returns:
+        dict: {'removed': [...], 'upserted': [...], optionally 'order': [...]}.
+    """
+    base_cols = {c["name"]: c for c in base["columns"]}
+    names = [c["name"] for c in schema["columns"]]
+    present = set(names)
+
+    delta = {
+        "removed": [name for name in base_cols if name not in present],
+        "upserted": [c for c in schema["columns"] if base_cols.get(c["name"]) != c],
+    }
+    if [c["name"] for c in _apply_columns(base, delta)] != names:
+        delta["order"] = names
+    return delta
+
+
+def apply_delta(base: dict, delta: dict) -> dict:
+    """
+    Rebuilds a schema from its checkpoint and the delta produced by encode_delta.
+    """
+    return {
+        "schema": base["schema"],
+        "table": base["table"],
+        "columns": _apply_columns(base, delta),
+    }
+
+
+def encode_snapshot(schema: dict, previous=None, previous_checkpoint: dict = None) -> dict:
+    """
+    Chooses how to store a new snapshot that follows `previous`.
+
+    In "delta" storage mode the snapshot becomes a delta against the previous
+    snapshot's checkpoint, unless that chain already holds
+    SNAPSHOT_CHECKPOINT_INTERVAL snapshots or the delta would not be much
+    smaller than the schema itself; otherwise it becomes a full checkpoint.
+
+    Args:
+        schema (dict): The schema to store.
+        previous (SchemaSnapshot, optional): The dataset's latest snapshot.
+        previous_checkpoint (dict, optional): The schema of previous's checkpoint.
+
+    Returns:
+        dict: Values for kind, schema_json, body_id, base_snapshot_id,
+        delta_json and checkpoint_seq; pass full layouts through
+        intern_bodies before storing them.
+    """
+    full = {
+        "kind": "full",
+        "schema_json": schema,
+        "body_id": None,
+        "base_snapshot_id": None,
+        "delta_json": None,
+        "checkpoint_seq": 0,
+    }
+    if SNAPSHOT_STORAGE != "delta" or previous is None or previous_checkpoint is None:
+        return full
+
+    seq = (previous.checkpoint_seq or 0) + 1
+    if seq >= SNAPSHOT_CHECKPOINT_INTERVAL:
+        return full
+
+    delta = encode_delta(previous_checkpoint, schema)
+    size = len(delta["removed"]) + len(delta["upserted"]) + len(delta.get("order", ()))
+    if size * 2 >= len(schema["columns"]):
+        return full
+
+    return {
+        "kind": "delta",
+        "schema_json": None,
+        "body_id": None,
+        "base_snapshot_id": previous.base_snapshot_id if previous.kind == "delta" else previous.id,
+        "delta_json": delta,
+        "checkpoint_seq": seq,
+    }
+
+
+def intern_bodies(db, layouts: list):
+    """
+    Moves the columns of full snapshot layouts into shared SchemaBody rows.
+
+    Each distinct column list is stored once, addressed by its fingerprint;
+    the layouts' schema_json is replaced by the body's id, and their
+    schema_hash set to its fingerprint, in place. Costs
+    two statements however many layouts there are. Does nothing when
+    SNAPSHOT_INTERN_BODIES is off.
+
+    Args:
+        db: The database session.
+        layouts (list): Snapshot value dicts (see encode_snapshot), optionally
+            carrying their schema_hash.
+    """
+    if not SNAPSHOT_INTERN_BODIES:
+        return
+
+    pending = {}
+    for layout in layouts:
+        if layout["kind"] == "full" and layout["schema_json"] is not None:
+            body_hash = layout.get("schema_hash") or schema_fingerprint(layout["schema_json"])
+            pending.setdefault(body_hash, []).append(layout)
+    if not pending:
+        return
+
+    db.execute(
+        pg_insert(SchemaBody).on_conflict_do_nothing(index_elements=["body_hash"]),
+        [
+            {"body_hash": body_hash, "columns_json": group[0]["schema_json"]["columns"]}
+            for body_hash, group in pending.items()
+        ],
+    )
+    body_ids = dict(db.execute(
+        select(SchemaBody.body_hash, SchemaBody.id).where(SchemaBody.body_hash.in_(list(pending)))
+    ).all())
+
+    for body_hash, group in pending.items():
+        for layout in group:
+            layout["schema_json"] = None
+            layout["body_id"] = body_ids[body_hash]
+            # Without schema_json the row can only be fingerprinted by its hash
+            layout["schema_hash"] = body_hash
+
+
+class SchemaResolver:
+    """
+    Reconstructs the schemas of stored snapshots.
+
+    Checkpoints needed by delta snapshots, and the shared bodies of full
+    snapshots, are fetched in bulk by load() and cached, so resolving a batch
+    of snapshots costs at most two queries. Once loaded, resolving does no
+    I/O and is safe to call from worker threads.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._checkpoints = {}
+        self._bodies = {}
+
+    def load(self, snapshots):
+        snapshots = list(snapshots)
+        missing = {
+            s.base_snapshot_id
+            for s in snapshots
+            if s.kind == "delta" and s.base_snapshot_id not in self._checkpoints
+        }
+        checkpoints = []
+        if missing:
+            checkpoints = (
+                self.db.query(
+                    SchemaSnapshot.id,
+                    SchemaSnapshot.dataset_name,
+                    SchemaSnapshot.schema_json,
+                    SchemaSnapshot.body_id,
+                )
+                .filter(SchemaSnapshot.id.in_(missing))
+                .all()
+            )
+        self._load_bodies([s for s in snapshots if s.kind != "delta"] + checkpoints)
+        self._checkpoints.update((row.id, self._full_schema(row)) for row in checkpoints)
+
+    def _load_bodies(self, rows):
+        missing = {
+            row.body_id
+            for row in rows
+            if row.schema_json is None and row.body_id is not None and row.body_id not in self._bodies
+        }
+        if missing:
+            bodies = (
+                self.db.query(SchemaBody.id, SchemaBody.columns_json)
+                .filter(SchemaBody.id.in_(missing))
+            )
+            self._bodies.update((body.id, body.columns_json) for body in bodies)
+
+    def _full_schema(self, row) -> dict:
+        if row.schema_json is not None:
+            return row.schema_json
+        if row.body_id not in self._bodies:
+            self._load_bodies([row])
+        schema, table = row.dataset_name.split(".", 1)
+        return {"schema": schema, "table": table, "columns": self._bodies[row.body_id]}
+
+    def schema(self, snapshot) -> dict:
+        """Returns the full schema of a snapshot."""
+        if snapshot.kind != "delta":
+            return self._full_schema(snapshot)
+        return apply_delta(self.checkpoint_schema(snapshot), snapshot.delta_json)
+
+    def checkpoint_schema(self, snapshot) -> dict:
+        """Returns the schema of the checkpoint a snapshot belongs to (itself, if full)."""
+        if snapshot.kind != "delta":
+            return self._full_schema(snapshot)
+        if snapshot.base_snapshot_id not in self._checkpoints:
+            self.load([snapshot])
+        return self._checkpoints[snapshot.base_snapshot_id]
+
+
+def reconstruct_schema(db, snapshot_id: int):
+    """
+    Rebuilds the schema recorded by a snapshot, whatever its storage kind.
+
+    Args:
+        db: The database session.
+        snapshot_id (int): The ID of the snapshot.
+
+    Returns:
+        dict: The schema_json, or None if the snapshot does not exist.
+    """
+    snapshot = db.query(SchemaSnapshot).filter(SchemaSnapshot.id == snapshot_id).first()
+    if snapshot is None:
+        return None
+    return SchemaResolver(db).schema(snapshot)
+
+
+def _aware(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def _encode_chain(snapshots: list, schemas: dict) -> list:
+    """
+    Re-encodes a dataset's snapshots, oldest first, as if each had been
+    stored right after the previous one (the first as a full snapshot).
+
+    Returns:
+        list: (snapshot, layout) pairs; see encode_snapshot.
+    """
+    layouts = []
+    previous = None
+    for snapshot in snapshots:
+        checkpoint = None
+        if previous is not None:
+            checkpoint = schemas[previous.base_snapshot_id if previous.kind == "delta" else previous.id]
+        layout = encode_snapshot(schemas[snapshot.id], previous, checkpoint)
+        layout["schema_hash"] = snapshot.schema_hash or schema_fingerprint(schemas[snapshot.id])
+        layouts.append((snapshot, layout))
+        previous = SimpleNamespace(id=snapshot.id, **layout)
+    return layouts
+
+
+def _apply_layouts(layouts: list) -> int:
+    """Writes layouts onto their snapshots; returns how many snapshots changed."""
+    rewritten = 0
+    for snapshot, layout in layouts:
+        changed = False
+        for name, value in layout.items():
+            if getattr(snapshot, name) != value:
+                setattr(snapshot, name, value)
+                changed = True
+        rewritten += changed
+    return rewritten
+
+
+def compact_snapshots(db, connection_id: int, retention_days: int = SNAPSHOT_RETENTION_DAYS) -> dict:
+    """
+    Compacts the snapshot history of a connection's datasets.
+
+    Snapshots older than retention_days are deleted (the latest snapshot of a
+    dataset is always kept), then each dataset's remaining history is
+    re-encoded from its oldest snapshot onwards with encode_snapshot. That
+    folds long runs of full snapshots into checkpoints plus deltas and turns
+    deltas whose checkpoint was deleted into a new checkpoint chain. Full
+    snapshots still carrying their own schema_json are moved to shared
+    bodies (see intern_bodies), and rows stored before schema_hash existed
+    get theirs. Datasets are processed and committed in batches.
+
+    Args:
+        db: The database session.
+        connection_id (int): The ID of the connection.
+        retention_days (int): History to keep; 0 keeps everything.
+
+    Returns:
+        dict: Number of snapshots deleted and rewritten.
+    """
+    cutoff = None
+    if retention_days:
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=retention_days)
+
+    dataset_ids = [
+        dataset_id
+        for (dataset_id,) in db.query(Dataset.id).filter(Dataset.connection_id == connection_id)
+    ]
+    stats = {"deleted": 0, "rewritten": 0}
+
+    for i in range(0, len(dataset_ids), COMPACTION_BATCH_SIZE):
+        batch = dataset_ids[i:i + COMPACTION_BATCH_SIZE]
+        snapshots = (
+            db.query(SchemaSnapshot)
+            .filter(SchemaSnapshot.dataset_id.in_(batch))
+            .order_by(SchemaSnapshot.dataset_id, SchemaSnapshot.created_at, SchemaSnapshot.id)
+            .all()
+        )
+
+        # Reconstruct everything before any row is rewritten
+        resolver = SchemaResolver(db)
+        resolver.load(snapshots)
+        schemas = {s.id: resolver.schema(s) for s in snapshots}
+
+        dropped_ids = []
+        layouts = []
+        for _, history in groupby(snapshots, key=lambda s: s.dataset_id):
+            history = list(history)
+            kept = [
+                s for s in history[:-1]
+                if cutoff is None or _aware(s.created_at) >= cutoff
+            ] + history[-1:]
+            kept_ids = {s.id for s in kept}
+            dropped_ids.extend(s.id for s in history if s.id not in kept_ids)
+            layouts.extend(_encode_chain(kept, schemas))
+
+        intern_bodies(db, [layout for _, layout in layouts])
+        stats["rewritten"] += _apply_layouts(layouts)
+
+        if dropped_ids:
+            db.execute(
+                delete(SchemaSnapshot)
+                .where(SchemaSnapshot.id.in_(dropped_ids))
+                .execution_options(synchronize_session=False)
+            )
+            stats["deleted"] += len(dropped_ids)
+        db.commit()
+
+    return stats
+
+
+def release_snapshot_range(db, lower, upper) -> int:
+    """
+    Makes the snapshots taken in [lower, upper) safe to delete wholesale, e.g.
+    with the partition holding them (see app.db.partitions).
+
+    Unlike compact_snapshots, only the rows that outlive the range are touched:
+
+    - Each dataset's latest snapshot, when taken in the range, is stored as a
+      full snapshot and moved to `upper`, its capture time kept in
+      original_created_at.
+    - Later delta snapshots whose checkpoint is in the range are re-encoded,
+      the first of each chain becoming its new checkpoint.
+
+    The caller commits, together with the deletion.
+
+    Args:
+        db: The database session.
+        lower (datetime): Start of the range.
+        upper (datetime): End of the range (exclusive).
+
+    Returns:
+        int: Number of latest snapshots moved.
+    """
+    in_range = (SchemaSnapshot.created_at >= lower) & (SchemaSnapshot.created_at < upper)
+    newer = aliased(SchemaSnapshot)
+    latest = (
+        db.query(SchemaSnapshot)
+        .filter(in_range)
+        .filter(~exists().where(
+            newer.dataset_id == SchemaSnapshot.dataset_id,
+            tuple_(newer.created_at, newer.id) > tuple_(SchemaSnapshot.created_at, SchemaSnapshot.id),
+        ))
+        .all()
+    )
+    orphaned = (
+        db.query(SchemaSnapshot)
+        .filter(SchemaSnapshot.created_at >= upper)
+        .filter(SchemaSnapshot.kind == "delta")
+        .filter(SchemaSnapshot.base_snapshot_id.in_(select(SchemaSnapshot.id).where(in_range)))
+        .order_by(SchemaSnapshot.base_snapshot_id, SchemaSnapshot.created_at, SchemaSnapshot.id)
+        .all()
+    )
+
+    resolver = SchemaResolver(db)
+    resolver.load(latest + orphaned)
+    schemas = {s.id: resolver.schema(s) for s in latest + orphaned}
+
+    layouts = []
+    for snapshot in latest:
+        layouts.extend(_encode_chain([snapshot], schemas))
+    for _, chain in groupby(orphaned, key=lambda s: s.base_snapshot_id):
+        layouts.extend(_encode_chain(list(chain), schemas))
+    intern_bodies(db, [layout for _, layout in layouts])
+    _apply_layouts(layouts)
+    db.flush()
+
+    # The partition key changes, which moves the rows to the next partition
+    if latest:
+        db.execute(
+            update(SchemaSnapshot)
+            .where(SchemaSnapshot.id.in_([s.id for s in latest]))
+            .where(in_range)
+            .values(
+                original_created_at=func.coalesce(SchemaSnapshot.original_created_at, SchemaSnapshot.created_at),
+                created_at=upper,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    return len(latest)
@@ -0,0 +1,85 @@
+"""
+Standalone job worker for JOB_BACKEND=database.
+
+Run as many of these as needed, on as many nodes as needed; they coordinate
+only through the work_items table in the metadata DB:
+
+    python -m app.worker --concurrency 8
+
+Each worker thread claims one work item at a time (see
+jobs.queue.DatabaseJobQueue), runs its handler and goes back for the next.
+SIGINT/SIGTERM stop claiming new items and let running ones finish.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+
+import app.jobs.tasks  # noqa: F401  registers the handlers
+from app.core.config import JOB_WORKERS, WORKER_POLL_SECONDS
+from app.db.session import engine
+from app.jobs.queue import DatabaseJobQueue
+
+logger = logging.getLogger("app.worker")
+
+
+def work(worker_id: str, stopping: threading.Event):
+    """
+    Claims and runs work items until stopping is set.
+
+    Args:
+        worker_id (str): Lease owner recorded on claimed items.
+        stopping (threading.Event): Set to stop after the current item.
+    """
+    queue = DatabaseJobQueue(worker_id)
+
+    while not stopping.is_set():
+        try:
+            # Held for the thread's lifetime: its session owns the host slot locks
+            with engine.connect() as lock_conn:
+                while not stopping.is_set():
+                    job, slot = queue.claim(lock_conn)
+                    if job is None:
+                        stopping.wait(WORKER_POLL_SECONDS)
+                        continue
+                    try:
+                        logger.info("%s running job %s (%s)", worker_id, job.id, job.kind)
+                        queue.execute_leased(job)
+                    finally:
+                        queue.release_host_slot(lock_conn, slot)
+        except Exception:
+            logger.exception("%s lost its metadata DB connection", worker_id)
+            stopping.wait(WORKER_POLL_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKERS,
+                        help="work items run at the same time by this process (default: JOB_WORKERS)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=work, args=(f"{prefix}:{i}", stopping), name=f"veda-worker-{i}")
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    logger.info("Worker %s started with %d threads", prefix, args.concurrency)
+
+    # Wake up periodically so signals are handled on the main thread
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Times the schema diff engine on wide synthetic tables.
+
+Run from backend/:  python -m benchmarks.bench_schema_diff
+"""
+import random
+import time
+
+from app.rules.schema_diff import diff_columns, diff_schemas_batch
+from benchmarks.catalog import make_columns, mutate
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    rng = random.Random(42)
+
+    print("wide tables (best of 5)")
+    for width in (1_000, 10_000, 50_000):
+        old = make_columns(width, rng)
+        new = mutate(old, rng)
+        seconds = timed(lambda: diff_columns(old, new))
+        print(f"  {width:>6} columns: {seconds * 1000:8.2f} ms")
+
+    print("batch of narrow tables (best of 5)")
+    pairs = []
+    for _ in range(10_000):
+        old = make_columns(30, rng)
+        new = mutate(old, rng, rate=0.05) if rng.random() < 0.1 else old
+        pairs.append(({"columns": old}, {"columns": new}))
+    seconds = timed(lambda: diff_schemas_batch(pairs))
+    print(f"  {len(pairs)} pairs x 30 columns: {seconds * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
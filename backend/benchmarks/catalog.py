@@ -0,0 +1,195 @@
+"""
+Synthetic client catalogs for benchmarks: N schemas x M tables x K columns,
+plus one monthly range-partitioned table, either kept in memory behind a fake
+connector or created in a real Postgres.
+"""
+import random
+
+TYPES = ["integer", "bigint", "text", "numeric", "boolean", "timestamp with time zone"]
+
+# The partitioned table: schema_0.events, one partition per month of 2024
+PARTITIONED_TABLE = ("schema_0", "events")
+PARTITION_MONTHS = 12
+
+
+def make_columns(n: int, rng: random.Random) -> list:
+    return [
+        {"name": f"col_{i}", "type": rng.choice(TYPES), "nullable": rng.choice(["YES", "NO"])}
+        for i in range(n)
+    ]
+
+
+def mutate(columns: list, rng: random.Random, rate: float = 0.01) -> list:
+    """Applies roughly `rate` of each kind of change: drops, renames, type/nullability changes, adds, moves."""
+    out = []
+    for col in columns:
+        r = rng.random()
+        if r < rate:
+            continue
+        col = dict(col)
+        if r < 2 * rate:
+            col["name"] += "_renamed"
+        elif r < 3 * rate:
+            col["type"] = rng.choice(TYPES)
+        elif r < 4 * rate:
+            col["nullable"] = "NO" if col["nullable"] == "YES" else "YES"
+        out.append(col)
+    for i in range(max(1, int(len(columns) * rate))):
+        out.insert(rng.randrange(len(out) + 1), {"name": f"new_{i}", "type": "text", "nullable": "YES"})
+    for _ in range(int(len(columns) * rate)):
+        out.insert(rng.randrange(len(out) + 1), out.pop(rng.randrange(len(out))))
+    return out
+
+
+class SyntheticCatalog:
+    """
+    An in-memory client database: a schema_json per table plus write counters.
+
+    The methods mirror the connector functions discovery and checks call, so
+    install() can swap them in for the real psycopg2-backed ones.
+    """
+
+    def __init__(self, schemas: int, tables: int, columns: int, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.tables = {}
+        self.markers = {}
+        self.activity = {}
+        oid = 16384
+        for s in range(schemas):
+            for t in range(tables):
+                schema, table = f"schema_{s}", f"table_{t}"
+                full_name = f"{schema}.{table}"
+                self.tables[full_name] = {
+                    "schema": schema,
+                    "table": table,
+                    "columns": make_columns(columns, self.rng),
+                }
+                self.markers[full_name] = (oid, f"{oid}:1")
+                self.activity[full_name] = {
+                    "n_tup_ins": 0, "n_tup_upd": 0, "n_tup_del": 0,
+                    "last_vacuum_at": None, "last_analyze_at": None,
+                }
+                oid += 1
+
+        # Introspected as its root only, like a real partitioned table
+        schema, table = PARTITIONED_TABLE
+        full_name = f"{schema}.{table}"
+        self.tables[full_name] = {
+            "schema": schema,
+            "table": table,
+            "columns": [
+                {"name": "created_at", "type": "timestamp with time zone", "nullable": "NO"},
+                *make_columns(columns - 1, self.rng),
+            ],
+        }
+        self.markers[full_name] = (oid, f"{oid}:1:{PARTITION_MONTHS}")
+        self.activity[full_name] = {
+            "n_tup_ins": 0, "n_tup_upd": 0, "n_tup_del": 0,
+            "last_vacuum_at": None, "last_analyze_at": None,
+        }
+        self.partitions = {full_name: {
+            "strategy": "range",
+            "key": "RANGE (created_at)",
+            "partition_count": PARTITION_MONTHS,
+            "oldest_partition": f"{table}_2024_01",
+            "oldest_bound": self._partition_bound(1),
+            "newest_partition": f"{table}_2024_{PARTITION_MONTHS:02d}",
+            "newest_bound": self._partition_bound(PARTITION_MONTHS),
+            "default_partition": None,
+            "mismatched_count": 0,
+            "mismatched_partitions": [],
+            "partition_names": [f"{schema}.{table}_2024_{month:02d}" for month in range(1, PARTITION_MONTHS + 1)],
+        }}
+
+    @staticmethod
+    def _partition_bound(month: int) -> str:
+        upper = "2025-01-01" if month == 12 else f"2024-{month + 1:02d}-01"
+        return f"FOR VALUES FROM ('2024-{month:02d}-01 00:00:00+00') TO ('{upper} 00:00:00+00')"
+
+    def drift(self, fraction: float, rate: float = 0.05) -> int:
+        """Alters the columns of `fraction` of the tables; returns how many changed."""
+        names = self.rng.sample(sorted(self.tables), int(len(self.tables) * fraction))
+        for full_name in names:
+            schema_json = self.tables[full_name]
+            schema_json["columns"] = mutate(schema_json["columns"], self.rng, rate)
+            oid, marker = self.markers[full_name]
+            self.markers[full_name] = (oid, marker + "+")
+        return len(names)
+
+    def write(self, fraction: float):
+        """Bumps the insert counters of `fraction` of the tables."""
+        for full_name in self.rng.sample(sorted(self.tables), int(len(self.tables) * fraction)):
+            self.activity[full_name]["n_tup_ins"] += 1
+
+    # ---- connector API ----
+
+    def introspect_catalog(self, connection, relation_oids=None):
+        wanted = set(relation_oids) if relation_oids is not None else None
+        return {
+            full_name: {**schema_json, "columns": [dict(c) for c in schema_json["columns"]]}
+            for full_name, schema_json in self.tables.items()
+            if wanted is None or self.markers[full_name][0] in wanted
+        }
+
+    def introspect_tables(self, connection, relation_oids=None):
+        catalog = self.introspect_catalog(connection, relation_oids)
+        return catalog, {
+            full_name: dict(info)
+            for full_name, info in self.partitions.items()
+            if full_name in catalog
+        }
+
+    def fetch_catalog_markers(self, connection):
+        return 1, dict(self.markers)
+
+    async def introspect_tables_async(self, connection, relation_oids=None):
+        return self.introspect_tables(connection, relation_oids)
+
+    async def fetch_catalog_markers_async(self, connection):
+        return self.fetch_catalog_markers(connection)
+
+    def fetch_table_activity(self, connection):
+        return {full_name: dict(stats) for full_name, stats in self.activity.items()}
+
+    def install(self):
+        """Points the services at this catalog instead of a real client database."""
+        from app.connectors import async_postgres_connector
+        from app.services import discovery, freshness
+
+        discovery.introspect_tables = self.introspect_tables
+        discovery.fetch_catalog_markers = self.fetch_catalog_markers
+        # run_fleet_discovery imports these when it runs
+        async_postgres_connector.introspect_tables_async = self.introspect_tables_async
+        async_postgres_connector.fetch_catalog_markers_async = self.fetch_catalog_markers_async
+        freshness.fetch_table_activity = self.fetch_table_activity
+
+    def create_in_postgres(self, dsn: str):
+        """
+        Materializes the catalog as real (empty) tables, e.g. in the
+        client_postgres service from infra/docker-compose.yml.
+        """
+        import psycopg2
+
+        conn = psycopg2.connect(dsn)
+        conn.autocommit = True
+        cur = conn.cursor()
+        for schema in sorted({t["schema"] for t in self.tables.values()}):
+            cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+            cur.execute(f'CREATE SCHEMA "{schema}"')
+        for schema_json in self.tables.values():
+            columns = ", ".join(
+                f'"{c["name"]}" {c["type"]}{" NOT NULL" if c["nullable"] == "NO" else ""}'
+                for c in schema_json["columns"]
+            )
+            full_name = f'"{schema_json["schema"]}"."{schema_json["table"]}"'
+            if f'{schema_json["schema"]}.{schema_json["table"]}' not in self.partitions:
+                cur.execute(f"CREATE TABLE {full_name} ({columns})")
+                continue
+            cur.execute(f"CREATE TABLE {full_name} ({columns}) PARTITION BY RANGE (created_at)")
+            for month in range(1, PARTITION_MONTHS + 1):
+                cur.execute(
+                    f'CREATE TABLE "{schema_json["schema"]}"."{schema_json["table"]}_2024_{month:02d}" '
+                    f"PARTITION OF {full_name} {self._partition_bound(month)}"
+                )
+        cur.close()
+        conn.close()
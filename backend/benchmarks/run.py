@@ -0,0 +1,188 @@
+"""
+End-to-end benchmark of discovery, checks, diffing and snapshot writes
+against a synthetic catalog.
+
+Uses the metadata database from DATABASE_URL (point it at a scratch
+database: its connections/datasets/snapshots tables are written to). The
+client side is an in-memory fake connector unless --client-dsn names a real
+Postgres to create the synthetic tables in.
+
+Run from backend/:
+
+    python -m benchmarks.run --schemas 10 --tables 100 --columns 30 --save baseline.json
+    python -m benchmarks.run --schemas 10 --tables 100 --columns 30 --compare baseline.json
+"""
+import argparse
+import json
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from benchmarks.catalog import SyntheticCatalog
+
+
+class QueryCounter:
+    """Counts statements sent to the metadata database."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+class Scenario:
+    def __init__(self, counter: QueryCounter):
+        self.counter = counter
+        self.results = {}
+
+    @contextmanager
+    def measure(self, name: str):
+        phases = {}
+        queries = self.counter.count
+        started = time.perf_counter()
+        yield phases
+        self.results[name] = {
+            "wall_seconds": round(time.perf_counter() - started, 4),
+            "metadata_queries": self.counter.count - queries,
+            "phases": phases,
+        }
+
+
+def phase_recorder(phases: dict):
+    """A progress callback that keeps the per-phase timings jobs would report."""
+    def report(processed, total=None, **timings):
+        phases.update(timings)
+    return report
+
+
+def run(args) -> dict:
+    from app.db.session import SessionLocal, engine
+    from app.models import Base, Connection
+    from app.services.discovery import persist_discovery, run_discovery
+    from app.services.monitoring import run_checks_for_connection
+    from app.rules.schema_diff import diff_schemas_batch
+
+    catalog = SyntheticCatalog(args.schemas, args.tables, args.columns, seed=args.seed)
+    client = {}
+    if args.client_dsn:
+        from psycopg2.extensions import parse_dsn
+
+        catalog.create_in_postgres(args.client_dsn)
+        client = parse_dsn(args.client_dsn)
+    else:
+        catalog.install()
+
+    Base.metadata.create_all(bind=engine)
+    counter = QueryCounter(engine)
+    scenario = Scenario(counter)
+
+    db = SessionLocal()
+    conn = Connection(
+        name=f"benchmark-{int(time.time())}",
+        host=client.get("host", "localhost"),
+        port=int(client.get("port", 5432)),
+        database=client.get("dbname", "postgres"),
+        username=client.get("user", "postgres"),
+        password=client.get("password", ""),
+    )
+    db.add(conn)
+    db.commit()
+    db.refresh(conn)
+
+    with scenario.measure("discovery_initial") as phases:
+        run_discovery(db, conn, incremental=False, progress=phase_recorder(phases))
+
+    with scenario.measure("discovery_steady_full") as phases:
+        run_discovery(db, conn, incremental=False, progress=phase_recorder(phases))
+
+    with scenario.measure("discovery_steady_incremental") as phases:
+        run_discovery(db, conn, incremental=True, progress=phase_recorder(phases))
+
+    if not args.client_dsn:
+        before = catalog.introspect_catalog(None)
+        catalog.drift(args.drift)
+        after = catalog.introspect_catalog(None)
+
+        with scenario.measure("discovery_after_drift") as phases:
+            run_discovery(db, conn, incremental=True, progress=phase_recorder(phases))
+
+        with scenario.measure("snapshot_writes") as phases:
+            # Every table changed: the whole catalog goes through diff + snapshot insert
+            catalog.drift(1.0, rate=0.01)
+            started = time.perf_counter()
+            persist_discovery(db, conn, catalog.introspect_catalog(None))
+            phases["persist"] = round(time.perf_counter() - started, 4)
+
+        catalog.write(0.5)
+
+        with scenario.measure("diff_schema_batch") as phases:
+            pairs = [(before[name], after[name]) for name in before]
+            diff_schemas_batch(pairs)
+            phases["pairs"] = len(pairs)
+
+    with scenario.measure("run_checks") as phases:
+        run_checks_for_connection(db, conn, progress=phase_recorder(phases))
+
+    db.close()
+
+    return {
+        "params": {
+            "schemas": args.schemas,
+            "tables": args.tables,
+            "columns": args.columns,
+            "drift": args.drift,
+            "seed": args.seed,
+            "client": "postgres" if args.client_dsn else "fake",
+        },
+        "results": scenario.results,
+    }
+
+
+def compare(report: dict, baseline: dict):
+    print(f"{'scenario':32} {'wall s':>10} {'base s':>10} {'change':>8} {'queries':>8} {'base q':>8}")
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:32} {result['wall_seconds']:>10.4f} {'-':>10} {'-':>8} {result['metadata_queries']:>8} {'-':>8}")
+            continue
+        change = (result["wall_seconds"] - base["wall_seconds"]) / base["wall_seconds"] * 100 if base["wall_seconds"] else 0
+        print(
+            f"{name:32} {result['wall_seconds']:>10.4f} {base['wall_seconds']:>10.4f} "
+            f"{change:>+7.1f}% {result['metadata_queries']:>8} {base['metadata_queries']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemas", type=int, default=5)
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--drift", type=float, default=0.05, help="fraction of tables altered before the drift scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--client-dsn",
+        help="create the catalog in this Postgres (e.g. 'host=localhost port=5433 dbname=... user=... password=...') "
+             "instead of faking the connector",
+    )
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
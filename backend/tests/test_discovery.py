@@ -0,0 +1,121 @@
+import datetime
+
+from app.models import Dataset, Incident
+from app.services.discovery import _apply_scan, persist_discovery
+
+SCHEMA = {
+    "schema": "public",
+    "table": "metrics",
+    "columns": [{"name": "created_at", "type": "timestamp with time zone", "nullable": "NO"}],
+}
+
+PARTITION_INFO = {
+    "strategy": "range",
+    "key": "RANGE (created_at)",
+    "partition_count": 2,
+    "oldest_partition": "metrics_2026_01",
+    "oldest_bound": "FOR VALUES FROM ('2026-01-01 00:00:00+00') TO ('2026-02-01 00:00:00+00')",
+    "newest_partition": "metrics_2026_02",
+    "newest_bound": "FOR VALUES FROM ('2026-02-01 00:00:00+00') TO ('2026-03-01 00:00:00+00')",
+    "default_partition": None,
+    "mismatched_count": 0,
+    "mismatched_partitions": [],
+}
+
+
+def open_incident(db, dataset, rule_type):
+    db.add(Incident(
+        connection_id=dataset.connection_id, dataset_id=dataset.id, dataset_name=dataset.name,
+        rule_type=rule_type, severity="MEDIUM", details={}, status="open",
+    ))
+
+
+def legacy_partition_dataset(db, connection):
+    """A partition registered as a table of its own, with an open incident."""
+    dataset = Dataset(name="public.metrics_2026_01", connection_id=connection.id)
+    db.add(dataset)
+    db.flush()
+    open_incident(db, dataset, "SCHEMA_DRIFT")
+    db.commit()
+    return dataset.id
+
+
+def apply_scan(db, connection, catalog, plan):
+    fetched = {
+        "database_oid": 1,
+        "markers": {full_name: (oid, "1") for oid, full_name in enumerate(catalog)},
+        "plan": plan,
+        "catalog": catalog,
+        "partitions": {},
+    }
+    return _apply_scan(db, connection, None, fetched, datetime.datetime.now(datetime.timezone.utc))
+
+
+def discover(db, connection, catalog):
+    partitions = {"public.metrics": {
+        **PARTITION_INFO,
+        "partition_names": ["public.metrics_2026_01", "public.metrics_2026_02"],
+    }}
+    return persist_discovery(db, connection, catalog, partitions=partitions)
+
+
+def test_partition_datasets_are_retired_with_their_incidents(db, connection):
+    dataset_id = legacy_partition_dataset(db, connection)
+
+    summary = discover(db, connection, {"public.metrics": SCHEMA})
+
+    assert summary["datasets_retired"] == 1
+    assert db.get(Dataset, dataset_id).retired_at is not None
+    incident = db.query(Incident).filter(Incident.dataset_id == dataset_id).one()
+    assert incident.status == "resolved"
+    assert incident.resolved_at is not None
+    root = db.query(Dataset).filter(Dataset.name == "public.metrics").one()
+    assert root.retired_at is None
+    assert root.partition_info == PARTITION_INFO
+
+
+def test_retired_dataset_found_as_a_table_again_is_reinstated(db, connection):
+    dataset_id = legacy_partition_dataset(db, connection)
+    discover(db, connection, {"public.metrics": SCHEMA})
+
+    # Detached from its root, the partition is a plain table again
+    summary = persist_discovery(
+        db, connection,
+        {"public.metrics": SCHEMA, "public.metrics_2026_01": {**SCHEMA, "table": "metrics_2026_01"}},
+        partitions={"public.metrics": PARTITION_INFO},
+    )
+
+    assert summary["datasets_retired"] == 0
+    assert db.get(Dataset, dataset_id).retired_at is None
+
+
+def test_dropped_tables_are_retired_with_their_incidents(db, connection):
+    orders = {**SCHEMA, "table": "orders"}
+    persist_discovery(db, connection, {"public.metrics": SCHEMA, "public.orders": orders})
+    dataset = db.query(Dataset).filter(Dataset.name == "public.orders").one()
+    dataset_id = dataset.id
+    open_incident(db, dataset, "FRESHNESS")
+    db.commit()
+
+    summary = apply_scan(db, connection, {}, {
+        "full_scan": False, "changed_oids": [], "unchanged": ["public.metrics"], "dropped": ["public.orders"],
+    })
+
+    assert summary["tables_dropped"] == 1
+    assert summary["datasets_retired"] == 1
+    assert db.get(Dataset, dataset_id).retired_at is not None
+    assert db.query(Incident).filter(Incident.dataset_id == dataset_id).one().status == "resolved"
+    assert db.query(Dataset).filter(Dataset.name == "public.metrics").one().retired_at is None
+
+
+def test_full_scan_retires_datasets_missing_from_the_catalog(db, connection):
+    orders = {**SCHEMA, "table": "orders"}
+    persist_discovery(db, connection, {"public.metrics": SCHEMA, "public.orders": orders})
+
+    summary = apply_scan(db, connection, {"public.metrics": SCHEMA}, {
+        "full_scan": True, "changed_oids": None, "unchanged": [], "dropped": [],
+    })
+
+    assert summary["tables_dropped"] == 1
+    retired = db.query(Dataset.name).filter(Dataset.retired_at.isnot(None)).all()
+    assert [name for name, in retired] == ["public.orders"]
@@ -0,0 +1,86 @@
+import asyncio
+
+import psycopg2
+import psycopg2.errors
+import pytest
+
+from app.connectors.governor import HostBusy, HostGovernor, HostUnavailable, is_host_error
+
+
+class FakePgError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+@pytest.mark.parametrize("exc", [
+    psycopg2.OperationalError('connection to server at "db", port 5432 failed: Connection refused'),
+    psycopg2.OperationalError("connection to server failed: FATAL:  sorry, too many clients already"),
+    psycopg2.errors.QueryCanceled(),
+    psycopg2.errors.AdminShutdown(),
+    FakePgError("08006"),
+    FakePgError("53300"),
+    FakePgError("57P03"),
+    ConnectionRefusedError(),
+    asyncio.TimeoutError(),
+    HostUnavailable("open"),
+])
+def test_host_errors(exc):
+    assert is_host_error(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    psycopg2.OperationalError('connection to server failed: FATAL:  password authentication failed for user "veda"'),
+    psycopg2.OperationalError('connection to server failed: FATAL:  database "gone" does not exist'),
+    psycopg2.errors.UndefinedTable(),
+    FakePgError("28P01"),
+    FakePgError("3D000"),
+    ValueError("bug"),
+])
+def test_connection_and_query_errors(exc):
+    assert not is_host_error(exc)
+
+
+def test_breaker_opens_after_consecutive_host_errors_and_recovers():
+    governor = HostGovernor("db:5432", max_sessions=2, failure_threshold=2, cooldown=0)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionRefusedError):
+            with governor.session(timeout=1):
+                raise ConnectionRefusedError()
+    assert governor.state() == "half_open"  # cooldown already over
+
+    # The trial call succeeds and closes the breaker
+    with governor.session(timeout=1):
+        pass
+    assert governor.state() == "closed"
+    assert governor.failures == 0
+
+
+def test_breaker_fails_fast_while_open():
+    governor = HostGovernor("db:5432", max_sessions=2, failure_threshold=1, cooldown=60)
+    with pytest.raises(ConnectionRefusedError):
+        with governor.session(timeout=1):
+            raise ConnectionRefusedError()
+
+    with pytest.raises(HostUnavailable):
+        with governor.session(timeout=1):
+            pytest.fail("the host must not be called")
+    assert governor.state() == "open"
+
+
+def test_connection_errors_do_not_count_against_the_host():
+    governor = HostGovernor("db:5432", max_sessions=2, failure_threshold=1, cooldown=60)
+    with pytest.raises(psycopg2.OperationalError):
+        with governor.session(timeout=1):
+            raise psycopg2.OperationalError("connection to server failed: FATAL:  password authentication failed")
+    assert governor.state() == "closed"
+
+
+def test_session_cap():
+    governor = HostGovernor("db:5432", max_sessions=1, failure_threshold=3, cooldown=60)
+    with governor.session(timeout=1):
+        with pytest.raises(HostBusy):
+            with governor.session(timeout=0.01):
+                pass
+    assert governor.in_use == 0
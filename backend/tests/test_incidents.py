@@ -0,0 +1,71 @@
+import datetime
+
+from app.models import Incident
+from app.services.incidents import IncidentTracker
+
+NOW = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def run(db, connection, outcome, now=NOW, **options):
+    """One check run: outcome is the details dict of a failure, or None for a pass."""
+    tracker = IncidentTracker(db, connection.id, ("FRESHNESS",), now=now, **options)
+    if outcome is None:
+        tracker.ok("public.orders", "FRESHNESS")
+    else:
+        tracker.fail(None, "public.orders", "FRESHNESS", "MEDIUM", outcome)
+    written = tracker.flush()
+    db.commit()
+    return written
+
+
+def test_repeated_failures_update_one_incident(db, connection):
+    run(db, connection, {"run": 1})
+    run(db, connection, {"run": 2})
+
+    incident = db.query(Incident).one()
+    assert incident.status == "open"
+    assert incident.occurrence_count == 2
+    assert incident.details == {"run": 2}
+
+
+def test_resolves_after_consecutive_passes(db, connection):
+    run(db, connection, {"run": 1})
+    run(db, connection, None, resolve_after=2)
+    assert db.query(Incident).one().status == "open"
+
+    run(db, connection, None, resolve_after=2)
+    incident = db.query(Incident).one()
+    assert incident.status == "resolved"
+    assert incident.resolved_at is not None
+
+
+def test_failure_within_reopen_window_reopens(db, connection):
+    run(db, connection, {"run": 1})
+    run(db, connection, None, resolve_after=1)
+    run(db, connection, {"run": 2}, now=NOW + datetime.timedelta(minutes=5), reopen_window_minutes=60)
+
+    incident = db.query(Incident).one()
+    assert incident.status == "open"
+    assert incident.occurrence_count == 2
+
+
+def test_failure_after_reopen_window_opens_a_new_incident(db, connection):
+    run(db, connection, {"run": 1})
+    run(db, connection, None, resolve_after=1)
+    run(db, connection, {"run": 2}, now=NOW + datetime.timedelta(hours=2), reopen_window_minutes=60)
+
+    assert sorted(i.status for i in db.query(Incident)) == ["open", "resolved"]
+
+
+def test_duplicate_open_incidents_are_folded(db, connection):
+    for _ in range(2):
+        db.add(Incident(
+            connection_id=connection.id, dataset_name="public.orders", rule_type="FRESHNESS",
+            severity="MEDIUM", status="open", occurrence_count=1, details={},
+        ))
+    db.commit()
+
+    run(db, connection, {"run": 1})
+    incidents = db.query(Incident).order_by(Incident.id).all()
+    assert [i.status for i in incidents] == ["open", "resolved"]
+    assert incidents[0].occurrence_count == 3
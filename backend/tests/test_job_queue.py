@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+from app.jobs import queue as job_queue
+from app.jobs.queue import DatabaseJobQueue, InProcessJobQueue, Job
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job.status in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    pytest.fail(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    def echo(job, report):
+        report(1, 1, work=0.0)
+        return {"params": job.params}
+
+    def boom(job, report):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(job_queue.HANDLERS, "echo", echo)
+    monkeypatch.setitem(job_queue.HANDLERS, "boom", boom)
+
+
+def test_enqueue_rejects_unknown_kinds():
+    with pytest.raises(ValueError):
+        InProcessJobQueue(workers=1).enqueue("nope", None)
+
+
+def test_inprocess_queue_runs_jobs(handlers):
+    queue = InProcessJobQueue(workers=2)
+    try:
+        done = wait_for(queue, queue.enqueue("echo", None, incremental=False).id)
+        failed = wait_for(queue, queue.enqueue("boom", None).id)
+    finally:
+        queue.stop()
+
+    assert done.status == "succeeded"
+    assert done.result == {"params": {"incremental": False}}
+    assert (done.processed, done.total) == (1, 1)
+    assert failed.status == "failed"
+    assert failed.error == "boom"
+
+
+@pytest.fixture
+def redis_queue(monkeypatch, handlers):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url: fakeredis.FakeRedis(server=server))
+    queues = []
+
+    def make(**options):
+        queue = job_queue.RedisJobQueue(url="redis://test", **options)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+
+def test_redis_queue_runs_jobs(redis_queue):
+    queue = redis_queue(workers=2)
+    queue.start()
+    job = wait_for(queue, queue.enqueue("echo", None).id)
+
+    assert job.status == "succeeded"
+    assert queue._redis.llen(queue.QUEUE_KEY) == 0
+    for worker in queue._redis.smembers(queue.WORKERS_KEY):
+        assert queue._redis.llen(queue.PROCESSING_KEY.format(worker.decode())) == 0
+
+
+def test_redis_queue_requeues_jobs_of_dead_workers(redis_queue):
+    dead, alive = redis_queue(workers=1), redis_queue(workers=1)
+    job = Job("echo", None)
+    dead.save(job)
+    # The dead process had taken the job, and its alive key has expired
+    dead._redis.sadd(dead.WORKERS_KEY, f"{dead.process_id}:0")
+    dead._redis.lpush(dead.PROCESSING_KEY.format(f"{dead.process_id}:0"), job.id)
+
+    alive.start()
+    assert alive.requeue_stale() == 1
+    assert wait_for(alive, job.id).status == "succeeded"
+    assert not alive._redis.sismember(alive.WORKERS_KEY, f"{dead.process_id}:0")
+
+
+def test_redis_queue_fails_jobs_that_keep_killing_workers(redis_queue):
+    queue = redis_queue(workers=1, max_attempts=1)
+    job = Job("echo", None)
+    queue.save(job)
+    queue._redis.sadd(queue.WORKERS_KEY, "gone:0")
+    queue._redis.lpush(queue.PROCESSING_KEY.format("gone:0"), job.id)
+
+    assert queue.requeue_stale() == 0
+    failed = queue.get(job.id)
+    assert failed.status == "failed"
+    assert queue._redis.llen(queue.QUEUE_KEY) == 0
+
+
+def test_database_queue_claims_each_item_once(db, connection, engine, handlers):
+    queue = DatabaseJobQueue(worker_id="worker-1")
+    job = queue.enqueue("echo", connection.id)
+
+    with engine.connect() as lock_conn:
+        claimed, slot = queue.claim(lock_conn)
+        assert claimed.id == job.id
+        assert queue.claim(lock_conn) == (None, None)
+
+        queue.execute_leased(claimed)
+        queue.release_host_slot(lock_conn, slot)
+
+    assert queue.get(job.id).status == "succeeded"
+
+
+def test_failed_claim_does_not_keep_the_host_slot(db, connection, engine, handlers, monkeypatch):
+    from sqlalchemy import text
+
+    queue = DatabaseJobQueue(worker_id="worker-1")
+    queue.enqueue("echo", connection.id)
+
+    def broken(item):
+        raise RuntimeError("claim failed")
+
+    monkeypatch.setattr(queue, "_job_from_item", broken)
+    with engine.connect() as lock_conn:
+        with pytest.raises(RuntimeError):
+            queue.claim(lock_conn)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")).scalar() == 0
@@ -0,0 +1,154 @@
+import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import PARTITION_METADATA_TABLES
+from app.db import partitions
+from app.models import Dataset, Incident, SchemaSnapshot
+from app.services import snapshot_store
+from app.services.schema_history import get_schema_at
+from app.services.snapshot_store import SchemaResolver, encode_delta
+
+pytestmark = pytest.mark.skipif(not PARTITION_METADATA_TABLES, reason="metadata tables are not partitioned")
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+def schema(*names):
+    return {
+        "schema": "public",
+        "table": "t",
+        "columns": [{"name": name, "type": "text", "nullable": "YES"} for name in names],
+    }
+
+
+@pytest.fixture
+def months(engine, db):
+    created = partitions.ensure_partitions(engine, now=utc(2026, 3, 1), months_ahead=3)
+    yield
+    db.close()
+    with engine.begin() as conn:
+        for name in created:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+
+
+def add_snapshot(db, dataset, created_at, full=None, base=None, delta_of=None, seq=0):
+    snapshot = SchemaSnapshot(
+        dataset_id=dataset.id, dataset_name=dataset.name, created_at=created_at, checkpoint_seq=seq,
+        **({"kind": "full", "schema_json": full} if base is None else
+           {"kind": "delta", "base_snapshot_id": base.id, "delta_json": encode_delta(base.schema_json, delta_of)}),
+    )
+    db.add(snapshot)
+    db.flush()
+    return snapshot
+
+
+def test_prune_keeps_history_readable(db, connection, months, monkeypatch):
+    monkeypatch.setattr(snapshot_store, "SNAPSHOT_STORAGE", "delta")
+    chained, single = Dataset(name="public.chained", connection_id=connection.id), Dataset(
+        name="public.single", connection_id=connection.id)
+    db.add_all([chained, single])
+    db.flush()
+
+    first = schema("a", "b", "c", "d", "e", "f")
+    checkpoint = add_snapshot(db, chained, utc(2026, 3, 5), full=first)
+    add_snapshot(db, chained, utc(2026, 3, 20), base=checkpoint, delta_of=schema("a", "b", "c", "d", "e", "f", "g"), seq=1)
+    april = schema("a", "b", "c", "d", "e", "f", "g", "h")
+    add_snapshot(db, chained, utc(2026, 4, 10), base=checkpoint, delta_of=april, seq=2)
+    may = schema("a", "b", "c", "d", "e", "f", "g", "h", "i")
+    latest = add_snapshot(db, chained, utc(2026, 5, 20), base=checkpoint, delta_of=may, seq=3)
+    only = add_snapshot(db, single, utc(2026, 3, 10), full=schema("x"))
+    latest_id, only_id = latest.id, only.id
+    db.commit()
+
+    result = partitions.prune_partitions(
+        now=utc(2026, 6, 15), snapshot_retention_days=30, incident_retention_days=0,
+    )
+    assert result["removed"] == ["schema_snapshots_p2026_03", "schema_snapshots_p2026_04"]
+    assert result["snapshots_moved"] == 2  # the single dataset's snapshot, once per partition
+    db.expire_all()
+
+    # The chain lost its checkpoint and was re-anchored
+    remaining = db.query(SchemaSnapshot).filter_by(dataset_id=chained.id).order_by(SchemaSnapshot.created_at).all()
+    assert [s.id for s in remaining] == [latest_id]
+    assert remaining[0].kind == "full"
+    assert SchemaResolver(db).schema(remaining[0])["columns"] == may["columns"]
+
+    # The moved snapshot still answers for its original capture time
+    moved = db.query(SchemaSnapshot).filter_by(dataset_id=single.id).one()
+    assert moved.id == only_id
+    assert moved.created_at == utc(2026, 5, 1)
+    assert moved.original_created_at == utc(2026, 3, 10)
+    snapshot, found = get_schema_at(db, single.id, utc(2026, 3, 15))
+    assert snapshot.id == only_id and found["columns"] == schema("x")["columns"]
+    assert get_schema_at(db, single.id, utc(2026, 3, 1)) == (None, None)
+
+
+def test_prune_reanchors_deltas_without_touching_other_rows(db, connection, months, monkeypatch):
+    monkeypatch.setattr(snapshot_store, "SNAPSHOT_STORAGE", "delta")
+    dataset = Dataset(name="public.t", connection_id=connection.id)
+    db.add(dataset)
+    db.flush()
+
+    checkpoint = add_snapshot(db, dataset, utc(2026, 3, 5), full=schema("a", "b", "c", "d", "e", "f"))
+    june = [
+        schema("a", "b", "c", "d", "e", "f", "g"),
+        schema("a", "b", "c", "d", "e", "f", "g", "h"),
+    ]
+    kept = [
+        add_snapshot(db, dataset, utc(2026, 6, 1 + i), base=checkpoint, delta_of=s, seq=i + 1)
+        for i, s in enumerate(june)
+    ]
+    kept_keys = [(s.id, s.created_at) for s in kept]
+    db.commit()
+
+    partitions.prune_partitions(now=utc(2026, 6, 15), snapshot_retention_days=30, incident_retention_days=0)
+    db.expire_all()
+
+    first, second = (db.get(SchemaSnapshot, key) for key in kept_keys)
+    assert first.kind == "full" and first.original_created_at is None
+    assert second.kind == "delta" and second.base_snapshot_id == first.id
+    resolver = SchemaResolver(db)
+    assert [resolver.schema(s)["columns"] for s in (first, second)] == [s["columns"] for s in june]
+
+
+def test_prune_keeps_incident_partitions_with_open_incidents(db, connection, months, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(partitions, "invalidate", lambda *scopes: invalidated.extend(scopes))
+    db.add_all([
+        Incident(connection_id=connection.id, dataset_name="public.t", rule_type="FRESHNESS",
+                 severity="MEDIUM", status="resolved", details={}, created_at=utc(2026, 3, 5)),
+        Incident(connection_id=connection.id, dataset_name="public.u", rule_type="FRESHNESS",
+                 severity="MEDIUM", status="open", details={}, created_at=utc(2026, 4, 5)),
+    ])
+    db.commit()
+
+    result = partitions.prune_partitions(now=utc(2026, 6, 15), snapshot_retention_days=0, incident_retention_days=30)
+    assert result["removed"] == ["incidents_p2026_03"]
+    assert result["kept"] == ["incidents_p2026_04"]
+    assert [i.dataset_name for i in db.query(Incident)] == ["public.u"]
+    assert invalidated == [f"connection:{connection.id}:incidents"]
+
+
+def test_ensure_partitions_moves_rows_out_of_the_default_partition(db, connection, engine):
+    db.add(Incident(connection_id=connection.id, dataset_name="public.t", rule_type="FRESHNESS",
+                    severity="MEDIUM", status="open", details={}, created_at=utc(2026, 7, 15)))
+    db.commit()
+    db.close()
+
+    try:
+        created = partitions.ensure_partitions(engine, now=utc(2026, 7, 1), months_ahead=0)
+        assert "incidents_p2026_07" in created
+        with engine.connect() as conn:
+            assert conn.execute(text('SELECT count(*) FROM "incidents_p2026_07"')).scalar() == 1
+            assert conn.execute(text('SELECT count(*) FROM "incidents_default"')).scalar() == 0
+            assert conn.execute(text(
+                "SELECT count(*) FROM pg_inherits WHERE inhrelid = 'incidents_default'::regclass"
+            )).scalar() == 1
+    finally:
+        with engine.begin() as conn:
+            for name in ("incidents_p2026_07", "schema_snapshots_p2026_07"):
+                conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
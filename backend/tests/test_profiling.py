@@ -0,0 +1,25 @@
+from app.connectors.postgres_connector import parse_pg_array
+
+
+def test_parses_plain_and_quoted_elements():
+    assert parse_pg_array('{a,"b c",42}') == ["a", "b c", "42"]
+
+
+def test_unescapes_commas_quotes_and_backslashes():
+    # As printed by Postgres for ARRAY['a,b', 'c\d', 'e"f']
+    assert parse_pg_array(r'{"a,b","c\\d","e\"f"}') == ["a,b", "c\\d", 'e"f']
+
+
+def test_null_elements_are_none_unless_quoted():
+    assert parse_pg_array('{NULL,"NULL",x}') == [None, "NULL", "x"]
+
+
+def test_empty_arrays_and_elements():
+    assert parse_pg_array("{}") == []
+    assert parse_pg_array('{""}') == [""]
+    assert parse_pg_array('{"",a}') == ["", "a"]
+
+
+def test_null_and_multidimensional_input():
+    assert parse_pg_array(None) is None
+    assert parse_pg_array("{{1,2},{3,4}}") is None
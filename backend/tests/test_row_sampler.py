@@ -0,0 +1,86 @@
+from app.connectors.row_sampler import (
+    MAX_EXAMPLES,
+    DuplicateKeyAccumulator,
+    NullRateAccumulator,
+    RangeAccumulator,
+)
+from app.models import RowCheck
+from app.services.row_checks import check_failed
+
+
+def feed(accumulator, rows):
+    for row in rows:
+        accumulator.add(row)
+    return accumulator.result()
+
+
+def test_null_rate():
+    assert feed(NullRateAccumulator(), [(1,), (None,), (3,), (None,)]) == {"nulls": 2, "null_rate": 0.5}
+
+
+def test_null_rate_of_all_null_and_empty_samples():
+    assert feed(NullRateAccumulator(), [(None,), (None,)])["null_rate"] == 1.0
+    assert feed(NullRateAccumulator(), [])["null_rate"] is None
+
+
+def test_duplicate_keys_count_rows_beyond_the_first_of_each_run():
+    result = feed(DuplicateKeyAccumulator(), [(1, "a"), (1, "a"), (1, "a"), (2, "a"), (3, "b"), (3, "b")])
+
+    assert result["duplicate_rows"] == 3
+    assert result["duplicate_keys"] == 2
+    assert result["examples"] == [["1", "a"], ["3", "b"]]
+
+
+def test_keys_with_nulls_are_never_duplicates():
+    result = feed(DuplicateKeyAccumulator(), [(None, "a"), (None, "a"), (1, None), (1, None)])
+
+    assert result["duplicate_rows"] == 0
+    assert result["duplicate_keys"] == 0
+
+
+def test_duplicate_examples_are_capped():
+    rows = [(key,) for key in range(MAX_EXAMPLES + 3) for _ in range(2)]
+    result = feed(DuplicateKeyAccumulator(), rows)
+
+    assert result["duplicate_keys"] == MAX_EXAMPLES + 3
+    assert len(result["examples"]) == MAX_EXAMPLES
+
+
+def test_range_counts_flagged_values_and_tracks_extremes():
+    # (value, below min, above max), as computed by the server
+    result = feed(RangeAccumulator(0, 10), [
+        (0, False, False), (10, False, False), (-1, True, False), (11, False, True), (None, None, None),
+    ])
+
+    assert result["below_min"] == 1
+    assert result["above_max"] == 1
+    assert result["violation_rate"] == 0.5
+    assert (result["observed_min"], result["observed_max"]) == ("-1", "11")
+    assert result["examples"] == ["-1", "11"]
+
+
+def test_range_of_all_null_sample():
+    result = feed(RangeAccumulator(0, 10), [(None, None, None), (None, None, None)])
+
+    assert result["violation_rate"] is None
+    assert result["observed_min"] is None
+
+
+def test_check_fails_only_above_its_threshold():
+    check = RowCheck(check_type="null_rate", params={"max_null_rate": 0.5})
+    assert check_failed(check, {"null_rate": 0.5}) is False
+    assert check_failed(check, {"null_rate": 0.51}) is True
+
+    check = RowCheck(check_type="duplicate_keys", params={})
+    assert check_failed(check, {"rows_scanned": 10, "duplicate_rows": 0}) is False
+    assert check_failed(check, {"rows_scanned": 10, "duplicate_rows": 1}) is True
+
+    check = RowCheck(check_type="value_range", params={"min": 0, "max": 10, "max_violation_rate": 0.1})
+    assert check_failed(check, {"violation_rate": 0.1}) is False
+    assert check_failed(check, {"violation_rate": 0.2}) is True
+
+
+def test_check_without_rows_to_judge_is_undecided():
+    assert check_failed(RowCheck(check_type="null_rate", params={}), {"null_rate": None}) is None
+    assert check_failed(RowCheck(check_type="duplicate_keys", params={}), {"rows_scanned": 0, "duplicate_rows": 0}) is None
+    assert check_failed(RowCheck(check_type="value_range", params={}), {"violation_rate": None}) is None
@@ -0,0 +1,46 @@
+from app.rules.schema_diff import diff_columns, diff_schemas_batch, has_changes
+
+
+def col(name, type_="integer", nullable="YES"):
+    return {"name": name, "type": type_, "nullable": nullable}
+
+
+def schema(*columns):
+    return {"schema": "public", "table": "t", "columns": list(columns)}
+
+
+def test_identical_columns_have_no_changes():
+    columns = [col("id"), col("name", "text")]
+    assert not has_changes(diff_columns(columns, list(columns)))
+
+
+def test_added_removed_and_changed_columns():
+    diff = diff_columns(
+        [col("id", nullable="NO"), col("name", "text"), col("legacy", "bytea")],
+        [col("id"), col("name", "varchar"), col("email", "text")],
+    )
+    assert diff["added"] == ["email"]
+    assert diff["removed"] == ["legacy"]
+    assert diff["type_changed"] == ["name"]
+    assert diff["nullability_changed"] == ["id"]
+    assert diff["renamed"] == []
+
+
+def test_same_position_and_signature_is_a_rename():
+    diff = diff_columns([col("id"), col("mail", "text")], [col("id"), col("email", "text")])
+    assert diff["renamed"] == [{"from": "mail", "to": "email"}]
+    assert diff["added"] == diff["removed"] == []
+    assert diff["reordered"] == []
+
+
+def test_moved_column_is_reordered():
+    diff = diff_columns([col("a"), col("b"), col("c"), col("d")], [col("a"), col("c"), col("d"), col("b")])
+    assert diff["reordered"] == ["b"]
+
+
+def test_batch_shares_the_diff_of_equal_keys():
+    old, new = schema(col("id")), schema(col("id"), col("email", "text"))
+    diffs = diff_schemas_batch([(old, new), (old, new), (old, old)], keys=["k", "k", "same"])
+    assert diffs[0] is diffs[1]
+    assert diffs[0]["added"] == ["email"]
+    assert not has_changes(diffs[2])
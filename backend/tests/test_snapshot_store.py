@@ -0,0 +1,54 @@
+from app.models import Dataset, SchemaSnapshot
+from app.services.discovery import persist_discovery
+from app.services.schema import schema_fingerprint, snapshot_fingerprint
+from app.services.snapshot_store import SchemaResolver, compact_snapshots
+
+SCHEMA = {
+    "schema": "public",
+    "table": "orders",
+    "columns": [
+        {"name": "id", "type": "integer", "nullable": "NO"},
+        {"name": "total", "type": "numeric", "nullable": "YES"},
+    ],
+}
+
+
+def _legacy_snapshot(db, connection, **values):
+    dataset = Dataset(name="public.orders", connection_id=connection.id)
+    db.add(dataset)
+    db.flush()
+    snapshot = SchemaSnapshot(dataset_id=dataset.id, dataset_name=dataset.name, kind="full", **values)
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+def test_compaction_fingerprints_legacy_snapshots(db, connection):
+    # Stored before schema_hash existed
+    snapshot = _legacy_snapshot(db, connection, schema_json=SCHEMA)
+
+    compact_snapshots(db, connection.id, retention_days=0)
+    db.refresh(snapshot)
+    assert snapshot.schema_json is None
+    assert snapshot.body_id is not None
+    assert snapshot.schema_hash == schema_fingerprint(SCHEMA)
+
+    summary = persist_discovery(db, connection, {"public.orders": SCHEMA})
+    assert summary["schemas_changed"] == 0
+    assert db.query(SchemaSnapshot).count() == 1
+
+
+def test_snapshot_fingerprint_resolves_interned_rows_without_hash(db, connection):
+    # What compaction used to leave behind: a shared body but no schema_hash
+    snapshot = _legacy_snapshot(db, connection, schema_json=SCHEMA)
+    compact_snapshots(db, connection.id)
+    snapshot.schema_hash = None
+    db.commit()
+
+    assert snapshot_fingerprint(snapshot, SchemaResolver(db)) == schema_fingerprint(SCHEMA)
+    summary = persist_discovery(db, connection, {"public.orders": SCHEMA})
+    assert summary["schemas_changed"] == 0
+
+    changed = {**SCHEMA, "columns": SCHEMA["columns"][:1]}
+    summary = persist_discovery(db, connection, {"public.orders": changed})
+    assert summary["schemas_changed"] == 1